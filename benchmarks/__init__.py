@@ -0,0 +1,5 @@
+"""Benchmarks - Strands Agents Workshop
+
+Run from the project root, e.g. `python -m benchmarks.prompt_cache`.
+Benchmarks use the completed lab code and local stub models only.
+"""
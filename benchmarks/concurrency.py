@@ -0,0 +1,121 @@
+"""Concurrency benchmark - thread-per-request vs. async event loop
+
+Drives N concurrent requests through OrchestratorAgent with the stub
+model (MODEL_PROVIDER=stub, simulated model latency) and compares:
+- threads: one OS thread per request calling process_user_input()
+- async:   one event loop awaiting process_user_input_async()
+
+Reports wall time, throughput, peak traced memory and peak thread count.
+
+Usage:
+    python -m benchmarks.concurrency [--requests 200] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+os.environ.setdefault("MODEL_PROVIDER", "stub")
+
+from orchestrator_agent import OrchestratorAgent
+
+
+QUERIES = ["Hello", "What is Python?", "New York weather", "I'm feeling good today"]
+
+
+class ThreadSampler:
+    """Sample the live thread count in the background"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_threads(count: int) -> int:
+    """Thread-per-request design (sync API)"""
+    successes = []
+
+    def handle(index: int):
+        orchestrator = OrchestratorAgent(user_id=f"user{index}")
+        result = orchestrator.process_user_input(QUERIES[index % len(QUERIES)])
+        successes.append(result.get("success", False))
+
+    threads = [threading.Thread(target=handle, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(successes)
+
+
+def run_async(count: int) -> int:
+    """Single event loop design (async API)"""
+    async def handle(index: int) -> bool:
+        orchestrator = OrchestratorAgent(user_id=f"user{index}")
+        result = await orchestrator.process_user_input_async(QUERIES[index % len(QUERIES)])
+        return result.get("success", False)
+
+    async def run_all():
+        return await asyncio.gather(*(handle(i) for i in range(count)))
+
+    return sum(asyncio.run(run_all()))
+
+
+def measure(name: str, runner: Callable[[int], int], count: int) -> Dict[str, float]:
+    """Run one design and collect throughput / memory numbers"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadSampler() as sampler, contextlib.redirect_stdout(io.StringIO()):
+        succeeded = runner(count)
+    elapsed = time.perf_counter() - started
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "design": name,
+        "succeeded": succeeded,
+        "seconds": elapsed,
+        "throughput": count / elapsed if elapsed else 0.0,
+        "peak_mib": peak_bytes / (1024 * 1024),
+        "peak_threads": sampler.peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread vs. async concurrency benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="Concurrent requests")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub model latency (s)")
+    args = parser.parse_args()
+
+    from stub_model import get_stub_model
+    get_stub_model().update_config(latency=args.latency)
+
+    print(f"🏁 {args.requests} concurrent requests, stub model latency {args.latency * 1000:.0f} ms")
+    print(f"{'design':<10}{'ok':>6}{'seconds':>10}{'req/s':>10}{'peak MiB':>10}{'threads':>9}")
+    for name, runner in (("threads", run_threads), ("async", run_async)):
+        row = measure(name, runner, args.requests)
+        print(f"{row['design']:<10}{row['succeeded']:>6}{row['seconds']:>10.2f}"
+              f"{row['throughput']:>10.1f}{row['peak_mib']:>10.1f}{row['peak_threads']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+"""Load / soak test - StrandsAgentsWorkshopApp under a realistic traffic mix
+
+Drives the app (single process, or worker mode with --workers) with the
+WorkshopTester request categories (conversation, search, weather,
+compound, vague) against the stub model and a local stub HTTP server
+standing in for DuckDuckGo, Nominatim and api.weather.gov. Sub-agents
+call their leaf tools (STUB_MODEL_LEAF_TOOLS), so the HTTP client, the
+caches and the request memo are on the path. Model and HTTP latencies
+are log-normal (median, sigma).
+
+Modes:
+- open:   Poisson arrivals at each --rates step, independent of completions
+          (latency is measured from the scheduled arrival, so queueing counts)
+- closed: --users virtual users per step, each waiting for its answer and
+          then thinking (exponential, mean --think seconds)
+- soak:   closed loop for --duration seconds; every --interval reports
+          throughput, latency, errors and memory (RSS, workers included)
+- replay: re-send the requests of a request journal at their recorded
+          offsets (--speed scales time)
+
+Each step reports throughput, latency percentiles and the error rate;
+the sweep reports the knee of the latency curve: the last step before
+p99 latency exceeds KNEE_LATENCY_FACTOR x the first step's, or before
+throughput stops following the offered load. A step over an absolute
+limit - error rate above KNEE_MAX_ERROR_RATE or p99 above --slo-p99 -
+is saturated too, so the first step can be the one already past it.
+
+Usage:
+    python -m benchmarks.load open [--rates 1 2 4 8] [--step-seconds 30] [--slo-p99 5000]
+    python -m benchmarks.load closed [--users 1 4 16 32] [--think 1.0]
+    python -m benchmarks.load soak [--users 16] [--duration 10800] [--interval 300]
+    python -m benchmarks.load replay --journal requests.jsonl [--speed 2]
+    (any mode) --mix conversation=30,search=30,weather=20,compound=10,vague=10
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault("MODEL_PROVIDER", "stub")
+os.environ.setdefault("STUB_MODEL_LATENCY", "0.2")
+os.environ.setdefault("STUB_MODEL_LATENCY_SIGMA", "0.5")
+os.environ.setdefault("STUB_MODEL_LEAF_TOOLS", "1")
+os.environ.setdefault("BYPASS_TOOL_CONSENT", "true")
+
+
+# Stub HTTP latency: log-normal median (seconds) and sigma
+HTTP_LATENCY = 0.08
+HTTP_LATENCY_SIGMA = 0.6
+
+# Knee: p99 more than this factor over the first step, or throughput
+# growing by less than this fraction of the offered-load growth
+KNEE_LATENCY_FACTOR = 2.0
+KNEE_THROUGHPUT_EFFICIENCY = 0.5
+
+# Error rate at which a step is saturated whatever its latency
+KNEE_MAX_ERROR_RATE = 0.05
+
+DEFAULT_MIX = {"conversation": 30, "search": 30, "weather": 20, "compound": 10, "vague": 10}
+
+TOPICS = [
+    "Python", "artificial intelligence", "machine learning", "quantum computing", "the Roman Empire",
+    "photosynthesis", "black holes", "the Eiffel Tower", "jazz", "the Great Wall of China",
+    "blockchain", "climate change", "the Renaissance", "DNA", "volcanoes", "Mount Everest",
+    "the Amazon rainforest", "electric cars", "Shakespeare", "the Moon landing",
+]
+
+CITIES = [
+    "New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Seattle", "Denver", "Boston",
+    "Miami", "Atlanta", "San Francisco", "Portland", "Austin", "Nashville", "Las Vegas", "Detroit",
+]
+
+VAGUE = ["coffee", "stuff", "things", "music", "it", "hmm", "food", "the thing", "books", "cats"]
+
+CONVERSATION = [
+    "Hello", "Hi there", "I'm feeling good today", "Thanks for the help", "How are you doing?",
+    "Good morning", "Can you help me?", "That was useful, thank you",
+]
+
+TEMPLATES = {
+    "conversation": ["{conversation}"],
+    "search": ["What is {topic}?", "Tell me about {topic}", "What is the history of {topic}?"],
+    "weather": ["{city} weather", "How's the weather in {city}?", "What's the weather like in {city}?"],
+    "compound": [
+        "Tell me about {topic} and also tell me the weather in {city}",
+        "What is {topic} and how's the weather in {city}?",
+    ],
+    "vague": ["{vague}"],
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "category=weight,..." (unknown categories are an error)"""
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in TEMPLATES:
+            raise ValueError(f"unknown category {name!r} (expected one of {', '.join(TEMPLATES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class TrafficMix:
+    """Weighted random requests in the WorkshopTester categories"""
+
+    def __init__(self, mix: Dict[str, float], seed: int = 0):
+        self.categories = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.categories]
+        self.rng = random.Random(seed)
+
+    def next(self) -> Tuple[str, str]:
+        """Return (category, request text)"""
+        category = self.rng.choices(self.categories, self.weights)[0]
+        template = self.rng.choice(TEMPLATES[category])
+        return category, template.format(
+            conversation=self.rng.choice(CONVERSATION),
+            topic=self.rng.choice(TOPICS),
+            city=self.rng.choice(CITIES),
+            vague=self.rng.choice(VAGUE),
+        )
+
+
+class _StubAPIHandler(BaseHTTPRequestHandler):
+    """DuckDuckGo / Nominatim / weather.gov look-alike responses"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def do_GET(self):
+        server: "StubHTTPServer" = self.server.stub
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.latency())
+        if server.rng.random() < server.error_rate:
+            return self._reply(503, {"error": "stub outage"})
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query).get("q", [""])[0]
+        if url.path.startswith("/duckduckgo"):
+            body = {
+                "Heading": query.title(),
+                "Abstract": f"{query} - stub abstract. " * 8,
+                "AbstractURL": f"https://example.org/wiki/{query.replace(' ', '_')}",
+            }
+        elif url.path.startswith("/nominatim"):
+            seed = sum(map(ord, query))
+            body = [{
+                "lat": f"{25 + seed % 23 + 0.1234:.4f}",
+                "lon": f"{-70 - seed % 52 - 0.5678:.4f}",
+                "display_name": f"{query}, United States",
+            }]
+        elif url.path.startswith("/weather/points/"):
+            point = url.path.rsplit("/", 1)[-1]
+            body = {"properties": {
+                "forecast": f"http://{self.headers.get('Host')}/weather/gridpoints/{point}/forecast",
+                "relativeLocation": {"properties": {"city": "Stubville", "state": "ST"}},
+            }}
+        else:
+            return self._reply(404, {"error": "not found"})
+        self._reply(200, body)
+
+    def _reply(self, status: int, body: Any) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubHTTPServer:
+    """Local HTTP server standing in for the external APIs (thread per connection)"""
+
+    def __init__(self, latency: float = HTTP_LATENCY, sigma: float = HTTP_LATENCY_SIGMA, error_rate: float = 0.0):
+        self.median = latency
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rng = random.Random(1)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubAPIHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, name="stub-http", daemon=True).start()
+
+    def latency(self) -> float:
+        return self.median * self.rng.lognormvariate(0.0, self.sigma) if self.sigma else self.median
+
+    def point_tools_here(self) -> None:
+        """Point the tools at this server (before the app is imported / workers start)"""
+        os.environ["DUCKDUCKGO_API_URL"] = f"{self.url}/duckduckgo/"
+        os.environ["NOMINATIM_API_URL"] = f"{self.url}/nominatim/search"
+        os.environ["WEATHER_API_URL"] = f"{self.url}/weather"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@dataclass
+class Sample:
+    category: str
+    finished: float  # perf_counter
+    seconds: float
+    ok: bool
+
+
+class LoadDriver:
+    """Sends requests to the app and collects samples"""
+
+    def __init__(self, app, mix: TrafficMix, timeout: float = None):
+        self.app = app
+        self.mix = mix
+        self.timeout = timeout
+        self.samples: List[Sample] = []
+
+    async def send(self, user_id: str, category: str, text: str, scheduled: float = None) -> None:
+        started = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            result = await self.app.process_input_async(text, user_id=user_id, timeout=self.timeout)
+            ok = bool(result.get("success"))
+        except Exception:
+            ok = False
+        finished = time.perf_counter()
+        self.samples.append(Sample(category, finished, finished - started, ok))
+
+    async def open_loop(self, rate: float, seconds: float, users: int) -> None:
+        """Poisson arrivals for seconds, then wait for the requests in flight"""
+        tasks = []
+        started = time.perf_counter()
+        scheduled = started
+        while True:
+            scheduled += self.mix.rng.expovariate(rate)
+            if scheduled - started >= seconds:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            category, text = self.mix.next()
+            user_id = f"user{self.mix.rng.randrange(users)}"
+            tasks.append(asyncio.create_task(self.send(user_id, category, text, scheduled)))
+        await asyncio.gather(*tasks)
+
+    async def closed_loop(self, users: int, seconds: float, think: float) -> None:
+        """users virtual users, each: request → answer → think, until seconds pass"""
+        deadline = time.perf_counter() + seconds
+
+        async def user(index: int) -> None:
+            rng = random.Random(index)
+            # Stagger the first requests over one think time
+            await asyncio.sleep(rng.uniform(0, think) if think else 0)
+            while time.perf_counter() < deadline:
+                category, text = self.mix.next()
+                await self.send(f"user{index}", category, text)
+                if think:
+                    await asyncio.sleep(rng.expovariate(1 / think))
+
+        await asyncio.gather(*(user(i) for i in range(users)))
+
+    async def replay(self, requests: List[Dict[str, Any]], speed: float) -> None:
+        """Re-send journaled requests at their recorded offsets"""
+        tasks = []
+        started = time.perf_counter()
+        for request in requests:
+            scheduled = started + request["offset"] / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.send(request["user_id"], "replay", request["input"], scheduled)))
+        await asyncio.gather(*tasks)
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def summarize(samples: List[Sample], seconds: float) -> Dict[str, float]:
+    """Throughput (completions/s), latency percentiles (ms) and error rate"""
+    latencies = sorted(sample.seconds for sample in samples)
+    errors = sum(1 for sample in samples if not sample.ok)
+    return {
+        "requests": len(samples),
+        "throughput": len(samples) / seconds if seconds else 0.0,
+        "p50": _quantile(latencies, 0.5) * 1000,
+        "p90": _quantile(latencies, 0.9) * 1000,
+        "p99": _quantile(latencies, 0.99) * 1000,
+        "errors": errors / len(samples) if samples else 0.0,
+    }
+
+
+def find_knee(rows: List[Dict[str, float]], slo_p99: Optional[float] = None) -> Optional[Dict[str, float]]:
+    """
+    Last step before the latency curve bends
+
+    The curve is relative to the first step; the absolute limits (error
+    rate, p99 SLO) apply to every step, the first one included.
+
+    Args:
+        rows: Step summaries with "offered", in increasing offered load
+        slo_p99: p99 latency limit in ms (None: no absolute latency limit)
+
+    Returns:
+        The knee step (None if even the first step is saturated)
+    """
+    if not rows:
+        return None
+    baseline = rows[0]["p99"]
+    knee = None
+    for previous, row in zip([None] + rows[:-1], rows):
+        if row["errors"] > KNEE_MAX_ERROR_RATE or (slo_p99 is not None and row["p99"] > slo_p99):
+            break
+        if row["p99"] > KNEE_LATENCY_FACTOR * baseline:
+            break
+        if previous is not None and previous["throughput"]:
+            load_growth = row["offered"] / previous["offered"] - 1
+            throughput_growth = row["throughput"] / previous["throughput"] - 1
+            if load_growth > 0 and throughput_growth < KNEE_THROUGHPUT_EFFICIENCY * load_growth:
+                break
+        knee = row
+    return knee
+
+
+def rss_bytes(pids: List[int]) -> int:
+    """Resident set size of this process and the given ones (Linux /proc; 0 elsewhere)"""
+    total = 0
+    page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+    for pid in [os.getpid()] + pids:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def _slope(points: List[Tuple[float, float]]) -> float:
+    """Least-squares slope of (x, y) points"""
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator if denominator else 0.0
+
+
+ROW_HEADER = f"{'offered':>9}{'requests':>10}{'req/s':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'errors':>8}"
+
+
+def _row(offered: str, row: Dict[str, float]) -> str:
+    return (f"{offered:>9}{row['requests']:>10}{row['throughput']:>8.2f}{row['p50']:>9.0f}"
+            f"{row['p90']:>9.0f}{row['p99']:>9.0f}{row['errors']:>8.1%}")
+
+
+def _by_category(samples: List[Sample]) -> str:
+    parts = []
+    for category in sorted({sample.category for sample in samples}):
+        subset = sorted(sample.seconds for sample in samples if sample.category == category)
+        parts.append(f"{category} p99 {_quantile(subset, 0.99) * 1000:.0f} ms")
+    return ", ".join(parts)
+
+
+async def sweep(driver: LoadDriver, args, out) -> None:
+    """Open- or closed-loop steps of increasing load, then the knee"""
+    levels = args.rates if args.mode == "open" else args.users
+    unit = "req/s" if args.mode == "open" else "users"
+    print(ROW_HEADER, file=out)
+    rows = []
+    for level in levels:
+        driver.samples = []
+        started = time.perf_counter()
+        if args.mode == "open":
+            await driver.open_loop(level, args.step_seconds, args.user_pool)
+        else:
+            await driver.closed_loop(int(level), args.step_seconds, args.think)
+        row = summarize(driver.samples, time.perf_counter() - started)
+        row["offered"] = level
+        rows.append(row)
+        print(_row(f"{level:g}", row), file=out)
+        print(f"{'':>9}  {_by_category(driver.samples)}", file=out)
+
+    knee = find_knee(rows, args.slo_p99)
+    if knee is None:
+        print(f"📈 knee: below {levels[0]:g} {unit} (first step already saturated)", file=out)
+    elif knee is rows[-1]:
+        print(f"📈 knee: not reached (latency flat up to {knee['offered']:g} {unit}, "
+              f"{knee['throughput']:.2f} req/s)", file=out)
+    else:
+        print(f"📈 knee: ~{knee['offered']:g} {unit} ({knee['throughput']:.2f} req/s, "
+              f"p99 {knee['p99']:.0f} ms)", file=out)
+
+
+async def soak(driver: LoadDriver, app, args, out) -> None:
+    """Closed loop for args.duration with a report line per interval"""
+    pids = app.worker_pool.pids if app.worker_pool else []
+    task = asyncio.create_task(driver.closed_loop(args.users[0], args.duration, args.think))
+    started = time.perf_counter()
+    memory: List[Tuple[float, float]] = []
+    print(f"{'elapsed':>9}{'requests':>10}{'req/s':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'errors':>8}"
+          f"{'RSS MB':>9}", file=out)
+
+    async def report(window_start: float) -> None:
+        now = time.perf_counter()
+        window, driver.samples = driver.samples, []
+        gc.collect()
+        rss = rss_bytes(pids) / 2 ** 20
+        memory.append((now - started, rss))
+        row = summarize(window, now - window_start)
+        print(_row(f"{now - started:.0f}s", row) + f"{rss:>9.1f}", file=out, flush=True)
+
+    window_start = started
+    while not task.done():
+        await asyncio.wait([task], timeout=args.interval)
+        await report(window_start)
+        window_start = time.perf_counter()
+    await task
+
+    # The first interval is warm-up (imports, sessions, caches filling)
+    steady = memory[1:] if len(memory) > 2 else memory
+    growth = steady[-1][1] - steady[0][1] if steady else 0.0
+    print(f"🧠 memory: {memory[0][1]:.1f} → {memory[-1][1]:.1f} MB; after warm-up {growth:+.1f} MB "
+          f"({_slope(steady) * 3600:+.1f} MB/hour)", file=out)
+
+
+async def run(app, args, out) -> None:
+    driver = LoadDriver(app, TrafficMix(args.mix, args.seed), args.timeout)
+    if args.mode == "soak":
+        await soak(driver, app, args, out)
+    elif args.mode == "replay":
+        from journal import replay_requests
+
+        requests = replay_requests(args.journal)
+        started = time.perf_counter()
+        await driver.replay(requests, args.speed)
+        row = summarize(driver.samples, time.perf_counter() - started)
+        print(ROW_HEADER, file=out)
+        print(_row("replay", row), file=out)
+    else:
+        await sweep(driver, args, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load / soak test with a realistic traffic mix")
+    parser.add_argument("mode", choices=["open", "closed", "soak", "replay"])
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="category=weight,...")
+    parser.add_argument("--rates", type=float, nargs="+", default=[1, 2, 4, 8], help="open: arrivals/s per step")
+    parser.add_argument("--users", type=int, nargs="+", default=None,
+                        help="closed: virtual users per step (soak: first value, default 16)")
+    parser.add_argument("--user-pool", type=int, default=200, help="open: distinct user IDs")
+    parser.add_argument("--think", type=float, default=1.0, help="closed/soak: mean think time (s)")
+    parser.add_argument("--step-seconds", type=float, default=30.0, help="Seconds per sweep step")
+    parser.add_argument("--slo-p99", type=float, default=None,
+                        help="open/closed: p99 latency limit (ms) a step must stay under to count toward the knee")
+    parser.add_argument("--duration", type=float, default=3 * 3600.0, help="soak: seconds")
+    parser.add_argument("--interval", type=float, default=300.0, help="soak: seconds per report line")
+    parser.add_argument("--journal", help="replay: request journal (JSONL)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay: time scale")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0: single process)")
+    parser.add_argument("--timeout", type=float, default=None, help="Request deadline (default: app default)")
+    parser.add_argument("--http-latency", type=float, default=HTTP_LATENCY, help="Stub HTTP median latency (s)")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="Fraction of stub HTTP 503s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.users is None:
+        args.users = [16] if args.mode == "soak" else [1, 4, 16, 32]
+    if args.mode == "replay" and not args.journal:
+        parser.error("replay needs --journal")
+
+    server = StubHTTPServer(args.http_latency, error_rate=args.http_error_rate)
+    server.point_tools_here()
+    out = sys.stdout
+    print(f"🏁 {args.mode}: mix " + ", ".join(f"{name}={weight:g}" for name, weight in args.mix.items()), file=out)
+    print(f"   model {float(os.environ['STUB_MODEL_LATENCY']) * 1000:.0f} ms (σ {os.environ['STUB_MODEL_LATENCY_SIGMA']}), "
+          f"HTTP {args.http_latency * 1000:.0f} ms (σ {HTTP_LATENCY_SIGMA}), "
+          f"{args.workers or 'single'} process{'es' if args.workers else ''}", file=out)
+
+    # Agents, tools and the app print progress; keep the report readable
+    logging.getLogger("strands_tools").setLevel(logging.ERROR)  # per-call deprecation notices
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        from main import StrandsAgentsWorkshopApp
+
+        app = StrandsAgentsWorkshopApp(workers=args.workers, warmup=False)
+        try:
+            asyncio.run(run(app, args, out))
+            print(f"🌐 stub HTTP requests: {server.requests}", file=out)
+        finally:
+            app.close()
+            server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Memory benchmark - bytes retained per session
+
+Runs N concurrent scripted sessions through OrchestratorAgent with the
+stub model and measures, with tracemalloc, the memory each session
+retains (its agent with conversation history, plus the results of its
+turns) and the peak while the sessions run.
+
+Results are kept either as returned (slots-based AgentResponse records
+referencing the agent's text) or converted to the previous shape (plain
+dicts holding their own copy of the response text) for comparison.
+
+Usage:
+    python -m benchmarks.memory [--sessions 200] [--turns 4]
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault("MODEL_PROVIDER", "stub")
+
+from orchestrator_agent import OrchestratorAgent
+
+
+SCRIPT = [
+    "Hello",
+    "What is Python?",
+    "New York weather",
+    "Tell me about Paris and the weather in Paris",
+    "I'm feeling good today",
+]
+
+
+def padded(responder: Callable[..., Any], chars: int) -> Callable[..., Any]:
+    """Pad text replies to a realistic response length"""
+    def respond(messages, tool_specs):
+        reply = responder(messages, tool_specs)
+        if isinstance(reply, str) and not reply.startswith("{"):
+            reply = (reply + " lorem ipsum") * max(1, chars // (len(reply) + 12))
+        return reply
+    return respond
+
+
+def as_dict(result: Any) -> Dict[str, Any]:
+    """Previous result shape: a dict with its own copy of the response text"""
+    copied = dict(result)
+    if "response" in copied:
+        copied["response"] = "".join([copied["response"], "\n"])
+    return copied
+
+
+async def run_session(index: int, turns: int, keep_dicts: bool) -> List[Any]:
+    """Run one scripted session and keep its agent and results alive"""
+    orchestrator = OrchestratorAgent(user_id=f"user{index}")
+    results: List[Any] = [orchestrator]
+    for turn in range(turns):
+        result = await orchestrator.process_user_input_async(SCRIPT[(index + turn) % len(SCRIPT)])
+        results.append(as_dict(result) if keep_dicts else result)
+    return results
+
+
+def measure(sessions: int, turns: int, keep_dicts: bool) -> Dict[str, float]:
+    """Return retained / peak bytes per session"""
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+
+    async def run_all():
+        return await asyncio.gather(*(run_session(i, turns, keep_dicts) for i in range(sessions)))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        kept = asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ok = sum(1 for session in kept for result in session[1:] if result.get("success"))
+    del kept
+    return {
+        "ok": ok,
+        "seconds": elapsed,
+        "retained_per_session": (current - baseline) / sessions,
+        "peak_per_session": (peak - baseline) / sessions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-session memory benchmark")
+    parser.add_argument("--sessions", type=int, default=200, help="Concurrent sessions")
+    parser.add_argument("--turns", type=int, default=4, help="Turns per session")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub model latency (s)")
+    parser.add_argument("--response-chars", type=int, default=2000, help="Approximate model reply length")
+    args = parser.parse_args()
+
+    from stub_model import get_stub_model
+    model = get_stub_model()
+    model.update_config(latency=args.latency)
+    model.responder = padded(model.responder, args.response_chars)
+
+    # Warm up imports, tool specs and module-level caches outside the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run_session(0, len(SCRIPT), False))
+
+    print(f"🏁 {args.sessions} concurrent sessions x {args.turns} turns, ~{args.response_chars} char replies")
+    print(f"{'results':<10}{'ok':>6}{'seconds':>9}{'retained B/session':>20}{'peak B/session':>16}")
+    for name, keep_dicts in (("records", False), ("dicts", True)):
+        row = measure(args.sessions, args.turns, keep_dicts)
+        print(f"{name:<10}{row['ok']:>6}{row['seconds']:>9.2f}"
+              f"{row['retained_per_session']:>20,.0f}{row['peak_per_session']:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Model pool benchmark - pinned endpoint vs. ModelPool failover
+
+Sends N concurrent model calls to local stub endpoints standing in for
+Bedrock regions and compares:
+- pinned: every call goes to one endpoint (today's single AWS_REGION)
+- pool:   ModelPool over all endpoints (least outstanding x latency EWMA,
+          failover on throttling)
+
+The pinned region is the fastest but throttles a fraction of calls, and
+halfway through the run it gets a latency spike. Throttled calls are
+retried with exponential backoff (like the Strands event loop, scaled
+down) and count as failed after the last attempt.
+
+Usage:
+    python -m benchmarks.model_pool [--calls 400] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List
+
+from strands.types.exceptions import ModelThrottledException
+
+from model_config import ModelPool
+from stub_model import StubModel
+
+
+# (name, latency seconds, throttle rate) - the first endpoint is the pinned one
+ENDPOINTS = [
+    ("us-west-2", 0.10, 0.20),
+    ("us-east-1", 0.15, 0.0),
+    ("eu-west-1", 0.30, 0.0),
+]
+
+SPIKE_ENDPOINT = "us-west-2"
+SPIKE_LATENCY = 1.0
+
+RETRIES = 5
+BACKOFF = 0.05
+
+MESSAGES = [{"role": "user", "content": [{"text": "Hello"}]}]
+
+
+def build_endpoints() -> Dict[str, StubModel]:
+    return {
+        name: StubModel(latency=latency, throttle_rate=throttle_rate, model_id=f"stub.{name}")
+        for name, latency, throttle_rate in ENDPOINTS
+    }
+
+
+async def call(model) -> float:
+    """One model call with backoff retries; returns latency in seconds"""
+    started = time.perf_counter()
+    for attempt in range(RETRIES + 1):
+        try:
+            async for _ in model.stream(MESSAGES):
+                pass
+            return time.perf_counter() - started
+        except ModelThrottledException:
+            if attempt == RETRIES:
+                raise
+            await asyncio.sleep(BACKOFF * 2 ** attempt)
+
+
+async def run(model, endpoints: Dict[str, StubModel], calls: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failed = 0
+    done = 0
+
+    async def one():
+        nonlocal failed, done
+        async with semaphore:
+            try:
+                latencies.append(await call(model))
+            except ModelThrottledException:
+                failed += 1
+            done += 1
+            if done == calls // 2:
+                endpoints[SPIKE_ENDPOINT].update_config(latency=SPIKE_LATENCY)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {"ok": len(latencies), "failed": failed, "seconds": elapsed, "p50": pct(0.5), "p99": pct(0.99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model pool failover benchmark")
+    parser.add_argument("--calls", type=int, default=400, help="Model calls")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent calls")
+    args = parser.parse_args()
+
+    print(f"🏁 {args.calls} model calls, concurrency {args.concurrency}")
+    print("   endpoints: " + ", ".join(f"{n} ({l * 1000:.0f} ms, {t:.0%} throttled)" for n, l, t in ENDPOINTS))
+    print(f"   {SPIKE_ENDPOINT} latency → {SPIKE_LATENCY * 1000:.0f} ms halfway through")
+    print(f"{'mode':<8}{'ok':>6}{'failed':>8}{'seconds':>9}{'p50 ms':>9}{'p99 ms':>9}  calls per endpoint")
+
+    endpoints = build_endpoints()
+    row = asyncio.run(run(endpoints[ENDPOINTS[0][0]], endpoints, args.calls, args.concurrency))
+    print(f"{'pinned':<8}{row['ok']:>6}{row['failed']:>8}{row['seconds']:>9.2f}{row['p50']:>9.0f}{row['p99']:>9.0f}"
+          f"  {ENDPOINTS[0][0]}: all")
+
+    endpoints = build_endpoints()
+    pool = ModelPool(list(endpoints.items()))
+    row = asyncio.run(run(pool, endpoints, args.calls, args.concurrency))
+    spread = Counter({name: stats["calls"] for name, stats in pool.stats().items()})
+    print(f"{'pool':<8}{row['ok']:>6}{row['failed']:>8}{row['seconds']:>9.2f}{row['p50']:>9.0f}{row['p99']:>9.0f}"
+          f"  " + ", ".join(f"{name}: {count}" for name, count in spread.items()))
+    for name, stats in pool.stats().items():
+        print(f"   {name}: EWMA {stats['latency_ewma_ms']} ms, {stats['throttles']} throttles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Prompt cache benchmark - cached vs. uncached input tokens per turn
+
+Compares the legacy orchestrator prompt layout (per-user line near the
+top, so every user has a unique prefix) with the shared-prefix layout,
+both with cache checkpoints enabled, against the cache-simulating
+StubModel.
+
+Usage:
+    python -m benchmarks.prompt_cache [--users 5] [--turns 3]
+"""
+import argparse
+from typing import Dict, List
+
+from strands import Agent
+from strands.handlers.callback_handler import null_callback_handler
+
+from orchestrator_agent import OrchestratorAgent, ORCHESTRATOR_PROMPT
+from prompt_layout import snapshot_usage, usage_since
+from stub_model import StubModel
+from sub_agents import search_agent, weather_agent, conversation_agent
+
+
+QUERIES = ["Hello", "What is Python?", "New York weather"]
+
+
+def run_legacy(model: StubModel, user_id: str, turns: int) -> List[Dict[str, int]]:
+    """Legacy layout: user ID interpolated right after the first line"""
+    first_line, rest = ORCHESTRATOR_PROMPT.split("\n", 1)
+    agent = Agent(
+        model=model,
+        system_prompt=[
+            {"text": f"{first_line}\nUser ID: {user_id}\n{rest}"},
+            {"cachePoint": {"type": "default"}}
+        ],
+        tools=[search_agent, weather_agent, conversation_agent],
+        callback_handler=None
+    )
+    usages = []
+    for turn in range(turns):
+        before = snapshot_usage(agent)
+        agent(QUERIES[turn % len(QUERIES)])
+        usages.append(usage_since(agent, before))
+    return usages
+
+
+def run_shared_prefix(model: StubModel, user_id: str, turns: int) -> List[Dict[str, int]]:
+    """Shared-prefix layout through OrchestratorAgent"""
+    orchestrator = OrchestratorAgent(model, user_id)
+    orchestrator.orchestrator.callback_handler = null_callback_handler
+    return [
+        orchestrator.process_user_input(QUERIES[turn % len(QUERIES)])["token_usage"]
+        for turn in range(turns)
+    ]
+
+
+def report(name: str, per_user: Dict[str, List[Dict[str, int]]]) -> None:
+    """Print per-turn and total cached/uncached input tokens"""
+    print(f"\n📊 {name}")
+    print(f"{'user':<10}{'turn':>5}{'uncached':>10}{'cache_rd':>10}{'cache_wr':>10}")
+    totals = {"uncached_input_tokens": 0, "cache_read_input_tokens": 0, "cache_write_input_tokens": 0}
+    for user_id, usages in per_user.items():
+        for turn, usage in enumerate(usages, 1):
+            print(f"{user_id:<10}{turn:>5}{usage['uncached_input_tokens']:>10}"
+                  f"{usage['cache_read_input_tokens']:>10}{usage['cache_write_input_tokens']:>10}")
+            for key in totals:
+                totals[key] += usage[key]
+
+    all_input = sum(totals.values())
+    hit_ratio = totals["cache_read_input_tokens"] / all_input if all_input else 0.0
+    print(f"Total: uncached={totals['uncached_input_tokens']} "
+          f"cache_read={totals['cache_read_input_tokens']} "
+          f"cache_write={totals['cache_write_input_tokens']} "
+          f"(cached share {hit_ratio:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt cache layout benchmark")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=3)
+    args = parser.parse_args()
+
+    user_ids = [f"user{i}" for i in range(args.users)]
+
+    legacy_model = StubModel()
+    report("Legacy layout (user ID in prefix)",
+           {uid: run_legacy(legacy_model, uid, args.turns) for uid in user_ids})
+
+    shared_model = StubModel()
+    report("Shared-prefix layout",
+           {uid: run_shared_prefix(shared_model, uid, args.turns) for uid in user_ids})
+
+
+if __name__ == "__main__":
+    main()
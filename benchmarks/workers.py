@@ -0,0 +1,69 @@
+"""Worker pool benchmark - throughput vs. number of worker processes
+
+Drives requests from many users through StrandsAgentsWorkshopApp in
+worker mode with the stub model. The stub burns CPU per model call
+(STUB_MODEL_CPU_COST) to stand in for payload parsing and response
+formatting, so a single process is GIL-bound and throughput should
+scale with worker processes up to the core count.
+
+Usage:
+    python -m benchmarks.workers [--requests 200] [--workers 1 2 4]
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import wait
+
+os.environ.setdefault("MODEL_PROVIDER", "stub")
+os.environ.setdefault("STUB_MODEL_LATENCY", "0.02")
+os.environ.setdefault("STUB_MODEL_CPU_COST", "0.01")
+
+from main import StrandsAgentsWorkshopApp
+
+
+QUERIES = ["Hello", "What is Python?", "New York weather", "I'm feeling good today"]
+
+
+def run(workers: int, requests: int, users: int) -> float:
+    """Return requests/second for one worker count"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = StrandsAgentsWorkshopApp(workers=workers, warmup=False)
+    try:
+        # Warm up every worker (imports, model client, first session)
+        wait([app.worker_pool.submit(f"warm{i}", "Hello") for i in range(workers * 4)])
+
+        started = time.perf_counter()
+        futures = [
+            app.worker_pool.submit(f"user{i % users}", QUERIES[i % len(QUERIES)])
+            for i in range(requests)
+        ]
+        wait(futures)
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for f in futures if not f.result().get("success"))
+        if failed:
+            print(f"⚠️ {failed} requests failed")
+        return requests / elapsed
+    finally:
+        app.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker pool scaling benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"🏁 {args.requests} requests from {args.users} users (cpu cores: {os.cpu_count()})")
+    print(f"{'workers':>8}{'req/s':>10}{'speedup':>9}")
+    baseline = None
+    for workers in args.workers:
+        throughput = run(workers, args.requests, args.users)
+        baseline = baseline or throughput
+        print(f"{workers:>8}{throughput:>10.1f}{throughput / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Cache - Strands Agents Workshop
+
+Two-tier TTL cache for tool results (geocoding, search):
+- Local tier: in-process LRU dict (per worker process)
+- Shared tier: optional SQLite file readable by every worker process
+  (enabled with the SHARED_CACHE_PATH environment variable)
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from records import ToolResult
+
+
+def _encode(value: Any) -> Any:
+    """JSON fallback for result records (mapping view)"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def normalize_key(value: str) -> str:
+    """Normalize a cache key ("  New York " → "new york")"""
+    return " ".join(str(value).lower().split())
+
+
+# Maximum queued writes committed in one transaction
+WRITE_BATCH_SIZE = 256
+
+
+class SharedCacheTier:
+    """
+    SQLite-backed cache tier shared across processes
+
+    Each process opens its own connections; WAL mode lets readers run
+    concurrently with a writer. Writes are queued and committed in
+    batches by a background thread, and every reading thread has its own
+    read-only connection, so callers (async tools on a worker's event
+    loop) never wait on SQLite locks or on the writer.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize shared cache tier
+
+        Args:
+            path: SQLite database file path
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL,"
+            " value TEXT NOT NULL, expires_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+        self._readers = threading.local()
+        self.stats = {"writes": 0, "batches": 0, "write_errors": 0}
+        self._writes: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_batches, name="shared-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _read_connection(self) -> sqlite3.Connection:
+        """This thread's read-only connection (not shared with the writer)"""
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._readers.conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA query_only=1")
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) or None if missing/expired"""
+        row = self._read_connection().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, namespace: str, key: str, value: Any, expires_at: float) -> None:
+        """Queue a value to store until expires_at (wall-clock seconds)"""
+        payload = json.dumps(value, ensure_ascii=False, default=_encode)
+        self._writes.put((namespace, key, payload, expires_at))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued write is committed"""
+        done = threading.Event()
+        self._writes.put(done)
+        return done.wait(timeout)
+
+    def _write_batches(self) -> None:
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [item for item in batch if isinstance(item, tuple)]
+            if rows:
+                with self._lock:
+                    try:
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                            rows
+                        )
+                        self._conn.commit()
+                        self.stats["writes"] += len(rows)
+                        self.stats["batches"] += 1
+                    except sqlite3.Error:
+                        # Best effort: the local tier still has the values
+                        self._conn.rollback()
+                        self.stats["write_errors"] += len(rows)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+
+_shared_tiers: Dict[str, SharedCacheTier] = {}
+_shared_tiers_lock = threading.Lock()
+
+
+def get_shared_tier(path: str = None) -> Optional[SharedCacheTier]:
+    """Return the shared tier for a path (default: SHARED_CACHE_PATH), if configured"""
+    path = path or os.getenv("SHARED_CACHE_PATH")
+    if not path:
+        return None
+    with _shared_tiers_lock:
+        tier = _shared_tiers.get(path)
+        if tier is None:
+            tier = _shared_tiers[path] = SharedCacheTier(path)
+        return tier
+
+
+class TieredCache:
+    """
+    TTL cache with a local LRU tier and an optional shared tier
+
+    Thread-safe. Values must be JSON-serializable (or result records)
+    when the shared tier is enabled.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        max_entries: int = 1024,
+        shared_path: str = None,
+        decode: Optional[Callable[[Any], Any]] = None
+    ):
+        """
+        Initialize tiered cache
+
+        Args:
+            namespace: Cache name (also the shared-tier namespace)
+            ttl: Entry lifetime in seconds
+            max_entries: Local tier capacity (least recently used entries are evicted)
+            shared_path: SQLite file for the shared tier (default: SHARED_CACHE_PATH)
+            decode: Converts values read from the shared tier (e.g. back into records)
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared_path = shared_path
+        self.decode = decode
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0}
+        # Lookups per key (hot keys for warmup / refresh-ahead)
+        self.access_counts: Counter = Counter()
+
+    @property
+    def shared(self) -> Optional[SharedCacheTier]:
+        """Shared tier (resolved lazily so worker processes open their own connection)"""
+        return get_shared_tier(self.shared_path)
+
+    def get(self, key: str, count: bool = True) -> Any:
+        """
+        Look up a value
+
+        Args:
+            key: Cache key (normalized internally)
+            count: Record the lookup in access_counts / stats (False for
+                warmup, so prefetching does not make a key look hot)
+
+        Returns:
+            Cached value, or None on miss
+        """
+        key = normalize_key(key)
+        now = time.time()
+        with self._lock:
+            if count:
+                self.access_counts[key] += 1
+                if len(self.access_counts) > 4 * self.max_entries:
+                    self.access_counts = Counter(dict(self.access_counts.most_common(self.max_entries)))
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    if count:
+                        self.stats["hits"] += 1
+                    return entry[0]
+                del self._entries[key]
+
+        shared = self.shared
+        if shared is not None:
+            found = shared.get(self.namespace, key)
+            if found is not None:
+                value = self.decode(found[0]) if self.decode else found[0]
+                with self._lock:
+                    if count:
+                        self.stats["shared_hits"] += 1
+                    self._store_local(key, value, found[1])
+                return value
+
+        if count:
+            with self._lock:
+                self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: float = None) -> None:
+        """
+        Store a value in both tiers
+
+        Args:
+            key: Cache key (normalized internally)
+            value: Value to cache
+            ttl: Lifetime override in seconds
+        """
+        key = normalize_key(key)
+        expires_at = time.time() + (ttl or self.ttl)
+        with self._lock:
+            self._store_local(key, value, expires_at)
+
+        shared = self.shared
+        if shared is not None:
+            shared.set(self.namespace, key, value, expires_at)
+
+    def _store_local(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert into the local LRU tier (caller holds the lock)"""
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def expiring(self, within: float) -> List[str]:
+        """
+        Return local-tier keys that expire within the given time
+
+        Args:
+            within: Seconds until expiry
+
+        Returns:
+            Keys of local entries expiring soon (or already expired)
+        """
+        deadline = time.time() + within
+        with self._lock:
+            return [key for key, (_, expires_at) in self._entries.items() if expires_at <= deadline]
+
+    def lookup_counts(self, keys: List[str]) -> Dict[str, int]:
+        """Return the recorded lookups of the given keys (0 if none)"""
+        with self._lock:
+            return {key: self.access_counts.get(key, 0) for key in keys}
+
+    def hot_keys(self, limit: int) -> List[Tuple[str, int]]:
+        """Return the most looked-up keys as (key, lookups)"""
+        with self._lock:
+            return self.access_counts.most_common(limit)
+
+    def clear(self) -> None:
+        """Drop all local entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Tool result caches
+geocode_cache = TieredCache("geocode", ttl=24 * 3600, decode=ToolResult.from_mapping)
+search_cache = TieredCache("search", ttl=3600, decode=ToolResult.from_mapping)
@@ -0,0 +1,129 @@
+"""Clarity Assessment - Strands Agents Workshop
+
+Local, model-free vagueness scoring for user requests. Clearly vague
+inputs ("coffee") get a templated clarification question without any
+model call; everything else goes to the orchestrator, whose model judges
+borderline inputs.
+"""
+import re
+from typing import Dict, Any, List, Optional
+
+
+# Score at or above which we ask for clarification locally
+CLARIFY_THRESHOLD = 0.8
+
+# Inputs that are short but never vague
+GREETINGS = {
+    "hello", "hi", "hey", "thanks", "thank", "bye", "goodbye", "ok", "okay", "yes", "no",
+    "안녕", "안녕하세요", "고마워", "감사합니다", "네", "아니요",
+}
+
+# Words that reveal what the user wants done
+INTENT_WORDS = {
+    "what", "who", "where", "when", "why", "how", "which", "tell", "explain", "describe",
+    "search", "find", "show", "about", "weather", "forecast", "temperature", "rain",
+    "recommend", "compare", "difference", "history", "meaning", "define", "definition",
+    "날씨", "알려줘", "알려주세요", "뭐야", "무엇", "어때", "설명", "검색", "추천",
+}
+
+# Leading words that continue the previous request ("and Boston?")
+FOLLOW_UP_MARKERS = {
+    "and", "also", "what about", "how about", "then", "same",
+    "그럼", "그리고", "그건", "거기는", "그러면",
+}
+
+# Vagueness by token count, from one token up (longer inputs use the last
+# entry): a lone word is vague, two words are borderline, five are clear
+LENGTH_SCORES = [0.9, 0.6, 0.35, 0.1]
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+CLARIFICATION_TEMPLATE = (
+    "🤔 Could you tell me a bit more about what you'd like to know about \"{topic}\"?\n"
+    "For example:\n"
+    "  • General information: \"Tell me about {topic}\"\n"
+    "  • Something specific: \"What is the history of {topic}?\""
+)
+
+
+def score_vagueness(user_input: str, recent_inputs: Optional[List[str]] = None) -> float:
+    """
+    Score how vague a request is
+
+    Args:
+        user_input: User input
+        recent_inputs: Previous inputs of the session (most recent last)
+
+    Returns:
+        Vagueness score between 0.0 (clear) and 1.0 (vague)
+    """
+    tokens = _TOKEN_PATTERN.findall(user_input.lower())
+    if not tokens:
+        return 1.0
+    if all(token in GREETINGS for token in tokens):
+        return 0.0
+
+    score = LENGTH_SCORES[min(len(tokens), len(LENGTH_SCORES)) - 1]
+
+    # Lexical coverage: share of tokens that state an intent
+    coverage = sum(1 for token in tokens if token in INTENT_WORDS) / len(tokens)
+    if coverage:
+        score -= 0.4 + 0.2 * coverage
+
+    if user_input.rstrip().endswith("?"):
+        score -= 0.2
+
+    # Short follow-ups ("and Boston?") are clear in the context of a session
+    if recent_inputs and _is_follow_up(user_input, tokens, recent_inputs):
+        score -= 0.3
+
+    return max(0.0, min(1.0, score))
+
+
+def _is_follow_up(user_input: str, tokens: List[str], recent_inputs: List[str]) -> bool:
+    """
+    Whether an input continues the session: a follow-up marker, words of
+    recent inputs, or a lone name right after a turn stating an intent
+    ("Boston" after "weather in Seattle?")
+    """
+    text = " ".join(tokens)
+    if any(text == marker or text.startswith(marker + " ") for marker in FOLLOW_UP_MARKERS):
+        return True
+    if len(tokens) == 1 and user_input.strip()[:1].isupper():
+        last_tokens = _TOKEN_PATTERN.findall(recent_inputs[-1].lower())
+        if any(token in INTENT_WORDS for token in last_tokens):
+            return True
+    recent_tokens = set()
+    for recent in recent_inputs[-3:]:
+        recent_tokens.update(_TOKEN_PATTERN.findall(recent.lower()))
+    return any(
+        token in recent_tokens
+        for token in tokens
+        if len(token) > 1 and token not in GREETINGS and token not in INTENT_WORDS
+    )
+
+
+def assess_clarity(user_input: str, recent_inputs: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Decide locally whether a request needs clarification
+
+    Args:
+        user_input: User input
+        recent_inputs: Previous inputs of the session (most recent last)
+
+    Returns:
+        Assessment dict:
+        - needs_clarification: Ask the user a follow-up question now
+        - score: Vagueness score
+        - clarification: Templated follow-up question (when needed)
+    """
+    score = score_vagueness(user_input, recent_inputs)
+    needs_clarification = score >= CLARIFY_THRESHOLD
+    assessment = {
+        "needs_clarification": needs_clarification,
+        "score": round(score, 3),
+    }
+    if needs_clarification:
+        topic = user_input.strip().strip("?!.") or "that"
+        assessment["clarification"] = CLARIFICATION_TEMPLATE.format(topic=topic)
+    return assessment
@@ -0,0 +1,168 @@
+"""Request Coalescing - Strands Agents Workshop
+
+Single-flight execution for sub-agent calls. Concurrent calls with
+equivalent normalized arguments share one in-flight execution, and a
+completed result is reused for a short window afterwards. Works across
+event loops and threads (sync shims run their own loops).
+"""
+import asyncio
+import concurrent.futures
+import functools
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from cache import normalize_key
+from deadline import DeadlineExceeded
+
+
+# Seconds a completed result is reused for identical calls
+DEFAULT_REUSE_WINDOW = 10.0
+
+
+class _LeaderCancelled(Exception):
+    """The shared execution was cancelled by its leading caller"""
+
+
+class SingleFlight:
+    """
+    Share one execution among concurrent identical calls
+
+    Failures are propagated to every waiting caller and never reused.
+    If the leading caller is cancelled or runs out of its own deadline,
+    waiting callers retry (one of them leads the next execution).
+    """
+
+    def __init__(self, name: str, reuse_window: float = DEFAULT_REUSE_WINDOW, max_recent: int = 1024):
+        """
+        Initialize single-flight group
+
+        Args:
+            name: Group name (used in metrics)
+            reuse_window: Seconds a completed result is reused (0 disables reuse)
+            max_recent: Completed results kept for reuse
+        """
+        self.name = name
+        self.reuse_window = reuse_window
+        self.max_recent = max_recent
+        self._in_flight: Dict[str, concurrent.futures.Future] = {}
+        self._recent: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self.reused = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() unless an equivalent call is in flight or recently done
+
+        Args:
+            key: Call key (normalized internally)
+            factory: Creates the coroutine that performs the call
+
+        Returns:
+            Result of the shared execution
+        """
+        key = normalize_key(key).strip(" ?!.")
+        while True:
+            try:
+                return await self._run_once(key, factory)
+            except _LeaderCancelled:
+                # 공유 실행이 리더 쪽 취소/데드라인으로 중단됨 → 직접 실행 시도
+                continue
+
+    async def _run_once(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Join an in-flight execution or lead a new one"""
+        now = time.monotonic()
+        with self._lock:
+            recent = self._recent.get(key)
+            if recent is not None and recent[1] > now:
+                self.reused += 1
+                return recent[0]
+
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = concurrent.futures.Future()
+                # Running futures cannot be cancelled by a follower giving up
+                future.set_running_or_notify_cancel()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # wrap_future works even if the leader runs on another event loop
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await factory()
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # The leader's own cancellation / deadline is not the followers' failure
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if self.reuse_window > 0:
+                self._remember(key, result, time.monotonic() + self.reuse_window)
+        future.set_result(result)
+        return result
+
+    def _remember(self, key: str, result: Any, expires_at: float) -> None:
+        """Keep a completed result for reuse (caller holds the lock)"""
+        self._recent[key] = (result, expires_at)
+        if len(self._recent) > self.max_recent:
+            now = time.monotonic()
+            for stale in [k for k, (_, expiry) in self._recent.items() if expiry <= now]:
+                del self._recent[stale]
+            while len(self._recent) > self.max_recent:
+                del self._recent[next(iter(self._recent))]
+
+    def stats(self) -> Dict[str, int]:
+        """Return execution / coalescing counters"""
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "reused": self.reused,
+                "in_flight": len(self._in_flight),
+            }
+
+
+# Single-flight groups by name (for metrics)
+flights: Dict[str, SingleFlight] = {}
+
+
+def single_flight(name: str, reuse_window: float = DEFAULT_REUSE_WINDOW):
+    """Decorator coalescing calls of an async single-argument function
+
+    Args:
+        name: Group name (e.g. "weather_agent")
+        reuse_window: Seconds a completed result is reused
+
+    Returns:
+        Decorator
+    """
+    flight = flights.setdefault(name, SingleFlight(name, reuse_window))
+
+    def decorator(func: Callable[[str], Awaitable[Any]]) -> Callable[[str], Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(argument: str) -> Any:
+            return await flight.run(argument, lambda: func(argument))
+
+        wrapper.flight = flight
+        return wrapper
+
+    return decorator
+
+
+def coalescing_stats() -> Dict[str, Dict[str, int]]:
+    """Return counters of every single-flight group"""
+    return {name: flight.stats() for name, flight in flights.items()}
@@ -0,0 +1,238 @@
+"""Request Deadlines - Strands Agents Workshop
+
+Per-request deadline carried in a context variable, so it follows the
+request into every asyncio task and worker thread (asyncio.to_thread)
+spawned for it: orchestrator → sub-agents → HTTP tools.
+
+- timeout_for(): shrink a downstream timeout to the time left
+- run_with_deadline(): cancel an awaitable when the deadline passes
+- record_partial(): keep completed sub-agent results so an expired
+  request can still return what was finished
+"""
+import asyncio
+import contextlib
+import contextvars
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Iterator, List, Optional, Tuple
+
+from strands.hooks import AfterToolCallEvent, BeforeModelCallEvent, BeforeToolCallEvent, HookProvider, HookRegistry
+
+from records import AgentResponse
+
+
+# Default per-request time budget in seconds (overridable with REQUEST_TIMEOUT)
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "60"))
+
+# Tools whose input accepts a "timeout" argument (seconds)
+TIMEOUT_ARGUMENT_TOOLS = {"http_request"}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request runs past its deadline"""
+
+
+@dataclass
+class Deadline:
+    """Deadline of one request plus the partial results gathered so far"""
+
+    expires_at: float  # time.monotonic()
+    partials: List[Tuple[str, str]] = field(default_factory=list)
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)"""
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline of the running request, if any"""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def deadline_scope(timeout: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Run a block under a deadline
+
+    A nested scope never extends an outer deadline, and shares the outer
+    partial results.
+
+    Args:
+        timeout: Seconds from now (None: inherit the outer deadline, if any)
+
+    Yields:
+        Active deadline (None if there is none)
+    """
+    outer = _current.get()
+    if timeout is None:
+        yield outer
+        return
+
+    expires_at = time.monotonic() + timeout
+    if outer is not None and outer.expires_at <= expires_at:
+        yield outer
+        return
+
+    deadline = Deadline(expires_at, outer.partials if outer is not None else [])
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Return seconds left for the running request, or default without a deadline"""
+    deadline = _current.get()
+    return default if deadline is None else deadline.remaining()
+
+
+def check_deadline() -> None:
+    """
+    Raise if the running request's deadline has passed
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed
+    """
+    deadline = _current.get()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def timeout_for(default: float) -> float:
+    """
+    Shrink a downstream timeout to the time left
+
+    Args:
+        default: Timeout used without a deadline (upper bound otherwise)
+
+    Returns:
+        Timeout in seconds
+
+    Raises:
+        DeadlineExceeded: If no time is left
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default, left)
+
+
+async def run_with_deadline(awaitable: Awaitable[Any]) -> Any:
+    """
+    Await under the running request's deadline
+
+    The awaitable is cancelled when the deadline passes, which aborts its
+    in-flight model and HTTP calls.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes first
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Request deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded("Request deadline exceeded") from e
+
+
+def record_partial(source: str, text: str) -> None:
+    """Keep a completed sub-agent result of the running request"""
+    deadline = _current.get()
+    if deadline is not None and text:
+        deadline.partials.append((source, text))
+
+
+def partial_response(deadline: Optional[Deadline], user_input: str, **extra) -> AgentResponse:
+    """
+    Build the result returned when a request runs out of time
+
+    Args:
+        deadline: Expired deadline (its partial results are included)
+        user_input: User input
+        **extra: Additional result fields
+
+    Returns:
+        Processing result with partial=True
+    """
+    partials = deadline.partials if deadline is not None else []
+    if partials:
+        body = "\n\n".join(text for _, text in partials)
+        return AgentResponse(
+            success=True,
+            partial=True,
+            deadline_exceeded=True,
+            user_input=user_input,
+            response=f"⏱️ 응답 시간 제한으로 완료된 결과만 제공합니다.\n\n{body}",
+            partial_sources=[source for source, _ in partials],
+            **extra,
+        )
+    return AgentResponse(
+        success=False,
+        partial=True,
+        deadline_exceeded=True,
+        user_input=user_input,
+        error="응답 시간 제한을 초과했습니다. 요청을 더 간단하게 나누어 다시 시도해주세요.",
+        **extra,
+    )
+
+
+class DeadlineHooks(HookProvider):
+    """
+    Enforce the request deadline inside an agent's event loop
+
+    - Stops before a model call once the deadline has passed
+    - Cancels tool calls once the deadline has passed
+    - Shrinks the "timeout" argument of HTTP tools to the time left
+    - Records successful tool results as partial results (record_tools)
+    """
+
+    def __init__(self, record_tools: bool = False):
+        """
+        Initialize deadline hooks
+
+        Args:
+            record_tools: Keep successful tool results as partial results
+                (orchestrator: its tools are the sub-agents)
+        """
+        self.record_tools = record_tools
+
+    def register_hooks(self, registry: HookRegistry, **kwargs) -> None:
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+        if self.record_tools:
+            registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_model_call(self, event: BeforeModelCallEvent) -> None:
+        check_deadline()
+
+    def _before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        left = remaining()
+        if left is None:
+            return
+        if left <= 0:
+            event.cancel_tool = "Request deadline exceeded"
+            return
+        if event.tool_use["name"] in TIMEOUT_ARGUMENT_TOOLS and isinstance(event.tool_use.get("input"), dict):
+            requested = event.tool_use["input"].get("timeout") or 30
+            event.tool_use["input"]["timeout"] = max(1, min(float(requested), left))
+
+    def _after_tool_call(self, event: AfterToolCallEvent) -> None:
+        if event.result.get("status") != "success":
+            return
+        text = "\n".join(block["text"] for block in event.result.get("content", []) if "text" in block)
+        record_partial(event.tool_use["name"], text)
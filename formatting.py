@@ -0,0 +1,390 @@
+"""Response Formatting - Strands Agents Workshop
+
+Post-processing of agent responses for each output channel. Response
+chunks go through a chain of transforms once, as they arrive (the full
+text is never re-walked):
+
+- MarkdownCleanup: trailing spaces, runs of blank lines and bullets are
+  normalized; for terminals (plain=True) heading / bold / code markers and
+  code fences are dropped. Text streams through mid-line once the start
+  of the line is known.
+- Truncate: caps the output length of a channel
+- Renderers: CLI (plain text), JSON (one {"response", "id", "success",
+  "truncated"} object, escaped chunk by chunk) and SSE ("delta" events,
+  then a "done" event)
+
+Rendered output is memoized per (channel, hash of the source text):
+sending an answer to several channels, or rendering the same answer of a
+retried / resumed request again, reuses the first rendering. Only the
+closing metadata (response id, success) is rendered per call.
+
+- formatter.render(): blocking path (whole response text)
+- formatter.stream(): streaming path (feed chunks, then finish)
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import metrics
+
+
+# Maximum output characters per channel (None: unlimited)
+MAX_CHARS = {"cli": 4000, "json": 16000, "sse": 16000}
+
+TRUNCATION_MARKER = " …"
+
+# Rendered responses kept (least recently used are dropped)
+RENDER_CACHE_SIZE = 1024
+
+# Characters buffered at the start of a line before it is classified
+# (enough for "###### " or an indented "```")
+LINE_HEAD_CHARS = 8
+
+_HEADING = re.compile(r"^(\s*)#{1,6}\s+")
+_BULLET = re.compile(r"^(\s*)[*+-]\s+")
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_RULE_CHARS = re.compile(r"[-*_ \t]*")
+
+
+class Transform:
+    """Streaming text transform: feed() chunks in order, then finish()"""
+
+    def feed(self, chunk: str) -> str:
+        return chunk
+
+    def finish(self) -> str:
+        return ""
+
+
+class MarkdownCleanup(Transform):
+    """
+    Line-oriented markdown normalization
+
+    Leading / trailing blank lines are dropped and runs of blank lines
+    collapse to one; trailing whitespace is removed; bullets become "- "
+    (plain: "• "). With plain=True, heading markers, "**" and backticks are
+    removed, horizontal rules become blank lines and code fence lines are
+    dropped (code itself is kept as is).
+    """
+
+    def __init__(self, plain: bool = False):
+        """
+        Initialize markdown cleanup
+
+        Args:
+            plain: Render for a terminal (strip markdown syntax)
+        """
+        self.plain = plain
+        self._head = ""  # start of the current line, not yet classified
+        self._decided = False
+        self._hold = ""  # trailing whitespace / "*" held until more text arrives
+        self._skip_line = False
+        self._verbatim = False
+        self._in_fence = False
+        self._started = False
+        self._pending_blank = False
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        lines = chunk.split("\n")
+        for index, text in enumerate(lines):
+            self._feed_text(text, out)
+            if index < len(lines) - 1:
+                self._end_line(out)
+        return "".join(out)
+
+    def finish(self) -> str:
+        out: List[str] = []
+        if self._head or self._decided:
+            self._end_line(out)
+        return "".join(out)
+
+    def _feed_text(self, text: str, out: List[str]) -> None:
+        if self._decided:
+            if not self._skip_line:
+                self._emit_inline(text, out)
+            return
+        self._head += text
+        # A line of rule characters is classified at its end ("----------")
+        if len(self._head.lstrip()) >= LINE_HEAD_CHARS and not _RULE_CHARS.fullmatch(self._head):
+            self._decide(out)
+
+    def _decide(self, out: List[str]) -> None:
+        """Classify the current line from its start and emit what is known"""
+        line, self._head = self._head, ""
+        self._decided = True
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            self._in_fence = not self._in_fence
+            if self.plain:
+                self._skip_line = True
+                return
+            self._verbatim = True
+        elif self._in_fence:
+            self._verbatim = True
+        elif not stripped or (self.plain and _RULE.match(line)):
+            # Blank line (plain: also a horizontal rule): emitted only if more text follows
+            self._pending_blank = self._started
+            self._skip_line = True
+            return
+        else:
+            line = _BULLET.sub(r"\1• " if self.plain else r"\1- ", line)
+            if self.plain:
+                line = _HEADING.sub(r"\1", line)
+
+        if self._started:
+            out.append("\n\n" if self._pending_blank else "\n")
+        self._pending_blank = False
+        self._started = True
+        self._emit_inline(line, out)
+
+    def _emit_inline(self, text: str, out: List[str]) -> None:
+        text = self._hold + text
+        if self.plain and not self._verbatim:
+            text = text.replace("**", "").replace("`", "")
+        keep = len(text.rstrip(" \t"))
+        if self.plain and not self._verbatim and text[:keep].endswith("*"):
+            keep -= 1  # may be the first half of "**"
+        self._hold = text[keep:]
+        if keep:
+            out.append(text[:keep])
+
+    def _end_line(self, out: List[str]) -> None:
+        if not self._decided:
+            self._decide(out)
+        if self._hold.rstrip() and not self._skip_line:
+            out.append(self._hold.rstrip())
+        self._head = self._hold = ""
+        self._decided = self._skip_line = self._verbatim = False
+
+
+class Truncate(Transform):
+    """Cap the output at max_chars (at a word boundary when one is close)"""
+
+    def __init__(self, max_chars: Optional[int], marker: str = TRUNCATION_MARKER):
+        """
+        Initialize truncation
+
+        Args:
+            max_chars: Maximum characters (None: unlimited)
+            marker: Appended when the output is cut
+        """
+        self.max_chars = max_chars
+        self.marker = marker
+        self.truncated = False
+        self._count = 0
+
+    def feed(self, chunk: str) -> str:
+        if self.truncated or self.max_chars is None:
+            return "" if self.truncated else chunk
+        remaining = self.max_chars - self._count
+        if len(chunk) <= remaining:
+            self._count += len(chunk)
+            return chunk
+        cut = chunk[:remaining]
+        space = cut.rfind(" ")
+        if space > 0 and space >= len(cut) - 32:
+            cut = cut[:space]
+        self.truncated = True
+        self._count = self.max_chars
+        return cut.rstrip() + self.marker
+
+
+class Renderer:
+    """Channel encoding of the transformed text"""
+
+    def begin(self) -> str:
+        return ""
+
+    def chunk(self, text: str) -> str:
+        return text
+
+    def end(self, meta: Dict[str, Any]) -> str:
+        return ""
+
+
+class JsonRenderer(Renderer):
+    """One JSON object: {"response": text, "id", "success", "truncated"}"""
+
+    def begin(self) -> str:
+        return '{"response": "'
+
+    def chunk(self, text: str) -> str:
+        return json.dumps(text, ensure_ascii=False)[1:-1]
+
+    def end(self, meta: Dict[str, Any]) -> str:
+        return '", ' + json.dumps(meta, ensure_ascii=False)[1:]
+
+
+class SseRenderer(Renderer):
+    """Server-sent events: a "delta" event per chunk, then "done" with the metadata"""
+
+    def chunk(self, text: str) -> str:
+        return f"event: delta\ndata: {json.dumps({'text': text}, ensure_ascii=False)}\n\n"
+
+    def end(self, meta: Dict[str, Any]) -> str:
+        return f"event: done\ndata: {json.dumps(meta, ensure_ascii=False)}\n\n"
+
+
+@dataclass
+class Channel:
+    """Transform chain and renderer of an output channel"""
+
+    transforms: Callable[[], List[Transform]]
+    renderer: Callable[[], Renderer]
+
+
+CHANNELS: Dict[str, Channel] = {
+    "cli": Channel(lambda: [MarkdownCleanup(plain=True), Truncate(MAX_CHARS["cli"])], Renderer),
+    "json": Channel(lambda: [MarkdownCleanup(), Truncate(MAX_CHARS["json"])], JsonRenderer),
+    "sse": Channel(lambda: [MarkdownCleanup(), Truncate(MAX_CHARS["sse"])], SseRenderer),
+}
+
+
+def source_digest(text: str) -> str:
+    """Memo key of a response text"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class FormatStream:
+    """One response being rendered for one channel"""
+
+    def __init__(self, formatter: "ResponseFormatter", channel: str):
+        spec = CHANNELS[channel]
+        self.channel = channel
+        self.source_chars = 0
+        self.output: Optional[str] = None  # set by finish()
+        self._formatter = formatter
+        self._transforms = spec.transforms()
+        self._renderer = spec.renderer()
+        self._parts: List[str] = []
+        self._begun = False
+        self._digest = hashlib.blake2b(digest_size=16)  # of the source, chunk by chunk
+
+    @property
+    def truncated(self) -> bool:
+        return any(getattr(transform, "truncated", False) for transform in self._transforms)
+
+    def feed(self, chunk: str) -> str:
+        """
+        Render the next response chunk
+
+        Returns:
+            Rendered output available so far (may be empty)
+        """
+        self.source_chars += len(chunk)
+        self._digest.update(chunk.encode("utf-8"))
+        for transform in self._transforms:
+            chunk = transform.feed(chunk)
+            if not chunk:
+                return ""
+        return self._emit(self._renderer.chunk(chunk))
+
+    def finish(self, response_id: str = None, success: bool = True, source: str = None) -> str:
+        """
+        Flush buffered text and close the channel encoding
+
+        Args:
+            response_id: ID of the response (closing metadata)
+            success: Whether the response is an answer (False: error text)
+            source: Full response text; the rendering is memoized only if the
+                streamed chunks were all of it
+
+        Returns:
+            Remaining rendered output
+        """
+        tail = ""
+        for transform in self._transforms:
+            tail = (transform.feed(tail) if tail else "") + transform.finish()
+        out = self._emit(self._renderer.chunk(tail)) if tail else ""
+        if not self._begun:
+            out += self._emit("")
+        body = "".join(self._parts)
+        if source is None or len(source) == self.source_chars:
+            self._formatter.store(self._digest.hexdigest(), self.channel, body, self.truncated)
+        end = self._renderer.end({"id": response_id, "success": success, "truncated": self.truncated})
+        out += self._emit(end)
+        self.output = body + end
+        self._parts = []
+        return out
+
+    def _emit(self, text: str) -> str:
+        if not self._begun:
+            self._begun = True
+            text = self._renderer.begin() + text
+        if text:
+            self._parts.append(text)
+        return text
+
+
+class ResponseFormatter:
+    """
+    Renders responses per channel with an LRU memo of (channel, source hash)
+
+    Thread-safe; one formatter is shared by the process.
+    """
+
+    def __init__(self, max_entries: int = RENDER_CACHE_SIZE):
+        """
+        Initialize response formatter
+
+        Args:
+            max_entries: Rendered responses kept
+        """
+        self.max_entries = max_entries
+        # (channel, source digest) → (rendered body without the closing metadata, truncated)
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[str, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stream(self, channel: str = "cli") -> FormatStream:
+        """Start rendering a streamed response for a channel"""
+        return FormatStream(self, channel)
+
+    def render(self, text: str, channel: str = "cli", response_id: str = None, success: bool = True) -> str:
+        """
+        Render a complete response (memoized by its text)
+
+        Args:
+            text: Response text
+            channel: "cli", "json" or "sse"
+            response_id: Response ID (closing metadata)
+            success: Whether the response is an answer (False: error text)
+
+        Returns:
+            Rendered output
+        """
+        cached = self.lookup(source_digest(text), channel)
+        if cached is not None:
+            body, truncated = cached
+            return body + CHANNELS[channel].renderer().end(
+                {"id": response_id, "success": success, "truncated": truncated}
+            )
+        stream = self.stream(channel)
+        stream.feed(text)
+        stream.finish(response_id, success)
+        return stream.output
+
+    def lookup(self, digest: str, channel: str) -> Optional[Tuple[str, bool]]:
+        """Return a memoized (body, truncated) rendering of a source text, or None"""
+        with self._lock:
+            entry = self._cache.get((channel, digest))
+            if entry is not None:
+                self._cache.move_to_end((channel, digest))
+        metrics.inc("workshop_format_cache_lookups_total", channel=channel, result="miss" if entry is None else "hit")
+        return entry
+
+    def store(self, digest: str, channel: str, body: str, truncated: bool) -> None:
+        with self._lock:
+            self._cache[(channel, digest)] = (body, truncated)
+            self._cache.move_to_end((channel, digest))
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+
+# Process-wide formatter
+formatter = ResponseFormatter()
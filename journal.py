@@ -0,0 +1,403 @@
+"""Request Journal - Strands Agents Workshop
+
+Append-only JSONL journal of user requests for crash recovery and replay.
+
+- One "start" / "end" record per orchestrator turn, a "call" record per
+  completed sub-agent call and a "tool" record per tool result
+- Records are queued on the hot path and written by a background thread
+  in batches, with one fsync per batch
+- A request without an "end" record was interrupted; resuming it reuses
+  the sub-agent results already recorded (no model tokens spent again).
+  A request cut short by its deadline ends with status "partial" and is
+  resumed as well, up to MAX_RESUME_ATTEMPTS times; a request the user
+  cancelled ends with status "cancelled" and is not resumed
+- The "start" records double as a replay source for load tests
+
+Disabled unless opened (REQUEST_JOURNAL_PATH or main.py --journal).
+
+Usage:
+    python -m journal incomplete [--path requests.jsonl]
+    python -m journal requests [--path requests.jsonl]   # replayable requests (JSONL)
+"""
+import argparse
+import atexit
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from strands.hooks import AfterToolCallEvent, HookProvider, HookRegistry
+
+
+# Seconds the writer waits to fill a batch before writing / fsyncing
+FLUSH_INTERVAL = 0.05
+
+# Maximum records per batch
+BATCH_SIZE = 256
+
+# Resumes of one request before it is given up on (each one spends model tokens)
+MAX_RESUME_ATTEMPTS = 3
+
+_STOP = object()
+
+
+class RequestJournal:
+    """
+    Append-only JSONL journal with an asynchronous, batching writer
+
+    append() only enqueues; serialization, writes and fsync happen on the
+    writer thread. Thread-safe.
+    """
+
+    def __init__(self, path: str = None, flush_interval: float = FLUSH_INTERVAL, batch_size: int = BATCH_SIZE):
+        """
+        Initialize request journal
+
+        Args:
+            path: Journal file (None: disabled until open())
+            flush_interval: Seconds to wait for a batch to fill
+            batch_size: Maximum records per write / fsync
+        """
+        self.path: Optional[str] = None
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.stats = {"records": 0, "batches": 0}
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._fd: Optional[int] = None
+        if path:
+            self.open(path)
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None
+
+    def open(self, path: str) -> None:
+        """Start journaling to path (appends to an existing journal)"""
+        if self.enabled:
+            self.close()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # O_APPEND: whole-batch writes from several worker processes do not interleave mid-line
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.path = path
+        self._writer = threading.Thread(target=self._run, name="request-journal", daemon=True)
+        self._writer.start()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Queue a record (values must not be mutated afterwards)"""
+        if self._writer is not None:
+            record.setdefault("ts", time.time())
+            self._queue.put(record)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued record is written and fsynced"""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write pending records and stop the writer"""
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        self._queue.put(_STOP)
+        writer.join()
+        os.close(self._fd)
+        self._fd = None
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Any] = [self._queue.get()]
+            batch_deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not _STOP and not isinstance(batch[-1], threading.Event):
+                left = batch_deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=left))
+                except queue.Empty:
+                    break
+
+            records = [item for item in batch if isinstance(item, dict)]
+            if records:
+                payload = "".join(
+                    json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records
+                ).encode("utf-8")
+                os.write(self._fd, payload)
+                os.fsync(self._fd)
+                self.stats["records"] += len(records)
+                self.stats["batches"] += 1
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if batch[-1] is _STOP:
+                return
+
+
+# Process-wide journal (REQUEST_JOURNAL_PATH opens it at import)
+journal = RequestJournal(os.getenv("REQUEST_JOURNAL_PATH") or None)
+atexit.register(journal.close)
+
+
+@dataclass
+class _RequestContext:
+    request_id: str
+    # (agent, input) → outputs recorded before an interruption
+    resumed: Dict[Tuple[str, str], List[str]] = field(default_factory=dict)
+
+
+_current: contextvars.ContextVar[Optional[_RequestContext]] = contextvars.ContextVar("journal_request", default=None)
+
+# Request IDs running in this process (never resumed alongside themselves)
+_in_flight: Set[str] = set()
+
+
+@dataclass
+class IncompleteRequest:
+    """A journaled request to resume (interrupted, or answered with partial results)"""
+
+    request_id: str
+    user_id: str
+    user_input: str
+    started_at: float
+    calls: List[Tuple[str, str, str]] = field(default_factory=list)  # (agent, input, output)
+    partial: bool = False  # answered with partial results (deadline)
+    attempts: int = 0  # times it was resumed already
+
+
+def current_request_id() -> Optional[str]:
+    """Return the journal ID of the running request, if any"""
+    context = _current.get()
+    return context.request_id if context is not None else None
+
+
+@contextlib.contextmanager
+def request_scope(user_id: str, user_input: str, resume: IncompleteRequest = None) -> Iterator[Optional[str]]:
+    """
+    Journal one user request
+
+    Args:
+        user_id: User identifier
+        user_input: User input
+        resume: Interrupted request to continue (its recorded sub-agent
+            results are reused instead of calling the sub-agents again)
+
+    Yields:
+        Request ID (None while the journal is disabled)
+    """
+    if not journal.enabled or _current.get() is not None:
+        yield current_request_id()
+        return
+
+    if resume is not None:
+        context = _RequestContext(resume.request_id)
+        for agent, agent_input, output in resume.calls:
+            context.resumed.setdefault((agent, agent_input), []).append(output)
+        journal.append({"type": "resume", "rid": resume.request_id})
+    else:
+        context = _RequestContext(uuid.uuid4().hex)
+        journal.append({"type": "start", "rid": context.request_id, "user": user_id, "input": user_input})
+
+    token = _current.set(context)
+    _in_flight.add(context.request_id)
+    try:
+        yield context.request_id
+    finally:
+        _in_flight.discard(context.request_id)
+        _current.reset(token)
+
+
+def record_end(result: Dict[str, Any]) -> None:
+    """Record the result of the running request (marks it complete, or partial: still resumable)"""
+    context = _current.get()
+    if context is None:
+        return
+    journal.append({
+        "type": "end",
+        "rid": context.request_id,
+        "status": "partial" if result.get("partial") else "completed",
+        "success": bool(result.get("success")),
+        "path": result.get("agent"),
+        "partial": bool(result.get("partial")),
+        "response": result.get("response") or result.get("error"),
+    })
+
+
+def record_cancelled() -> None:
+    """Record that the running request was cancelled (it is not resumed)"""
+    context = _current.get()
+    if context is not None:
+        journal.append({"type": "end", "rid": context.request_id, "status": "cancelled", "success": False})
+
+
+def record_call(agent: str, agent_input: str, output: str) -> None:
+    """Record a completed sub-agent call of the running request"""
+    context = _current.get()
+    if context is not None:
+        journal.append({"type": "call", "rid": context.request_id, "agent": agent, "input": agent_input, "output": output})
+
+
+def resumed_output(agent: str, agent_input: str) -> Optional[str]:
+    """Take a recorded output of an interrupted request's sub-agent call, if any"""
+    context = _current.get()
+    if context is None:
+        return None
+    outputs = context.resumed.get((agent, agent_input))
+    return outputs.pop(0) if outputs else None
+
+
+def journaled(agent: str) -> Callable[[Callable[[str], Awaitable[str]]], Callable[[str], Awaitable[str]]]:
+    """
+    Journal a sub-agent runner (async (input) -> output)
+
+    Completed calls are recorded; a resumed request gets the recorded
+    output back without running the sub-agent.
+
+    Args:
+        agent: Sub-agent name
+    """
+    def decorate(runner: Callable[[str], Awaitable[str]]) -> Callable[[str], Awaitable[str]]:
+        @functools.wraps(runner)
+        async def wrapper(agent_input: str) -> str:
+            if _current.get() is None:
+                return await runner(agent_input)
+            output = resumed_output(agent, agent_input)
+            if output is not None:
+                return output
+            output = await runner(agent_input)
+            record_call(agent, agent_input, output)
+            return output
+        return wrapper
+    return decorate
+
+
+class JournalHooks(HookProvider):
+    """Record the tool results of an agent in the request journal"""
+
+    def __init__(self, agent_name: str):
+        """
+        Initialize journal hooks
+
+        Args:
+            agent_name: Agent label ("search_agent", "weather_agent", ...)
+        """
+        self.agent_name = agent_name
+
+    def register_hooks(self, registry: HookRegistry, **kwargs) -> None:
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _after_tool_call(self, event: AfterToolCallEvent) -> None:
+        context = _current.get()
+        if context is None:
+            return
+        journal.append({
+            "type": "tool",
+            "rid": context.request_id,
+            "agent": self.agent_name,
+            "tool": event.tool_use["name"],
+            "input": json.dumps(event.tool_use.get("input"), ensure_ascii=False, default=str),
+            "status": event.result.get("status"),
+            "result": "\n".join(block["text"] for block in event.result.get("content", []) if "text" in block),
+        })
+
+
+def read_journal(path: str) -> Iterator[Dict[str, Any]]:
+    """Iterate journal records (a torn last line from a crash is skipped)"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def incomplete_requests(
+    path: str = None,
+    user_id: str = None,
+    max_attempts: Optional[int] = MAX_RESUME_ATTEMPTS
+) -> List[IncompleteRequest]:
+    """
+    Find interrupted requests
+
+    Args:
+        path: Journal file (default: the open journal)
+        user_id: Only this user's requests
+        max_attempts: Leave out requests resumed this many times already
+            (None: no limit)
+
+    Returns:
+        Requests without a completed or cancelled "end" record (partial
+        ones included), oldest first; requests running in this process
+        are left out
+    """
+    path = path or journal.path
+    if not path or not os.path.exists(path):
+        return []
+    journal.flush()
+    requests: Dict[str, IncompleteRequest] = {}
+    for record in read_journal(path):
+        rid = record.get("rid")
+        if record["type"] == "start":
+            requests[rid] = IncompleteRequest(rid, record["user"], record["input"], record["ts"])
+        elif record["type"] == "resume" and rid in requests:
+            requests[rid].attempts += 1
+        elif record["type"] == "call" and rid in requests:
+            requests[rid].calls.append((record["agent"], record["input"], record["output"]))
+        elif record["type"] == "end" and record.get("status") == "partial":
+            if rid in requests:
+                requests[rid].partial = True
+        elif record["type"] == "end":
+            requests.pop(rid, None)
+    return [
+        request for request in requests.values()
+        if (user_id is None or request.user_id == user_id) and request.request_id not in _in_flight
+        and (max_attempts is None or request.attempts < max_attempts)
+    ]
+
+
+def replay_requests(path: str) -> List[Dict[str, Any]]:
+    """
+    Requests in arrival order, for load-test replay
+
+    Returns:
+        [{"offset": seconds since the first request, "user_id", "input"}]
+    """
+    starts = [record for record in read_journal(path) if record["type"] == "start"]
+    first = starts[0]["ts"] if starts else 0.0
+    return [{"offset": record["ts"] - first, "user_id": record["user"], "input": record["input"]} for record in starts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request journal tools")
+    parser.add_argument("command", choices=["incomplete", "requests"])
+    parser.add_argument("--path", default=os.getenv("REQUEST_JOURNAL_PATH"), help="Journal file")
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("--path (or REQUEST_JOURNAL_PATH) is required")
+
+    if args.command == "incomplete":
+        for request in incomplete_requests(args.path, max_attempts=None):
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(request.started_at))
+            state = ", partial answer given" if request.partial else ""
+            if request.attempts:
+                given_up = ", given up" if request.attempts >= MAX_RESUME_ATTEMPTS else ""
+                state += f", resumed {request.attempts}x{given_up}"
+            print(f"⏸️ {request.request_id}  {started}  {request.user_id}: {request.user_input} "
+                  f"({len(request.calls)} sub-agent results recorded{state})")
+    else:
+        for request in replay_requests(args.path):
+            print(json.dumps(request, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
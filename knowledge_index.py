@@ -0,0 +1,423 @@
+"""Knowledge Index - Strands Agents Workshop
+
+Local offline search backend for evergreen topics. search tools consult
+it before any network call; lookups are BM25 over pre-fetched article
+summaries and return the same shape as wikipedia_search.
+
+On-disk layout (directory):
+    docs.bin    Append-only article records (one JSON object per line),
+                memory-mapped by readers
+    index.json  Document offsets, postings and lengths (replaced atomically)
+
+Usage:
+    python -m knowledge_index build --dump articles.jsonl    # {"title", "summary", "url"} per line
+    python -m knowledge_index build --from-cache [cache.sqlite]
+    python -m knowledge_index search "quantum mechanics"
+    python -m knowledge_index stats
+
+The index is used when KNOWLEDGE_INDEX_PATH (default: a directory in
+the temp dir) contains one.
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from records import ToolResult
+
+
+# Index directory (overridable with KNOWLEDGE_INDEX_PATH)
+DEFAULT_INDEX_PATH = os.path.join(tempfile.gettempdir(), "strands_workshop_knowledge_index")
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Title terms count this many times (titles name the topic)
+TITLE_WEIGHT = 3
+
+# Seconds between checks for a rebuilt index
+RELOAD_INTERVAL = 30.0
+
+# Words ignored in queries ("tell me about the Renaissance" → "renaissance")
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "and", "or", "is", "are", "was",
+    "what", "who", "where", "when", "why", "how", "which", "tell", "me", "about", "explain",
+    "describe", "search", "find", "please", "information", "info", "define", "definition",
+    "알려줘", "알려주세요", "뭐야", "무엇", "설명", "검색", "대해", "대한",
+}
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+_DOCS_FILE = "docs.bin"
+_INDEX_FILE = "index.json"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct query tokens without stopwords"""
+    return list(dict.fromkeys(t for t in tokenize(query) if t not in STOPWORDS))
+
+
+def _title_key(title: str) -> str:
+    return " ".join(tokenize(title))
+
+
+def _doc_terms(title: str, summary: str) -> Counter:
+    terms = Counter(tokenize(summary))
+    for term in tokenize(title):
+        terms[term] += TITLE_WEIGHT
+    return terms
+
+
+class KnowledgeIndex:
+    """
+    Read-only view of an on-disk index (thread-safe)
+
+    Postings stay in memory; article records are read from the
+    memory-mapped document file on hit.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open an index
+
+        Args:
+            path: Index directory
+        """
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._loaded_mtime = 0.0
+        self._checked_at = 0.0
+        self._load()
+
+    def _load(self) -> None:
+        """(Re)load postings and map the document file"""
+        index_file = os.path.join(self.path, _INDEX_FILE)
+        mtime = os.path.getmtime(index_file)
+        with open(index_file, encoding="utf-8") as f:
+            data = json.load(f)
+
+        docs_file = os.path.join(self.path, _DOCS_FILE)
+        mapped = None
+        if os.path.getsize(docs_file):
+            with open(docs_file, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        live = [doc for doc in data["docs"] if doc is not None]
+        average_length = sum(doc[2] for doc in live) / len(live) if live else 0.0
+        idf = {
+            term: math.log(1 + (len(live) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in data["postings"].items()
+        }
+        with self._lock:
+            old, self._mmap = self._mmap, mapped
+            self._docs = data["docs"]  # [offset, length, doc length, title key] or None
+            self._postings = data["postings"]  # term → [[doc id, weighted tf], ...]
+            self._idf = idf
+            self._average_length = average_length or 1.0
+            self._loaded_mtime = mtime
+        if old is not None:
+            old.close()
+
+    def _maybe_reload(self) -> None:
+        """Pick up a rebuilt index (checked at most every RELOAD_INTERVAL)"""
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            if os.path.getmtime(os.path.join(self.path, _INDEX_FILE)) > self._loaded_mtime:
+                self._load()
+        except OSError:
+            pass
+
+    def __len__(self) -> int:
+        return sum(1 for doc in self._docs if doc is not None)
+
+    def document(self, doc_id: int) -> Dict[str, Any]:
+        """
+        Read an article record from the mapped document file
+
+        Raises:
+            KeyError: The article was replaced by a reload since it was found
+        """
+        # Copy the bytes under the lock: a reload swaps (and closes) the map
+        with self._lock:
+            entry = self._docs[doc_id] if doc_id < len(self._docs) else None
+            if entry is None:
+                raise KeyError(doc_id)
+            raw = self._mmap[entry[0]:entry[0] + entry[1]]
+        return json.loads(raw)
+
+    def search(self, query: str, limit: int = 3) -> List[Tuple[float, int, int]]:
+        """
+        Rank articles by BM25
+
+        Args:
+            query: Search query
+            limit: Maximum results
+
+        Returns:
+            (score, doc id, matched query terms) best first
+        """
+        terms = query_terms(query)
+        scores: Dict[int, float] = {}
+        matched: Counter = Counter()
+        with self._lock:
+            for term in terms:
+                idf = self._idf.get(term)
+                if idf is None:
+                    continue
+                for doc_id, tf in self._postings[term]:
+                    if self._docs[doc_id] is None:
+                        continue
+                    norm = 1 - BM25_B + BM25_B * self._docs[doc_id][2] / self._average_length
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                    matched[doc_id] += 1
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [(score, doc_id, matched[doc_id]) for doc_id, score in ranked]
+
+    def lookup(self, query: str) -> Optional[ToolResult]:
+        """
+        Answer a search query locally
+
+        A hit needs every query term in the best article and at least one
+        of them in its title; anything weaker goes to the network.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Result in the wikipedia_search shape, or None on miss
+        """
+        self._maybe_reload()
+        terms = query_terms(query)
+        if terms:
+            for _, doc_id, matched in self.search(query, limit=1):
+                if matched != len(terms):
+                    continue
+                try:
+                    doc = self.document(doc_id)
+                except KeyError:
+                    continue
+                if set(tokenize(doc["title"])).intersection(terms):
+                    with self._lock:
+                        self.stats["hits"] += 1
+                    return ToolResult(
+                        success=True,
+                        title=doc["title"],
+                        summary=doc["summary"],
+                        url=doc.get("url", ""),
+                        source="local_index"
+                    )
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+
+def build_index(path: str, articles: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Add articles to an index (created if missing)
+
+    Articles are appended to the document file; an article whose title is
+    already indexed replaces the old one (unchanged articles are skipped).
+    index.json is replaced atomically, so readers never see a partial index.
+
+    Args:
+        path: Index directory
+        articles: Dicts with "title" and "summary" (and optional "url")
+
+    Returns:
+        Counts of added, replaced and skipped articles
+    """
+    os.makedirs(path, exist_ok=True)
+    index_file = os.path.join(path, _INDEX_FILE)
+    docs_file = os.path.join(path, _DOCS_FILE)
+    if os.path.exists(index_file):
+        with open(index_file, encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = {"version": 1, "docs": [], "postings": {}}
+
+    by_title = {doc[3]: doc_id for doc_id, doc in enumerate(data["docs"]) if doc is not None}
+    counts = {"added": 0, "replaced": 0, "skipped": 0}
+
+    with open(docs_file, "ab+") as docs:
+        docs.seek(0, os.SEEK_END)
+        offset = docs.tell()
+        for article in articles:
+            title, summary = str(article.get("title", "")).strip(), str(article.get("summary", "")).strip()
+            key = _title_key(title)
+            if not key or not summary:
+                counts["skipped"] += 1
+                continue
+
+            record = {"title": title, "summary": summary, "url": article.get("url", "")}
+            previous = by_title.get(key)
+            if previous is not None:
+                old_offset, old_length = data["docs"][previous][:2]
+                docs.seek(old_offset)
+                if json.loads(docs.read(old_length)) == record:
+                    docs.seek(0, os.SEEK_END)
+                    counts["skipped"] += 1
+                    continue
+                docs.seek(0, os.SEEK_END)
+                data["docs"][previous] = None  # postings of deleted docs are skipped at query time
+                counts["replaced"] += 1
+            else:
+                counts["added"] += 1
+
+            payload = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+            docs.write(payload)
+            terms = _doc_terms(title, summary)
+            doc_id = len(data["docs"])
+            data["docs"].append([offset, len(payload) - 1, sum(terms.values()), key])
+            for term, tf in terms.items():
+                data["postings"].setdefault(term, []).append([doc_id, tf])
+            by_title[key] = doc_id
+            offset += len(payload)
+        docs.flush()
+        os.fsync(docs.fileno())
+
+    # Drop postings of replaced documents
+    if counts["replaced"]:
+        for term in list(data["postings"]):
+            live = [entry for entry in data["postings"][term] if data["docs"][entry[0]] is not None]
+            if live:
+                data["postings"][term] = live
+            else:
+                del data["postings"][term]
+
+    temp_file = f"{index_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp_file, index_file)
+    return counts
+
+
+def articles_from_dump(dump_path: str) -> Iterable[Dict[str, Any]]:
+    """Read articles from a JSONL dump ({"title", "summary", "url"} per line)"""
+    with open(dump_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def articles_from_cache(cache_path: str) -> Iterable[Dict[str, Any]]:
+    """Read successful search results from the shared cache tier (expired ones too)"""
+    conn = sqlite3.connect(cache_path)
+    try:
+        for (value,) in conn.execute("SELECT value FROM cache WHERE namespace = 'search'"):
+            result = json.loads(value)
+            if result.get("success") and result.get("summary"):
+                yield result
+    finally:
+        conn.close()
+
+
+def index_path() -> str:
+    """Return the index directory (KNOWLEDGE_INDEX_PATH or the default)"""
+    return os.getenv("KNOWLEDGE_INDEX_PATH") or DEFAULT_INDEX_PATH
+
+
+_indexes: Dict[str, KnowledgeIndex] = {}
+_missing: Dict[str, Optional[float]] = {}  # path without an index → directory mtime when checked
+_indexes_lock = threading.Lock()
+
+
+def _directory_mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def get_knowledge_index(path: str = None) -> Optional[KnowledgeIndex]:
+    """
+    Return the index at path (default: index_path()), or None if none is built
+
+    A missing index is looked for again once the directory's mtime changes
+    (index.json is created by an atomic rename into it), so an index built
+    while the process runs is picked up.
+    """
+    path = path or index_path()
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is not None:
+            return index
+        mtime = _directory_mtime(path)
+        if path in _missing and _missing[path] == mtime:
+            return None
+        try:
+            index = _indexes[path] = KnowledgeIndex(path)
+            _missing.pop(path, None)
+        except (OSError, ValueError, KeyError):
+            # Not built yet (or caught mid-build): look again after the next change
+            _missing[path] = mtime
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local knowledge index")
+    parser.add_argument("--path", default=None, help="Index directory (default: KNOWLEDGE_INDEX_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Add articles to the index (incremental)")
+    build.add_argument("--dump", help="JSONL dump of articles")
+    build.add_argument("--from-cache", nargs="?", const="", metavar="CACHE_PATH",
+                       help="Shared cache SQLite file (default: SHARED_CACHE_PATH or the worker default)")
+    search = commands.add_parser("search", help="Query the index")
+    search.add_argument("query")
+    commands.add_parser("stats", help="Show index size")
+    args = parser.parse_args()
+
+    path = args.path or index_path()
+    if args.command == "build":
+        if args.dump is None and args.from_cache is None:
+            parser.error("build needs --dump and/or --from-cache")
+        articles: List[Iterable[Dict[str, Any]]] = []
+        if args.dump:
+            articles.append(articles_from_dump(args.dump))
+        if args.from_cache is not None:
+            from worker_pool import DEFAULT_SHARED_CACHE_PATH
+            articles.append(articles_from_cache(
+                args.from_cache or os.getenv("SHARED_CACHE_PATH") or DEFAULT_SHARED_CACHE_PATH
+            ))
+        counts = build_index(path, (article for source in articles for article in source))
+        print(f"📚 {path}: {counts['added']} added, {counts['replaced']} replaced, {counts['skipped']} skipped")
+        return
+
+    index = get_knowledge_index(path)
+    if index is None:
+        print(f"❌ No index at {path}")
+        return
+    if args.command == "stats":
+        print(f"📚 {path}: {len(index)} articles, {len(index._postings)} terms")
+        return
+
+    started = time.perf_counter()
+    hit = index.lookup(args.query)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"🔎 {'hit' if hit else 'miss'} ({elapsed_ms:.3f} ms)")
+    for score, doc_id, matched in index.search(args.query):
+        doc = index.document(doc_id)
+        print(f"  {score:6.2f}  {doc['title']}  ({matched} terms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+"""Metrics - Strands Agents Workshop
+
+In-process metrics registry: counters, in-flight gauges, log-bucketed
+latency histograms, model token counters and cache hit ratios.
+
+- Prometheus text format on a local port (start_http_server)
+- JSON / Prometheus text dump to a file (dump)
+- Disabled by default (METRICS=1 to enable); when disabled every
+  recording call returns immediately
+- Registries of other processes (worker mode) are merged at export
+  time, each series labelled with its source (register_source)
+"""
+import copy
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from strands.hooks import (
+    AfterInvocationEvent,
+    AfterModelCallEvent,
+    AfterToolCallEvent,
+    BeforeInvocationEvent,
+    BeforeModelCallEvent,
+    BeforeToolCallEvent,
+    HookProvider,
+    HookRegistry,
+)
+
+from prompt_layout import snapshot_usage, usage_since
+
+
+# Metric name → (type, help)
+METRIC_HELP = {
+    "workshop_requests_total": ("counter", "User requests processed by the orchestrator"),
+    "workshop_requests_in_flight": ("gauge", "User requests currently being processed"),
+    "workshop_request_seconds": ("histogram", "End-to-end user request latency"),
+    "workshop_format_seconds": ("histogram", "Response formatting latency"),
+    "workshop_format_cache_lookups_total": ("counter", "Rendered response memo lookups"),
+    "workshop_agent_invocations_total": ("counter", "Agent invocations (orchestrator and sub-agents)"),
+    "workshop_agent_seconds": ("histogram", "Agent invocation latency"),
+    "workshop_model_call_seconds": ("histogram", "Model call latency"),
+    "workshop_model_tokens_total": ("counter", "Model tokens by type"),
+    "workshop_tool_calls_total": ("counter", "Tool calls (sub-agent tools and HTTP tools)"),
+    "workshop_tool_in_flight": ("gauge", "Tool calls currently running"),
+    "workshop_tool_seconds": ("histogram", "Tool call latency"),
+    "workshop_cache_lookups_total": ("counter", "Tool result cache lookups"),
+    "workshop_tool_memo_hits_total": ("counter", "Duplicate tool calls answered from the request memo"),
+    "workshop_cache_hit_ratio": ("gauge", "Tool result cache hit ratio"),
+    "workshop_plan_cache_hit_ratio": ("gauge", "Execution plan cache hit ratio"),
+    "workshop_plan_cache_planning_seconds_avoided": ("gauge", "Planning latency avoided by plan cache hits (estimated)"),
+    "workshop_tool_results_shaped_total": ("counter", "Tool results shaped before reaching the model"),
+    "workshop_tool_result_tokens_saved_total": ("counter", "Estimated tool result tokens saved by result shaping"),
+    "workshop_coalesced_calls_total": ("counter", "Sub-agent calls served by another call's execution"),
+    "workshop_model_output_tokens_p99": ("gauge", "Observed p99 output tokens per agent and call type"),
+    "workshop_model_max_tokens": ("gauge", "max_tokens in effect per agent and call type"),
+    "workshop_model_endpoint_outstanding": ("gauge", "Model calls in flight per pool endpoint"),
+    "workshop_model_endpoint_latency_ewma_seconds": ("gauge", "Latency EWMA (time to first event) per pool endpoint"),
+    "workshop_model_endpoint_calls_total": ("counter", "Model calls per pool endpoint"),
+    "workshop_model_endpoint_throttles_total": ("counter", "Throttled model calls per pool endpoint"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """
+    Log-bucketed histogram (HDR-style: bounded relative error per bucket)
+
+    Bucket upper bounds grow by 2**(1/sub_buckets), so quantiles are
+    accurate to ~4% with the default 16 sub-buckets per octave.
+    """
+
+    def __init__(self, lowest: float = 1e-4, highest: float = 600.0, sub_buckets: int = 16):
+        """
+        Initialize histogram
+
+        Args:
+            lowest: Upper bound of the first bucket (seconds)
+            highest: Values above this go to the overflow bucket
+            sub_buckets: Buckets per doubling of the value
+        """
+        self.lowest = lowest
+        self.sub_buckets = sub_buckets
+        self._scale = sub_buckets / math.log(2)
+        self._size = int(math.ceil(math.log(highest / lowest) * self._scale)) + 1
+        self.counts = [0] * (self._size + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return min(self._size, int(math.ceil(math.log(value / self.lowest) * self._scale)))
+
+    def upper_bound(self, index: int) -> float:
+        """Upper bound of a bucket"""
+        return self.lowest * 2 ** (index / self.sub_buckets)
+
+    def observe(self, value: float) -> None:
+        """Record a value"""
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Return the value at quantile q (0..1), bucket upper-bound accurate"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(q * self.count)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def prometheus_buckets(self) -> List[Tuple[float, int]]:
+        """Cumulative counts at octave boundaries (fixed bucket set for Prometheus)"""
+        buckets = []
+        cumulative = 0
+        for index, count in enumerate(self.counts[:self._size]):
+            cumulative += count
+            if index % self.sub_buckets == 0:
+                buckets.append((self.upper_bound(index), cumulative))
+        return buckets
+
+
+class _NullTimer:
+    """Timer used while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, registry: "MetricsRegistry", name: str, in_flight: Optional[str], labels: Dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.in_flight = in_flight
+        self.labels = labels
+
+    def __enter__(self):
+        if self.in_flight:
+            self.registry.add_gauge(self.in_flight, 1, **self.labels)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        if self.in_flight:
+            self.registry.add_gauge(self.in_flight, -1, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of counters, gauges and histograms
+
+    Collectors are called at export time to report values owned by other
+    modules (cache statistics) without any cost on the request path.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize registry
+
+        Args:
+            enabled: Record metrics (disabled registries ignore every call)
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]] = []
+        self._sources: List[Callable[[], Iterable[Tuple[Dict[str, Any], Dict[str, Any]]]]] = []
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def add_gauge(self, name: str, delta: float, **labels) -> None:
+        """Add to a gauge (in-flight tracking)"""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0) + delta
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a histogram value"""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def timer(self, name: str, in_flight: str = None, **labels):
+        """
+        Context manager timing a block into a histogram
+
+        Args:
+            name: Histogram name
+            in_flight: Gauge incremented while the block runs
+            **labels: Metric labels
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, in_flight, labels)
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]) -> None:
+        """Register a function returning (name, labels, value) samples at export time"""
+        self._collectors.append(collector)
+
+    def _collected(self) -> Dict[str, Dict[LabelKey, float]]:
+        collected: Dict[str, Dict[LabelKey, float]] = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                collected.setdefault(name, {})[_label_key(labels)] = value
+        return collected
+
+    def register_source(self, source: Callable[[], Iterable[Tuple[Dict[str, Any], Dict[str, Any]]]]) -> None:
+        """
+        Register a function returning (labels, state) pairs of other registries at export time
+
+        Each state is another registry's export_state() (a worker process);
+        its series are exported with the given labels added.
+        """
+        self._sources.append(source)
+
+    def export_state(self) -> Dict[str, Any]:
+        """Return a picklable copy of all recorded and collected values (see register_source)"""
+        collected = self._collected()
+        with self._lock:
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+            for name, series in collected.items():
+                gauges.setdefault(name, {}).update(series)
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "gauges": gauges,
+                "histograms": copy.deepcopy(self._histograms),
+            }
+
+    def _merged_state(self) -> Dict[str, Any]:
+        state = self.export_state()
+        for source in self._sources:
+            for labels, remote in source():
+                extra = _label_key(labels)
+                for kind in ("counters", "gauges", "histograms"):
+                    for name, series in remote[kind].items():
+                        merged = state[kind].setdefault(name, {})
+                        for key, value in series.items():
+                            merged[tuple(sorted(key + extra))] = value
+        return state
+
+    def render_prometheus(self) -> str:
+        """Return all metrics in Prometheus text exposition format"""
+        state = self._merged_state()
+        lines = []
+        scalars = [*state["counters"].items(), *state["gauges"].items()]
+        for name, series in sorted(scalars, key=lambda item: item[0]):
+            metric_type, help_text = METRIC_HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for name, series in sorted(state["histograms"].items()):
+            lines.append(f"# HELP {name} {METRIC_HELP.get(name, ('histogram', name))[1]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items()):
+                for bound, cumulative in histogram.prometheus_buckets():
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:.6g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serializable dict (histograms summarized)"""
+        def series_list(series: Dict[LabelKey, Any], render: Callable[[Any], Any]) -> List[Dict[str, Any]]:
+            return [{"labels": dict(labels), **render(value)} for labels, value in sorted(series.items())]
+
+        state = self._merged_state()
+        return {
+            "timestamp": time.time(),
+            "counters": {name: series_list(s, lambda v: {"value": v}) for name, s in state["counters"].items()},
+            "gauges": {name: series_list(s, lambda v: {"value": v}) for name, s in state["gauges"].items()},
+            "histograms": {
+                name: series_list(s, lambda h: {
+                    "count": h.count,
+                    "sum": round(h.sum, 6),
+                    "p50": round(h.quantile(0.5), 6),
+                    "p90": round(h.quantile(0.9), 6),
+                    "p99": round(h.quantile(0.99), 6),
+                    "max": round(h.max, 6),
+                })
+                for name, s in state["histograms"].items()
+            },
+        }
+
+    def dump(self, path: str) -> None:
+        """Write metrics to a file (JSON for *.json, Prometheus text otherwise)"""
+        content = (
+            json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+            if path.endswith(".json") else self.render_prometheus()
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def reset(self) -> None:
+        """Drop all recorded values"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+# Process-wide registry
+metrics = MetricsRegistry(enabled=os.getenv("METRICS", "").lower() in ("1", "true", "yes"))
+
+
+def _cache_samples() -> Iterable[Tuple[str, Dict[str, Any], float]]:
+    """Cache, plan cache and coalescing statistics (read at export time)"""
+    from cache import geocode_cache, search_cache
+    from coalescing import coalescing_stats
+    from knowledge_index import get_knowledge_index
+    from plan_cache import plan_cache
+
+    for cache in (geocode_cache, search_cache):
+        stats = dict(cache.stats)
+        for result, count in stats.items():
+            yield "workshop_cache_lookups_total", {"cache": cache.namespace, "result": result}, count
+        lookups = sum(stats.values())
+        hits = stats["hits"] + stats["shared_hits"]
+        yield "workshop_cache_hit_ratio", {"cache": cache.namespace}, hits / lookups if lookups else 0.0
+
+    index = get_knowledge_index()
+    if index is not None:
+        for result, count in dict(index.stats).items():
+            yield "workshop_cache_lookups_total", {"cache": "local_index", "result": result}, count
+
+    plan_stats = plan_cache.stats()
+    yield "workshop_plan_cache_hit_ratio", {}, plan_stats["hit_rate"]
+    yield "workshop_plan_cache_planning_seconds_avoided", {}, plan_stats["planning_seconds_avoided"]
+    for name, stats in coalescing_stats().items():
+        yield "workshop_coalesced_calls_total", {"agent": name, "mode": "in_flight"}, stats["coalesced"]
+        yield "workshop_coalesced_calls_total", {"agent": name, "mode": "reused"}, stats["reused"]
+
+
+metrics.register_collector(_cache_samples)
+
+
+def _output_limit_samples() -> Iterable[Tuple[str, Dict[str, Any], float]]:
+    """Observed output length and max_tokens per agent / call type"""
+    from output_limits import tracker
+
+    for (agent, call_type), row in tracker.suggestions().items():
+        labels = {"agent": agent, "call_type": call_type}
+        if row["p99"] is not None:
+            yield "workshop_model_output_tokens_p99", labels, row["p99"]
+        limit = row["applied"] or row["max_tokens"]
+        if limit:
+            yield "workshop_model_max_tokens", labels, limit
+
+
+metrics.register_collector(_output_limit_samples)
+
+
+def _result_shaping_samples() -> Iterable[Tuple[str, Dict[str, Any], float]]:
+    """Tool results shaped and tokens saved per tool (tokens saved per call: saved / shaped)"""
+    from result_shaping import shaping_stats
+
+    for tool, stats in shaping_stats.summary().items():
+        yield "workshop_tool_results_shaped_total", {"tool": tool}, stats["calls"]
+        yield "workshop_tool_result_tokens_saved_total", {"tool": tool}, stats["tokens_saved"]
+
+
+metrics.register_collector(_result_shaping_samples)
+
+
+def _model_pool_samples() -> Iterable[Tuple[str, Dict[str, Any], float]]:
+    """Per-endpoint state of the model pools"""
+    from model_config import model_pools
+
+    for pool in model_pools():
+        for endpoint, stats in pool.stats().items():
+            labels = {"endpoint": endpoint}
+            yield "workshop_model_endpoint_outstanding", labels, stats["outstanding"]
+            yield "workshop_model_endpoint_calls_total", labels, stats["calls"]
+            yield "workshop_model_endpoint_throttles_total", labels, stats["throttles"]
+            if stats["latency_ewma_ms"] is not None:
+                yield "workshop_model_endpoint_latency_ewma_seconds", labels, stats["latency_ewma_ms"] / 1000
+
+
+metrics.register_collector(_model_pool_samples)
+
+
+class MetricsHooks(HookProvider):
+    """
+    Hook provider recording agent, model and tool metrics of one agent
+
+    Attach to the orchestrator and every sub-agent; tool calls of the
+    orchestrator are sub-agent calls, tool calls of sub-agents are the
+    HTTP / search tools.
+    """
+
+    def __init__(self, agent_name: str, registry: MetricsRegistry = None):
+        """
+        Initialize metrics hooks
+
+        Args:
+            agent_name: Agent label ("orchestrator", "search_agent", ...)
+            registry: Metrics registry (default: process-wide registry)
+        """
+        self.agent_name = agent_name
+        self.registry = registry or metrics
+        self._invocation: Optional[Tuple[float, Dict[str, int]]] = None
+        self._model_started: Optional[float] = None
+        self._tool_started: Dict[str, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs) -> None:
+        registry.add_callback(BeforeInvocationEvent, self._before_invocation)
+        registry.add_callback(AfterInvocationEvent, self._after_invocation)
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_invocation(self, event: BeforeInvocationEvent) -> None:
+        if self.registry.enabled:
+            self._invocation = (time.perf_counter(), snapshot_usage(event.agent))
+
+    def _after_invocation(self, event: AfterInvocationEvent) -> None:
+        if not self.registry.enabled or self._invocation is None:
+            return
+        started, before = self._invocation
+        self._invocation = None
+        self.registry.inc("workshop_agent_invocations_total", agent=self.agent_name)
+        self.registry.observe("workshop_agent_seconds", time.perf_counter() - started, agent=self.agent_name)
+        for token_type, count in usage_since(event.agent, before).items():
+            if count:
+                self.registry.inc(
+                    "workshop_model_tokens_total", count,
+                    agent=self.agent_name, type=token_type.replace("_tokens", "")
+                )
+
+    def _before_model_call(self, event: BeforeModelCallEvent) -> None:
+        if self.registry.enabled:
+            self._model_started = time.perf_counter()
+
+    def _after_model_call(self, event: AfterModelCallEvent) -> None:
+        if not self.registry.enabled or self._model_started is None:
+            return
+        self.registry.observe(
+            "workshop_model_call_seconds", time.perf_counter() - self._model_started, agent=self.agent_name
+        )
+        self._model_started = None
+
+    def _before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        if not self.registry.enabled:
+            return
+        self._tool_started[event.tool_use["toolUseId"]] = time.perf_counter()
+        self.registry.add_gauge("workshop_tool_in_flight", 1, tool=event.tool_use["name"])
+
+    def _after_tool_call(self, event: AfterToolCallEvent) -> None:
+        started = self._tool_started.pop(event.tool_use["toolUseId"], None)
+        if not self.registry.enabled or started is None:
+            return
+        tool_name = event.tool_use["name"]
+        self.registry.add_gauge("workshop_tool_in_flight", -1, tool=tool_name)
+        self.registry.observe("workshop_tool_seconds", time.perf_counter() - started, tool=tool_name)
+        self.registry.inc(
+            "workshop_tool_calls_total",
+            agent=self.agent_name, tool=tool_name, status=event.result.get("status", "unknown")
+        )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = metrics
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: MetricsRegistry = None) -> ThreadingHTTPServer:
+    """
+    Serve metrics in Prometheus text format (GET /metrics) from a daemon thread
+
+    Args:
+        port: Local port (0 picks a free port; see server.server_address)
+        host: Bind address
+        registry: Metrics registry (default: process-wide registry)
+
+    Returns:
+        Running HTTP server (call shutdown() to stop)
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -1,18 +1,496 @@
 """Model Configuration - Strands Agents Workshop"""
+import copy
 import os
-from strands.models import BedrockModel
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, Sequence, Tuple
+from strands.models import BedrockModel, CacheConfig, Model
+from strands.types.exceptions import ModelThrottledException
+from output_limits import tracker
+from planner import PLAN_END_MARKER
 
 
-def get_configured_model(model_id: str = None) -> BedrockModel:
+# Model families supporting Bedrock prompt caching (cachePoint blocks)
+PROMPT_CACHE_MODEL_FAMILIES = ("anthropic.claude", "amazon.nova")
+
+
+def supports_prompt_cache(model_id: str) -> bool:
+    """Check whether a Bedrock model supports prompt caching
+    
+    Args:
+        model_id: Bedrock model ID (cross-region prefixes like "us." are allowed)
+        
+    Returns:
+        True if cache checkpoints can be used with this model
+    """
+    return any(family in (model_id or "") for family in PROMPT_CACHE_MODEL_FAMILIES)
+
+
+def prompt_cache_enabled(model) -> bool:
+    """Check whether prompt cache checkpoints should be placed for a model"""
+    return bool(getattr(model, "prompt_cache", False))
+
+
+# Generation parameters used without a profile
+DEFAULT_MODEL_PARAMS = {"temperature": 0.7, "max_tokens": 4096}
+
+# Per-agent parameter profiles (max_tokens / temperature / stop_sequences);
+# "call_types" overrides apply to one kind of model call:
+#   tool_choice: first call of a turn with tools offered (routing / tool selection)
+#   answer: calls after tool results, or without tools
+MODEL_PROFILES: Dict[str, Dict[str, Any]] = {
+    "orchestrator": {
+        "temperature": 0.3,
+        "max_tokens": 2048,
+        "call_types": {"tool_choice": {"temperature": 0.0, "max_tokens": 1024}},
+    },
+    "search_agent": {
+        "temperature": 0.3,
+        "max_tokens": 1024,
+        "call_types": {"tool_choice": {"temperature": 0.0, "max_tokens": 512}},
+    },
+    "weather_agent": {
+        "temperature": 0.3,
+        "max_tokens": 1024,
+        "call_types": {"tool_choice": {"temperature": 0.0, "max_tokens": 512}},
+    },
+    # "2-3 sentences" replies
+    "conversation_agent": {"temperature": 0.7, "max_tokens": 512},
+    # JSON plan only: stop at the end marker written after the closing brace
+    "planning_agent": {"temperature": 0.0, "max_tokens": 1024, "stop_sequences": [PLAN_END_MARKER]},
+}
+
+
+def model_params(profile: str = None, call_type: str = None) -> Dict[str, Any]:
+    """Resolve generation parameters for an agent profile and call type
+    
+    Args:
+        profile: Profile name (MODEL_PROFILES key; defaults only if unknown)
+        call_type: "tool_choice" or "answer"
+        
+    Returns:
+        max_tokens / temperature (/ stop_sequences), including an
+        auto-applied output cap (output_limits) when tighter
+    """
+    settings = MODEL_PROFILES.get(profile, {})
+    params = {**DEFAULT_MODEL_PARAMS, **{k: v for k, v in settings.items() if k != "call_types"}}
+    params.update(settings.get("call_types", {}).get(call_type, {}))
+    cap = tracker.cap(profile, call_type) if profile else None
+    if cap is not None and cap < params["max_tokens"]:
+        params["max_tokens"] = cap
+    return params
+
+
+def _with_params(model: Model, params: Dict[str, Any]) -> Model:
+    """Shallow copy of a model with its own config (client and state shared)"""
+    variant = copy.copy(model)
+    variant.config = {**model.get_config(), **params}
+    return variant
+
+
+def _call_type(messages: List[Dict[str, Any]], tool_specs: Optional[List[Dict[str, Any]]]) -> str:
+    """Classify a model call: tool selection on fresh input, or an answer"""
+    if not tool_specs or not messages:
+        return "answer"
+    last = messages[-1].get("content", [])
+    return "answer" if any("toolResult" in block for block in last) else "tool_choice"
+
+
+class ProfiledModel(Model):
+    """
+    Model wrapper applying an agent's parameter profile per call
+
+    Each call runs on a shallow copy of the base model with its own config
+    (the client is shared), so one base model can serve many agents and
+    concurrent sessions without their parameters interfering. Output token
+    counts are recorded in the output length tracker.
+    """
+
+    def __init__(self, model: Model, profile: str):
+        """
+        Wrap a model
+        
+        Args:
+            model: Base model (BedrockModel / StubModel)
+            profile: MODEL_PROFILES key
+        """
+        self.model = model
+        self.profile = profile
+
+    def __getattr__(self, name: str) -> Any:
+        # model_id, prompt_cache, ... of the base model
+        return getattr(self.model, name)
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self.model.get_config()
+
+    @property
+    def stateful(self) -> bool:
+        return self.model.stateful
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def _variant(self, params: Dict[str, Any]) -> Model:
+        return _with_params(self.model, params)
+
+    async def count_tokens(self, *args: Any, **kwargs: Any) -> int:
+        return await self.model.count_tokens(*args, **kwargs)
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self._variant(model_params(self.profile, "answer")).structured_output(
+            output_model, prompt, system_prompt, **kwargs
+        )
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[Dict[str, Any]]:
+        """Stream from the base model with this call's profile parameters"""
+        call_type = _call_type(messages, tool_specs)
+        params = model_params(self.profile, call_type)
+        output_tokens, truncated = None, False
+        async for event in self._variant(params).stream(messages, tool_specs, system_prompt, **kwargs):
+            if "messageStop" in event:
+                truncated = event["messageStop"].get("stopReason") == "max_tokens"
+            elif "metadata" in event:
+                output_tokens = event["metadata"].get("usage", {}).get("outputTokens")
+            yield event
+        if output_tokens is not None:
+            tracker.record(self.profile, call_type, output_tokens, params.get("max_tokens"), truncated)
+
+
+def with_profile(model: Model, profile: str) -> Model:
+    """Apply an agent's parameter profile to a model
+    
+    Args:
+        model: Base model (a ProfiledModel is re-wrapped around its base)
+        profile: MODEL_PROFILES key ("orchestrator", "search_agent", ...)
+        
+    Returns:
+        ProfiledModel
+    """
+    if isinstance(model, ProfiledModel):
+        model = model.model
+    return ProfiledModel(model, profile)
+
+
+# Model pool tuning
+EWMA_ALPHA = 0.3  # Weight of the newest latency sample
+THROTTLE_COOLDOWN = 1.0  # Seconds an endpoint is skipped after a throttle (doubles per consecutive throttle)
+MAX_THROTTLE_COOLDOWN = 30.0
+
+
+@dataclass
+class _Endpoint:
+    name: str
+    model: Model
+    outstanding: int = 0
+    latency_ewma: Optional[float] = None  # seconds to first response event
+    started: Dict[int, float] = None  # call id → start time of calls awaiting their first event
+    cooldown_until: float = 0.0
+    consecutive_throttles: int = 0
+    calls: int = 0
+    throttles: int = 0
+
+
+class ModelPool(Model):
+    """
+    Model spreading calls across (region, model_id) endpoints
+
+    - Picks the healthy endpoint with the lowest (outstanding + 1) x latency
+      estimate: least outstanding requests, steered toward the fastest
+      endpoint; the estimate is the latency EWMA, or the wait of the oldest
+      call still awaiting its first event when longer (spikes are noticed
+      before slow calls complete)
+    - Fails over to the next endpoint when a call is throttled before any
+      output (the throttled endpoint cools down, doubling per repeat)
+    - Latency EWMAs use the time to the first response event
+
+    Generation parameters in the pool config (max_tokens, temperature, ...)
+    override each endpoint's. Thread-safe; state is shared by copies.
+    """
+
+    def __init__(self, endpoints: Sequence[Tuple[str, Model]], ewma_alpha: float = EWMA_ALPHA):
+        """
+        Initialize model pool
+
+        Args:
+            endpoints: (name, model) pairs, e.g. ("us-east-1/us.amazon.nova-pro-v1:0", BedrockModel)
+            ewma_alpha: Weight of the newest latency sample
+        """
+        if not endpoints:
+            raise ValueError("ModelPool needs at least one endpoint")
+        self.endpoints = [_Endpoint(name, model, started={}) for name, model in endpoints]
+        self._call_ids = iter(range(1, 2 ** 62))
+        self.ewma_alpha = ewma_alpha
+        self.config: Dict[str, Any] = {}
+        first = self.endpoints[0].model
+        self.model_id = getattr(first, "model_id", self.endpoints[0].name)
+        self.prompt_cache = all(prompt_cache_enabled(endpoint.model) for endpoint in self.endpoints)
+        self._lock = threading.Lock()
+        _pools.add(self)
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    @staticmethod
+    def _latency_estimate(endpoint: _Endpoint, now: float) -> float:
+        waiting = now - min(endpoint.started.values()) if endpoint.started else 0.0
+        return max(endpoint.latency_ewma or 0.0, waiting)
+
+    def _acquire(self, tried: set) -> Tuple[Optional[_Endpoint], int]:
+        """Pick an endpoint (healthy ones first) and count it as outstanding"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.name not in tried]
+            if not candidates:
+                return None, 0
+            healthy = [e for e in candidates if e.cooldown_until <= now]
+            if healthy:
+                endpoint = min(
+                    healthy,
+                    key=lambda e: ((e.outstanding + 1) * self._latency_estimate(e, now), e.outstanding)
+                )
+            else:
+                endpoint = min(candidates, key=lambda e: e.cooldown_until)
+            call_id = next(self._call_ids)
+            endpoint.started[call_id] = now
+            endpoint.outstanding += 1
+            endpoint.calls += 1
+            return endpoint, call_id
+
+    def _first_event(self, endpoint: _Endpoint, call_id: int) -> None:
+        with self._lock:
+            endpoint.started.pop(call_id, None)
+
+    def _release(self, endpoint: _Endpoint, call_id: int, first_event_seconds: Optional[float], throttled: bool) -> None:
+        with self._lock:
+            endpoint.started.pop(call_id, None)
+            endpoint.outstanding -= 1
+            if throttled:
+                endpoint.throttles += 1
+                endpoint.consecutive_throttles += 1
+                cooldown = THROTTLE_COOLDOWN * 2 ** (endpoint.consecutive_throttles - 1)
+                endpoint.cooldown_until = time.monotonic() + min(cooldown, MAX_THROTTLE_COOLDOWN)
+            elif first_event_seconds is not None:
+                endpoint.consecutive_throttles = 0
+                if endpoint.latency_ewma is None:
+                    endpoint.latency_ewma = first_event_seconds
+                else:
+                    endpoint.latency_ewma += self.ewma_alpha * (first_event_seconds - endpoint.latency_ewma)
+
+    def _endpoint_model(self, endpoint: _Endpoint) -> Model:
+        return _with_params(endpoint.model, self.config) if self.config else endpoint.model
+
+    async def _failover(self, call: Callable[[Model], AsyncIterable[Dict[str, Any]]]) -> AsyncIterable[Dict[str, Any]]:
+        """Run call(endpoint model) on the best endpoint, failing over on throttling"""
+        tried: set = set()
+        while True:
+            endpoint, call_id = self._acquire(tried)
+            if endpoint is None:
+                raise ModelThrottledException("All model endpoints are throttled")
+            tried.add(endpoint.name)
+            started = time.perf_counter()
+            first_event = None
+            throttled = False
+            try:
+                async for event in call(self._endpoint_model(endpoint)):
+                    if first_event is None:
+                        first_event = time.perf_counter() - started
+                        self._first_event(endpoint, call_id)
+                    yield event
+                return
+            except ModelThrottledException:
+                throttled = True
+                if first_event is not None:
+                    raise  # output already yielded - cannot switch endpoints mid-response
+            finally:
+                self._release(endpoint, call_id, first_event, throttled)
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[Dict[str, Any]]:
+        """Stream from the best endpoint, failing over on throttling"""
+        async for event in self._failover(lambda model: model.stream(messages, tool_specs, system_prompt, **kwargs)):
+            yield event
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Structured output from the best endpoint, failing over on throttling"""
+        async for event in self._failover(
+            lambda model: model.structured_output(output_model, prompt, system_prompt, **kwargs)
+        ):
+            yield event
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint outstanding calls, latency EWMA, calls and throttles"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                e.name: {
+                    "outstanding": e.outstanding,
+                    "latency_ewma_ms": round(e.latency_ewma * 1000, 1) if e.latency_ewma is not None else None,
+                    "calls": e.calls,
+                    "throttles": e.throttles,
+                    "healthy": e.cooldown_until <= now,
+                }
+                for e in self.endpoints
+            }
+
+
+# Live pools (metrics export)
+_pools: "weakref.WeakSet[ModelPool]" = weakref.WeakSet()
+
+# Pools shared by every agent of the process, keyed by configuration
+_shared_pools: Dict[Tuple, ModelPool] = {}
+_shared_pools_lock = threading.Lock()
+
+
+def model_pools() -> List[ModelPool]:
+    """Return the live model pools"""
+    return list(_pools)
+
+
+def parse_endpoints(spec: str, default_region: str) -> List[Tuple[str, str]]:
+    """Parse MODEL_ENDPOINTS ("model_id@region,model_id@region,...")
+    
+    Args:
+        spec: Comma-separated endpoints; "@region" may be omitted
+        default_region: Region for endpoints without one
+        
+    Returns:
+        (region, model_id) pairs
+    """
+    endpoints = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model_id, _, region = item.rpartition("@") if "@" in item else (item, "", "")
+        endpoints.append((region or default_region, model_id))
+    return endpoints
+
+
+def bedrock_streaming_enabled() -> bool:
+    """Whether Bedrock calls use ConverseStream (BEDROCK_STREAMING, on unless "0"/"false")"""
+    return os.getenv("BEDROCK_STREAMING", "1").lower() not in ("0", "false", "no")
+
+
+def _create_bedrock_model(model_id: str, region: str, prompt_cache: bool) -> BedrockModel:
+    """Create one Bedrock endpoint model"""
+    # Prompt caching is opt-in and only used where the model supports it
+    prompt_cache = prompt_cache and supports_prompt_cache(model_id)
+    
+    cache_options = {}
+    if prompt_cache:
+        # System prompt cache points are placed by the prompt layout;
+        # tool specs are cached only on Claude models
+        cache_options["cache_config"] = CacheConfig(
+            strategy="anthropic",
+            system_prompt_ttl=False,
+            tools_ttl="anthropic.claude" in model_id,
+        )
+    
+    model = BedrockModel(
+        model_id=model_id,
+        region_name=region,
+        # Streamed responses: the shell renders the answer as it arrives, the
+        # pool fails over on the first event, deadlines cut calls mid-answer
+        streaming=bedrock_streaming_enabled(),
+        **DEFAULT_MODEL_PARAMS,
+        **cache_options
+    )
+    model.prompt_cache = prompt_cache
+    
+    # Add model_id attribute (compatibility)
+    if not hasattr(model, 'model_id'):
+        model.model_id = model_id
+    return model
+
+
+def _shared_pool(key: Tuple, build) -> ModelPool:
+    with _shared_pools_lock:
+        pool = _shared_pools.get(key)
+        if pool is None:
+            pool = _shared_pools[key] = ModelPool(build())
+        return pool
+
+
+def _stub_pool(spec: str) -> ModelPool:
+    """Pool of local stub endpoints ("name:latency:throttle_rate,...")"""
+    from stub_model import StubModel, routing_responder
+
+    def build():
+        endpoints = []
+        for item in spec.split(","):
+            name, latency, throttle_rate = (item.strip().split(":") + ["0", "0"])[:3]
+            endpoints.append((name, StubModel(
+                responder=routing_responder,
+                latency=float(latency),
+                throttle_rate=float(throttle_rate),
+                model_id=f"stub.{name}"
+            )))
+        return endpoints
+
+    return _shared_pool(("stub", spec), build)
+
+
+def get_configured_model(model_id: str = None, prompt_cache: bool = None, profile: str = None) -> Model:
     """Workshop Bedrock model configuration
     
+    With MODEL_ENDPOINTS ("model_id@region,...") and no model_id argument,
+    calls are spread across the endpoints by a process-wide ModelPool.
+    
     Args:
         model_id: Model ID to use (optional)
+        prompt_cache: Opt in to Bedrock prompt caching
+            (default: PROMPT_CACHE environment variable, off if unset)
+        profile: Agent parameter profile (MODEL_PROFILES key; None: default parameters)
         
     Returns:
-        Configured BedrockModel instance
+        Configured BedrockModel / ModelPool instance (wrapped in ProfiledModel with a profile)
     """
+    # Local stub model for offline runs and benchmarks (MODEL_PROVIDER=stub)
+    if os.getenv("MODEL_PROVIDER") == "stub":
+        from stub_model import get_stub_model
+        # STUB_MODEL_ENDPOINTS ("name:latency:throttle_rate,..."): stub endpoint pool
+        stub_endpoints = os.getenv("STUB_MODEL_ENDPOINTS")
+        model = _stub_pool(stub_endpoints) if stub_endpoints else get_stub_model()
+        return with_profile(model, profile) if profile else model
+    
     # TODO: Implement in Lab 1
+    # AWS region configuration
+    region = os.getenv("AWS_REGION", "us-west-2")
+    
+    if prompt_cache is None:
+        prompt_cache = os.getenv("PROMPT_CACHE", "").lower() in ("1", "true", "yes")
+    
+    # Multi-region / multi-model endpoints (shared pool: latency and throttle state span agents)
+    endpoint_spec = os.getenv("MODEL_ENDPOINTS")
+    if endpoint_spec and not model_id:
+        endpoints = parse_endpoints(endpoint_spec, region)
+        model = _shared_pool(
+            ("bedrock", tuple(endpoints), prompt_cache),
+            lambda: [(f"{r}/{m}", _create_bedrock_model(m, r, prompt_cache)) for r, m in endpoints]
+        )
+        return with_profile(model, profile) if profile else model
+    
     # Determine model ID (priority: parameter > environment variable > default)
     final_model_id = (
         model_id or 
@@ -20,27 +498,14 @@ def get_configured_model(model_id: str = None) -> BedrockModel:
         "us.amazon.nova-pro-v1:0"
     )
     
-    # AWS region configuration
-    region = os.getenv("AWS_REGION", "us-west-2")
-    
     # Create Bedrock model
-    model = BedrockModel(
-        model_id=final_model_id,
-        region=region,
-        temperature=0.7,
-        max_tokens=4096,
-        streaming=False  # Disable streaming for workshop
-    )
+    model = _create_bedrock_model(final_model_id, region, prompt_cache)
     
-    # Add model_id attribute (compatibility)
-    if not hasattr(model, 'model_id'):
-        model.model_id = final_model_id
-    
-    return model
+    return with_profile(model, profile) if profile else model
 
 
 # Environment information (for display)
-MODEL_PROVIDER = "bedrock"
+MODEL_PROVIDER = os.getenv("MODEL_PROVIDER", "bedrock")
 MODEL_ID = os.getenv("MODEL_ID", "us.amazon.nova-pro-v1:0")
 
 # Supported models list (workshop reference)
@@ -0,0 +1,166 @@
+"""Output Limits - Strands Agents Workshop
+
+Tracks the actual output length of model calls per (agent, call type)
+and suggests max_tokens caps from the observed p99. With auto-apply on,
+suggested caps tighter than the profile take effect at runtime; a call
+that hits an applied cap (stopReason "max_tokens") removes it again.
+
+- tracker.record(): called by ProfiledModel after every model call
+- tracker.suggestions(): observed p99 and suggested cap per key
+- MODEL_OUTPUT_AUTOTUNE=1 (or main.py --autotune-output) enables auto-apply
+"""
+import math
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+# Samples kept per (agent, call type) - p99 follows recent traffic
+WINDOW_SIZE = 1000
+
+# Samples needed before a cap is suggested
+MIN_SAMPLES = 200
+
+# Suggested cap = p99 x headroom, rounded up to CAP_STEP, at least MIN_CAP
+CAP_HEADROOM = 1.5
+CAP_STEP = 64
+MIN_CAP = 256
+
+# Auto-applied caps are recomputed every this many samples
+APPLY_EVERY = 50
+
+Key = Tuple[str, str]
+
+
+class OutputLengthTracker:
+    """
+    Output token counts per (agent, call type) with p99-based cap suggestions
+
+    Thread-safe; one tracker is shared by every agent in the process.
+    """
+
+    def __init__(
+        self,
+        auto_apply: bool = False,
+        window_size: int = WINDOW_SIZE,
+        min_samples: int = MIN_SAMPLES,
+        headroom: float = CAP_HEADROOM,
+    ):
+        """
+        Initialize output length tracker
+
+        Args:
+            auto_apply: Apply suggested caps at runtime
+            window_size: Samples kept per key
+            min_samples: Samples needed before a cap is suggested
+            headroom: Multiplier over the observed p99
+        """
+        self.auto_apply = auto_apply
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self._samples: Dict[Key, Deque[int]] = {}
+        self._limits: Dict[Key, int] = {}  # profile max_tokens seen per key
+        self._caps: Dict[Key, int] = {}  # auto-applied caps
+        self._counts: Dict[Key, int] = {}
+        self._truncated: Dict[Key, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, call_type: str, output_tokens: int, max_tokens: Optional[int], truncated: bool) -> None:
+        """
+        Record one model call
+
+        Args:
+            agent: Agent profile name
+            call_type: "tool_choice" or "answer"
+            output_tokens: Output tokens reported by the model
+            max_tokens: max_tokens the call ran with
+            truncated: Whether the call stopped at max_tokens
+        """
+        key = (agent, call_type)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window_size)
+            if truncated:
+                self._truncated[key] = self._truncated.get(key, 0) + 1
+                if key in self._caps:
+                    # 적용한 상한에 걸림 → 상한 해제, 새 표본으로 다시 판단
+                    del self._caps[key]
+                    samples.clear()
+                    return
+            samples.append(output_tokens)
+            if max_tokens and key not in self._caps:
+                self._limits[key] = max_tokens
+            self._counts[key] = self._counts.get(key, 0) + 1
+            if self.auto_apply and self._counts[key] % APPLY_EVERY == 0:
+                suggested = self._suggest(key)
+                if suggested is not None and suggested < self._limits.get(key, math.inf):
+                    self._caps[key] = suggested
+
+    def cap(self, agent: str, call_type: str) -> Optional[int]:
+        """Return the auto-applied max_tokens cap for a key, if any"""
+        return self._caps.get((agent, call_type))
+
+    def _suggest(self, key: Key) -> Optional[int]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        p99 = _quantile(sorted(samples), 0.99)
+        return max(MIN_CAP, math.ceil(p99 * self.headroom / CAP_STEP) * CAP_STEP)
+
+    def suggestions(self) -> Dict[Key, Dict[str, Optional[float]]]:
+        """
+        Observed output length and suggested cap per (agent, call type)
+
+        Returns:
+            {(agent, call_type): {"samples", "p50", "p99", "max_tokens", "suggested", "applied", "truncated"}}
+        """
+        with self._lock:
+            report = {}
+            for key, samples in self._samples.items():
+                ordered = sorted(samples)
+                report[key] = {
+                    "samples": len(ordered),
+                    "p50": _quantile(ordered, 0.5),
+                    "p99": _quantile(ordered, 0.99),
+                    "max_tokens": self._limits.get(key),
+                    "suggested": self._suggest(key),
+                    "applied": self._caps.get(key),
+                    "truncated": self._truncated.get(key, 0),
+                }
+            return report
+
+    def report_lines(self) -> List[str]:
+        """Human-readable suggestions (keys with a tighter suggested cap only)"""
+        lines = []
+        for (agent, call_type), row in sorted(self.suggestions().items()):
+            if row["suggested"] is None or row["suggested"] >= (row["max_tokens"] or math.inf):
+                continue
+            applied = " (적용됨)" if row["applied"] else ""
+            lines.append(
+                f"{agent}/{call_type}: p99 {row['p99']:.0f} tokens → max_tokens "
+                f"{row['max_tokens']} → {row['suggested']}{applied}"
+            )
+        return lines
+
+    def reset(self) -> None:
+        """Forget all samples and applied caps"""
+        with self._lock:
+            self._samples.clear()
+            self._limits.clear()
+            self._caps.clear()
+            self._counts.clear()
+            self._truncated.clear()
+
+
+def _quantile(ordered: List[int], q: float) -> Optional[float]:
+    """Nearest-rank quantile of a sorted list"""
+    if not ordered:
+        return None
+    return float(ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))])
+
+
+# Process-wide tracker (MODEL_OUTPUT_AUTOTUNE=1 enables auto-apply)
+tracker = OutputLengthTracker(auto_apply=os.getenv("MODEL_OUTPUT_AUTOTUNE", "").lower() in ("1", "true", "yes"))
@@ -0,0 +1,237 @@
+"""Plan Cache - Strands Agents Workshop
+
+Reuses execution plans across structurally similar requests.
+"Tell me about Paris and the weather" and "Tell me about Rome and the
+weather" share the template "tell me about {slot0} and the weather";
+the cached plan is re-bound to the new entities instead of paying for
+another planning model call.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from planner import PlanError, parse_plan
+
+
+# Capitalized words that start phrases/questions rather than name entities
+# (contractions are matched without their suffix: "What's" → "what")
+NON_ENTITY_WORDS = {
+    "tell", "what", "whats", "how", "hows", "who", "where", "when", "why", "which", "please",
+    "i", "i'm", "the", "and", "also", "is", "are", "can", "could", "would", "show", "give",
+    "find", "search", "explain", "describe", "check", "hello", "hi", "weather",
+}
+
+_ENTITY_PATTERN = re.compile(r"\"([^\"]+)\"|\b([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)")
+_CONTRACTION_PATTERN = re.compile(r"['’](s|re|m|ll|d|ve)$")
+_SENTENCE_END = (".", "!", "?", ":", ";")
+_SLOT_MARKER = "[[slot{}]]"
+
+
+def _is_non_entity(word: str) -> bool:
+    word = word.lower().strip("'’")
+    return word in NON_ENTITY_WORDS or _CONTRACTION_PATTERN.sub("", word) in NON_ENTITY_WORDS
+
+
+def extract_slots(request: str) -> Tuple[str, List[str]]:
+    """Split a request into a template key and its entity slot values
+
+    The first word of a sentence is capitalized as a sentence start, not
+    as a name ("Compare Paris" → "compare {slot0}"), so it never becomes
+    part of a slot.
+
+    Args:
+        request: User request
+
+    Returns:
+        (template key, distinct slot values in order of appearance)
+    """
+    slots: List[str] = []
+
+    def slot_for(entity: str) -> str:
+        # Repeated entities share one slot
+        if entity not in slots:
+            slots.append(entity)
+        return f"{{slot{slots.index(entity)}}}"
+
+    def replace(match: "re.Match") -> str:
+        if match.group(1):
+            return f"\"{slot_for(match.group(1))}\""
+        words = match.group(2).split()
+        preceding = request[:match.start()].rstrip()
+        if not preceding or preceding.endswith(_SENTENCE_END):
+            words.pop(0)
+        # Drop leading non-entity words ("Tell Paris" is not an entity)
+        while words and _is_non_entity(words[0]):
+            words.pop(0)
+        if not words:
+            return match.group(0)
+        prefix = match.group(0)[:match.group(0).find(words[0])]
+        return prefix + slot_for(" ".join(words))
+
+    template = _ENTITY_PATTERN.sub(replace, request)
+    key = " ".join(template.lower().split()).strip(" ?!.")
+    return key, slots
+
+
+def _templatize(plan: Dict[str, Any], slots: List[str]) -> Optional[Dict[str, Any]]:
+    """Replace slot values in plan inputs with slot markers
+
+    Only whole-word occurrences are replaced. Returns None when such a plan
+    cannot be safely re-bound:
+    - a slot value does not appear in a step that works from the request
+      itself (no depends_on): the planner rewrote that entity, and the
+      synthesis step echoing the whole request does not count
+    - a slot value appears ambiguously (inside another word, e.g. "US" in
+      "business", or with mixed casing, e.g. "US" and "us")
+    - a word of a slot value is left in the template as literal text
+      (it would leak into plans for other entities)
+    """
+    steps = []
+    used = set()
+    for step in plan["steps"]:
+        text = step["input"]
+        for index, value in sorted(enumerate(slots), key=lambda item: -len(item[1])):
+            pattern = re.compile(rf"(?<!\w){re.escape(value)}(?!\w)", re.IGNORECASE)
+            found = pattern.findall(text)
+            if not found:
+                continue
+            if len(re.findall(re.escape(value), text, flags=re.IGNORECASE)) > len(found) or len(set(found)) > 1:
+                return None
+            text = pattern.sub(_SLOT_MARKER.format(index), text)
+            if not step["depends_on"]:
+                used.add(index)
+        steps.append({**step, "input": text})
+    if len(used) < len(slots):
+        return None
+    for word in {word for value in slots for word in re.findall(r"\w+", value)}:
+        leftover = re.compile(rf"(?<!\w){re.escape(word)}(?!\w)")
+        if any(leftover.search(step["input"]) for step in steps):
+            return None
+    return {"steps": steps}
+
+
+def _bind(template: Dict[str, Any], slots: List[str]) -> Dict[str, Any]:
+    """Fill slot markers of a plan template with new values"""
+    steps = []
+    for step in template["steps"]:
+        text = step["input"]
+        for index, value in enumerate(slots):
+            text = text.replace(_SLOT_MARKER.format(index), value)
+        steps.append({**step, "input": text, "depends_on": list(step["depends_on"])})
+    return {"steps": steps}
+
+
+class PlanCache:
+    """
+    Thread-safe LRU cache of plan templates keyed by request structure
+
+    Records hit rate and the planning latency avoided by hits.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize plan cache
+
+        Args:
+            max_entries: Number of plan templates kept
+        """
+        self.max_entries = max_entries
+        self._templates: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._planning_seconds = 0.0
+
+    def lookup(self, request: str, allowed_agents: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Return a plan bound to this request, or None on miss
+
+        A template whose re-bound plan is invalid counts as a miss.
+
+        Args:
+            request: User request
+            allowed_agents: Sub-agent names (the bound plan is re-validated)
+        """
+        key, slots = extract_slots(request)
+        with self._lock:
+            template = self._templates.get((key, len(slots)))
+            if template is not None:
+                self._templates.move_to_end((key, len(slots)))
+        plan = None
+        if template is not None:
+            try:
+                plan = parse_plan(_bind(template, slots), allowed_agents)
+            except PlanError:
+                plan = None
+        with self._lock:
+            if plan is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return plan
+
+    def store(self, request: str, plan: Dict[str, Any], planning_seconds: float) -> None:
+        """
+        Cache the plan produced by the planner for a request
+
+        Args:
+            request: User request the plan was made for
+            plan: Validated plan
+            planning_seconds: Planner latency (used to report latency avoided)
+        """
+        key, slots = extract_slots(request)
+        template = _templatize(plan, slots)
+        with self._lock:
+            self._planning_seconds += planning_seconds
+            if template is None:
+                return
+            self._templates[(key, len(slots))] = template
+            self._templates.move_to_end((key, len(slots)))
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+
+    async def get_or_plan(
+        self,
+        request: str,
+        planner: Callable[[str], Awaitable[Dict[str, Any]]],
+        allowed_agents: List[str]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return a cached plan, or call the planner on a miss and cache its plan
+
+        Args:
+            request: User request
+            planner: Async planner returning a validated plan
+            allowed_agents: Sub-agent names plan steps may use
+
+        Returns:
+            (plan, cache hit)
+        """
+        plan = self.lookup(request, allowed_agents)
+        if plan is not None:
+            return plan, True
+
+        started = time.perf_counter()
+        plan = await planner(request)
+        self.store(request, plan, time.perf_counter() - started)
+        return plan, False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit rate and planning latency avoided"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            average = self._planning_seconds / self._misses if self._misses else 0.0
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "templates": len(self._templates),
+                "avg_planning_seconds": round(average, 3),
+                "planning_seconds_avoided": round(average * self._hits, 3),
+            }
+
+
+# Process-wide plan cache
+plan_cache = PlanCache()
@@ -0,0 +1,248 @@
+"""Planner - Strands Agents Workshop
+
+Machine-readable execution plans for multi-step requests: a DAG of
+sub-agent calls with explicit data dependencies, plus an executor that
+runs independent steps concurrently and passes outputs along the edges.
+
+Plan format (JSON):
+    {"steps": [
+        {"id": "s1", "agent": "search_agent", "input": "Paris", "depends_on": []},
+        {"id": "s2", "agent": "weather_agent", "input": "Paris", "depends_on": []},
+        {"id": "s3", "agent": "conversation_agent",
+         "input": "Summarize for the user: {s1} {s2}", "depends_on": ["s1", "s2"]}
+    ]}
+
+"{step_id}" placeholders in an input are replaced by that step's output;
+braces around anything other than a step ID are left as they are.
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from deadline import DeadlineExceeded, record_partial
+from progress import emit
+
+
+# Maximum number of steps accepted in one plan
+MAX_PLAN_STEPS = 6
+
+# Written by the planner after the plan JSON; used as the model's stop
+# sequence, so generation ends at the closing brace instead of running on
+PLAN_END_MARKER = "</plan>"
+
+# Connectives suggesting a request has several parts (Korean: whole word,
+# or a "하고"/"랑" particle ending a word)
+_MULTI_STEP_PATTERN = re.compile(
+    r"\b(and also|and then|as well as|and|also|then|plus)\b|\b그리고\b|\w(하고|이랑|랑)(?=\s)|도 알려",
+    re.IGNORECASE
+)
+
+# Kinds of task a request can ask for; a multi-step request names two
+_INTENT_PATTERNS = {
+    "weather": re.compile(r"\b(weather|forecast|temperature|rain|snow)\b|날씨|기온", re.IGNORECASE),
+    "search": re.compile(
+        r"\b(tell me about|search|look up|find|who (is|was)|history|wikipedia)\b|검색|정보|누구|대해",
+        re.IGNORECASE
+    ),
+    "recommend": re.compile(r"\b(recommend|suggest)\b|추천", re.IGNORECASE),
+}
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+# Sub-agent call: async (input text) -> output text
+StepRunner = Callable[[str], Awaitable[str]]
+
+
+class PlanError(ValueError):
+    """Raised when a plan cannot be parsed or is not a valid DAG"""
+
+
+def looks_multi_step(user_input: str) -> bool:
+    """Cheap check whether a request likely needs several sub-agents
+
+    Args:
+        user_input: User input
+
+    Returns:
+        True if a connective joins parts asking for at least two kinds of task
+    """
+    if len(user_input.split()) < 4 or not _MULTI_STEP_PATTERN.search(user_input):
+        return False
+    return sum(1 for pattern in _INTENT_PATTERNS.values() if pattern.search(user_input)) >= 2
+
+
+def _extract_json(text: str) -> Any:
+    """Parse the first JSON object found in model output"""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        raise PlanError("No JSON object found in planner output")
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise PlanError(f"Invalid plan JSON: {e}") from e
+
+
+def topological_order(steps: List[Dict[str, Any]]) -> List[str]:
+    """Return step IDs in dependency order
+
+    Raises:
+        PlanError: If the dependencies contain a cycle
+    """
+    remaining = {step["id"]: set(step["depends_on"]) for step in steps}
+    order: List[str] = []
+    while remaining:
+        ready = sorted(step_id for step_id, deps in remaining.items() if not deps)
+        if not ready:
+            raise PlanError(f"Plan has a dependency cycle: {sorted(remaining)}")
+        for step_id in ready:
+            order.append(step_id)
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+def parse_plan(plan: Any, allowed_agents: List[str]) -> Dict[str, Any]:
+    """Parse and validate an execution plan
+
+    Args:
+        plan: Plan dict or planner output text containing JSON
+        allowed_agents: Sub-agent names steps may use
+
+    Returns:
+        Normalized plan dict ({"steps": [...]})
+
+    Raises:
+        PlanError: If the plan is malformed, uses unknown agents or is cyclic
+    """
+    data = _extract_json(plan) if isinstance(plan, str) else plan
+    steps = data.get("steps") if isinstance(data, dict) else None
+    if not isinstance(steps, list) or not steps:
+        raise PlanError("Plan has no steps")
+    if len(steps) > MAX_PLAN_STEPS:
+        raise PlanError(f"Plan has {len(steps)} steps (max {MAX_PLAN_STEPS})")
+
+    normalized = []
+    seen = set()
+    for index, step in enumerate(steps, 1):
+        if not isinstance(step, dict):
+            raise PlanError(f"Step {index} is not an object")
+        step_id = str(step.get("id") or f"s{index}")
+        agent = step.get("agent")
+        if step_id in seen:
+            raise PlanError(f"Duplicate step id: {step_id}")
+        if agent not in allowed_agents:
+            raise PlanError(f"Step {step_id} uses unknown agent: {agent}")
+        seen.add(step_id)
+
+        depends_on = [str(dep) for dep in step.get("depends_on", [])]
+        normalized.append({"id": step_id, "agent": agent, "input": str(step.get("input", "")), "depends_on": depends_on})
+
+    for step in normalized:
+        # Placeholders of step IDs imply a dependency even if the planner forgot to list it
+        for placeholder in _PLACEHOLDER_PATTERN.findall(step["input"]):
+            if placeholder in seen and placeholder not in step["depends_on"]:
+                step["depends_on"].append(placeholder)
+        missing = [dep for dep in step["depends_on"] if dep not in seen]
+        if missing:
+            raise PlanError(f"Step {step['id']} depends on unknown steps: {missing}")
+
+    topological_order(normalized)
+    return {"steps": normalized}
+
+
+def sink_steps(plan: Dict[str, Any]) -> List[str]:
+    """Return IDs of steps no other step depends on (the plan's final outputs)"""
+    used = {dep for step in plan["steps"] for dep in step["depends_on"]}
+    return [step["id"] for step in plan["steps"] if step["id"] not in used]
+
+
+def _bind_inputs(text: str, depends_on: List[str], outputs: Dict[str, str]) -> str:
+    """Replace {step_id} placeholders of a step's dependencies with their outputs"""
+    return _PLACEHOLDER_PATTERN.sub(
+        lambda m: outputs[m.group(1)] if m.group(1) in depends_on else m.group(0), text
+    )
+
+
+async def execute_plan(plan: Dict[str, Any], runners: Dict[str, StepRunner]) -> Dict[str, Any]:
+    """Execute a plan, running independent steps concurrently
+
+    Steps still running when execution stops (a failed step, the deadline
+    or cancellation of the caller) are cancelled before returning.
+
+    Args:
+        plan: Validated plan from parse_plan()
+        runners: Sub-agent name → async runner
+
+    Returns:
+        Execution result:
+        - success: All steps completed
+        - outputs: Step ID → output text (completed steps only)
+        - response: Sink step outputs joined (on success)
+        - failed_step / error: First failure (execution stops early)
+        - step_seconds: Step ID → duration
+
+    Raises:
+        DeadlineExceeded: A step ran past the request deadline
+    """
+    steps = {step["id"]: step for step in plan["steps"]}
+    outputs: Dict[str, str] = {}
+    durations: Dict[str, float] = {}
+    running: Dict[asyncio.Task, str] = {}
+    pending = dict(steps)
+
+    async def run_step(step: Dict[str, Any]) -> str:
+        started = time.perf_counter()
+        emit("step_start", step["agent"], name=step["id"])
+        ok = False
+        try:
+            output = await runners[step["agent"]](_bind_inputs(step["input"], step["depends_on"], outputs))
+            ok = True
+            return output
+        finally:
+            durations[step["id"]] = round(time.perf_counter() - started, 3)
+            emit("step_end", step["agent"], name=step["id"], seconds=durations[step["id"]], ok=ok)
+
+    def start_ready_steps():
+        for step_id, step in list(pending.items()):
+            if all(dep in outputs for dep in step["depends_on"]):
+                del pending[step_id]
+                running[asyncio.create_task(run_step(step))] = step_id
+
+    start_ready_steps()
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step_id = running.pop(task)
+                try:
+                    outputs[step_id] = str(task.result())
+                    record_partial(steps[step_id]["agent"], outputs[step_id])
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    # Stop early: in-flight steps are cancelled below, the rest skipped
+                    return {
+                        "success": False,
+                        "outputs": outputs,
+                        "failed_step": step_id,
+                        "error": f"{steps[step_id]['agent']} failed: {str(e)}",
+                        "step_seconds": durations,
+                    }
+            start_ready_steps()
+    finally:
+        # Failure, deadline or caller cancellation: never leave steps running
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    return {
+        "success": True,
+        "outputs": outputs,
+        "response": "\n\n".join(outputs[step_id] for step_id in sink_steps(plan)),
+        "step_seconds": durations,
+    }
@@ -0,0 +1,130 @@
+"""Progress Events - Strands Agents Workshop
+
+Live progress of a running request for interactive front ends: sub-agent
+and tool calls starting / finishing, plan steps, and streamed text.
+
+Events go to the sink of the running request (a context variable, so it
+follows the request into sub-agent tasks). Without a sink, agents print
+to stdout as before.
+
+- progress_scope(sink): route the request's events to a callable
+- ProgressHooks: tool / sub-agent start and finish events of an agent
+- ProgressCallbackHandler: streamed text events (replaces the printing
+  callback handler, which is used when there is no sink)
+"""
+import contextlib
+import contextvars
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from strands.handlers.callback_handler import PrintingCallbackHandler
+from strands.hooks import AfterToolCallEvent, BeforeToolCallEvent, HookProvider, HookRegistry
+
+
+@dataclass
+class ProgressEvent:
+    """One progress event
+
+    kind: "tool_start" / "tool_end" (a sub-agent when agent is the
+    orchestrator), "step_start" / "step_end" (plan steps) or "text"
+    """
+
+    kind: str
+    agent: str
+    name: str = ""
+    seconds: Optional[float] = None
+    ok: bool = True
+    text: str = ""
+
+
+ProgressSink = Callable[[ProgressEvent], None]
+
+_sink: contextvars.ContextVar[Optional[ProgressSink]] = contextvars.ContextVar("progress_sink", default=None)
+
+
+@contextlib.contextmanager
+def progress_scope(sink: ProgressSink) -> Iterator[None]:
+    """Send the progress events of the enclosed request to sink"""
+    token = _sink.set(sink)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def progress_enabled() -> bool:
+    """Check whether the running request has a progress sink"""
+    return _sink.get() is not None
+
+
+def emit(kind: str, agent: str, **fields: Any) -> None:
+    """Send a progress event to the running request's sink (no-op without one)"""
+    sink = _sink.get()
+    if sink is not None:
+        sink(ProgressEvent(kind, agent, **fields))
+
+
+class ProgressHooks(HookProvider):
+    """Emit start / finish events for the tool calls of an agent"""
+
+    def __init__(self, agent_name: str):
+        """
+        Initialize progress hooks
+
+        Args:
+            agent_name: Agent label ("orchestrator", "search_agent", ...)
+        """
+        self.agent_name = agent_name
+        self._started: Dict[str, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs) -> None:
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        if _sink.get() is None:
+            return
+        self._started[event.tool_use["toolUseId"]] = time.perf_counter()
+        emit("tool_start", self.agent_name, name=event.tool_use["name"])
+
+    def _after_tool_call(self, event: AfterToolCallEvent) -> None:
+        started = self._started.pop(event.tool_use["toolUseId"], None)
+        if started is None:
+            return
+        emit(
+            "tool_end",
+            self.agent_name,
+            name=event.tool_use["name"],
+            seconds=time.perf_counter() - started,
+            ok=event.result.get("status") == "success",
+        )
+
+
+class ProgressCallbackHandler:
+    """
+    Agent callback handler: streamed text to the progress sink
+
+    Without a sink it behaves like the default printing callback handler.
+    """
+
+    def __init__(self, agent_name: str, stream_text: bool = False):
+        """
+        Initialize callback handler
+
+        Args:
+            agent_name: Agent label
+            stream_text: Emit this agent's text as "text" events (the
+                orchestrator; sub-agent text is folded into its answer)
+        """
+        self.agent_name = agent_name
+        self.stream_text = stream_text
+        self._printing = PrintingCallbackHandler()
+
+    def __call__(self, **kwargs: Any) -> None:
+        sink = _sink.get()
+        if sink is None:
+            self._printing(**kwargs)
+            return
+        if self.stream_text and kwargs.get("data"):
+            sink(ProgressEvent("text", self.agent_name, text=kwargs["data"]))
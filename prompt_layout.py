@@ -0,0 +1,74 @@
+"""Prompt Layout - Strands Agents Workshop
+
+Assembles system prompts as a stable shared prefix plus a variable
+per-user suffix, so provider-side prompt caching can reuse the prefix
+across users and calls.
+"""
+from typing import Dict, Any, List, Union
+
+
+# Token usage fields reported per turn
+USAGE_FIELDS = ("inputTokens", "cacheReadInputTokens", "cacheWriteInputTokens", "outputTokens")
+
+
+def build_system_prompt(
+    stable_prefix: str,
+    variable_suffix: str = None,
+    cache: bool = False
+) -> Union[str, List[Dict[str, Any]]]:
+    """Build a system prompt with the stable part first
+
+    Args:
+        stable_prefix: Shared instructions (identical for every user and call)
+        variable_suffix: Per-user / per-request context (optional)
+        cache: Place a cache checkpoint after the stable prefix
+
+    Returns:
+        Plain prompt string, or system content blocks with a cachePoint
+    """
+    prefix = stable_prefix.strip()
+    suffix = variable_suffix.strip() if variable_suffix else ""
+
+    if not cache:
+        return f"{prefix}\n\n{suffix}" if suffix else prefix
+
+    blocks: List[Dict[str, Any]] = [
+        {"text": prefix},
+        {"cachePoint": {"type": "default"}}
+    ]
+    if suffix:
+        blocks.append({"text": suffix})
+    return blocks
+
+
+def snapshot_usage(agent) -> Dict[str, int]:
+    """Copy an agent's accumulated token usage
+
+    Args:
+        agent: Strands Agent
+
+    Returns:
+        Usage counters at this point in time
+    """
+    usage = agent.event_loop_metrics.accumulated_usage
+    return {field: usage.get(field, 0) for field in USAGE_FIELDS}
+
+
+def usage_since(agent, before: Dict[str, int]) -> Dict[str, int]:
+    """Return cached vs. uncached input tokens used since a snapshot
+
+    Args:
+        agent: Strands Agent
+        before: Snapshot from snapshot_usage()
+
+    Returns:
+        Per-turn token usage (uncached_input, cache_read, cache_write, output)
+    """
+    after = snapshot_usage(agent)
+    delta = {field: after[field] - before.get(field, 0) for field in USAGE_FIELDS}
+    return {
+        "uncached_input_tokens": delta["inputTokens"],
+        "cache_read_input_tokens": delta["cacheReadInputTokens"],
+        "cache_write_input_tokens": delta["cacheWriteInputTokens"],
+        "output_tokens": delta["outputTokens"],
+    }
@@ -0,0 +1,115 @@
+"""Result Records - Strands Agents Workshop
+
+Memory-lean result records for tool and agent results.
+
+Records use __slots__ (no per-instance __dict__) but keep the mapping
+interface of the result dicts used throughout the workshop, so
+result["response"], result.get("success") and dict(result) keep working.
+Fields that are None are hidden, like keys absent from a dict; keys that
+are not fields go to an extras dict created on first use.
+"""
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class ResultRecord(MutableMapping):
+    """Base class: slots-based record with a dict-like view"""
+
+    __slots__ = ("_extra",)
+    _fields: Tuple[str, ...] = ()
+
+    def __init__(self, **values: Any):
+        self._extra: Optional[Dict[str, Any]] = None
+        for name in self._fields:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            self._extra = values
+
+    @classmethod
+    def from_mapping(cls, data: Mapping) -> "ResultRecord":
+        """Build a record from a mapping (records of this type are returned as-is)"""
+        return data if isinstance(data, cls) else cls(**data)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self._fields:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._fields and getattr(self, key) is not None:
+            setattr(self, key, None)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for name in self._fields:
+            if getattr(self, name) is not None:
+                yield name
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a plain dict (JSON serialization / tool return values)"""
+        return dict(self)
+
+
+class ToolResult(ResultRecord):
+    """Search / geocoding tool result"""
+
+    __slots__ = _fields = (
+        "success", "title", "summary", "url",
+        "latitude", "longitude", "display_name",
+        "error", "options",
+    )
+
+
+class AgentResponse(ResultRecord):
+    """Result of processing one user request
+
+    response references the agent's output text (no copies per layer).
+    Rare fields (plan, step_seconds, partial, worker, ...) live in extras.
+    """
+
+    __slots__ = _fields = (
+        "success", "agent", "user_input", "response", "error",
+        "needs_clarification", "user_id", "token_usage",
+    )
+
+
+def response_text(agent_result: Any) -> str:
+    """
+    Return the text of a Strands AgentResult, without copying when possible
+
+    A single text block is returned as the same string object held in the
+    agent's conversation history; str(agent_result) would build a copy.
+
+    Args:
+        agent_result: Strands AgentResult
+
+    Returns:
+        Response text
+    """
+    texts = [block["text"] for block in agent_result.message.get("content", []) if "text" in block]
+    if len(texts) == 1:
+        return texts[0]
+    return "\n".join(texts) if texts else str(agent_result)
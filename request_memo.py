@@ -0,0 +1,110 @@
+"""Request Memo - Strands Agents Workshop
+
+Request-scoped memo table for tool calls. Every sub-agent of one
+process_user_input call shares it, so a get_position for the same city
+from weather_agent and a search follow-up runs once, and the same search
+typed with different case or punctuation ("Quantum mechanics?" /
+"quantum mechanics") reuses the first result. Word order and every word
+are kept, so "flights from Paris to Rome" and "flights from Rome to
+Paris" stay apart. Concurrent duplicates wait for the call in flight.
+
+The table lives in a context variable and is discarded when the request
+ends, and it counts the duplicate calls it avoided. Unlike the TTL caches
+it also memoizes results that report a failure (success=False); a call
+that raises is not memoized, so a later duplicate runs it again.
+"""
+import asyncio
+import contextlib
+import contextvars
+import re
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from metrics import metrics
+
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_argument(value: Any) -> str:
+    """Normalize a tool argument: case, punctuation and whitespace (word order and every word kept)"""
+    return " ".join(_WORD_PATTERN.findall(str(value).lower()))
+
+
+class RequestMemo:
+    """Tool results of one request, keyed by (tool, normalized arguments)"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.calls = 0
+        self.avoided: Counter = Counter()
+
+    async def call(self, tool: str, argument: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the memoized result for a tool call, running it on first use
+
+        Args:
+            tool: Tool name
+            argument: Tool argument (normalized for the key)
+            factory: Runs the tool call
+
+        Returns:
+            Tool result (shared by duplicate calls - do not mutate)
+        """
+        key = (tool, normalize_argument(argument))
+        self.calls += 1
+        future = self._entries.get(key)
+        if future is not None:
+            self.avoided[tool] += 1
+            metrics.inc("workshop_tool_memo_hits_total", tool=tool)
+            return await asyncio.shield(future)
+
+        future = self._entries[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await factory()
+        except BaseException as e:
+            # Errors are not memoized: later duplicates run the call again
+            del self._entries[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody is waiting
+            raise
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Tool calls seen and duplicates avoided (by tool)"""
+        return {"calls": self.calls, "avoided": sum(self.avoided.values()), "avoided_by_tool": dict(self.avoided)}
+
+
+_current: contextvars.ContextVar[Optional[RequestMemo]] = contextvars.ContextVar("request_memo", default=None)
+
+
+@contextlib.contextmanager
+def request_memo_scope() -> Iterator[RequestMemo]:
+    """
+    Share one memo table across the enclosed request (nested scopes reuse it)
+
+    Yields:
+        Memo table of the request
+    """
+    memo = _current.get()
+    if memo is not None:
+        yield memo
+        return
+    memo = RequestMemo()
+    token = _current.set(memo)
+    try:
+        yield memo
+    finally:
+        _current.reset(token)
+
+
+async def memoized_call(tool: str, argument: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """Run a tool call through the running request's memo table (direct call outside a request)"""
+    memo = _current.get()
+    if memo is None:
+        return await factory()
+    return await memo.call(tool, argument, factory)
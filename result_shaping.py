@@ -0,0 +1,336 @@
+"""Result Shaping - Strands Agents Workshop
+
+Shapes tool and sub-agent results before they reach the model:
+per-tool field projection, a hard token budget per result and a
+compact serialization format.
+"""
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from strands.hooks import HookProvider, HookRegistry, AfterToolCallEvent
+
+
+# Rough token estimate used for budgets and savings (≈4 characters per token)
+CHARS_PER_TOKEN = 4
+
+# Default hard budget per tool result (tokens)
+DEFAULT_TOKEN_BUDGET = 800
+
+# Per-tool token budgets (tools not listed use DEFAULT_TOKEN_BUDGET)
+TOOL_TOKEN_BUDGETS = {
+    "wikipedia_search": 300,
+    "duckduckgo_search": 300,
+    "get_position": 60,
+    "http_request": 600,
+    "search_agent": 500,
+    "weather_agent": 500,
+    "conversation_agent": 200,
+}
+
+# Per-tool field projection
+# - Dotted paths select nested fields ("properties.forecast")
+# - "[]" maps over a list ("properties.periods[].name")
+TOOL_PROJECTIONS = {
+    "wikipedia_search": ["success", "title", "summary", "url", "error", "options"],
+    "duckduckgo_search": ["success", "title", "summary", "url", "error"],
+    "get_position": ["success", "latitude", "longitude", "display_name", "error"],
+    # National Weather Service API (points + forecast documents)
+    "http_request": [
+        "properties.forecast",
+        "properties.forecastHourly",
+        "properties.relativeLocation.properties.city",
+        "properties.relativeLocation.properties.state",
+        "properties.periods[].name",
+        "properties.periods[].temperature",
+        "properties.periods[].temperatureUnit",
+        "properties.periods[].probabilityOfPrecipitation.value",
+        "properties.periods[].windSpeed",
+        "properties.periods[].windDirection",
+        "properties.periods[].shortForecast",
+        "title",
+        "detail",
+    ],
+}
+
+# Maximum number of list items kept after projection
+MAX_LIST_ITEMS = 6
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate number of tokens
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _get_path(data: Any, parts: List[str]) -> Any:
+    """Resolve a split dotted path against nested dicts/lists"""
+    for index, part in enumerate(parts):
+        if part.endswith("[]"):
+            items = data.get(part[:-2]) if isinstance(data, dict) else None
+            if not isinstance(items, list):
+                return None
+            rest = parts[index + 1:]
+            return [_get_path(item, rest) if rest else item for item in items[:MAX_LIST_ITEMS]]
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data
+
+
+def _set_path(target: Dict[str, Any], parts: List[str], value: Any) -> None:
+    """Write a value into a nested dict, merging mapped lists element-wise"""
+    for index, part in enumerate(parts):
+        if part.endswith("[]"):
+            key = part[:-2]
+            rest = parts[index + 1:]
+            items = target.setdefault(key, [{} for _ in value])
+            for item, item_value in zip(items, value):
+                if item_value is not None:
+                    _set_path(item, rest, item_value)
+            return
+        if index == len(parts) - 1:
+            target[part] = value
+        else:
+            target = target.setdefault(part, {})
+
+
+def project_fields(data: Any, paths: List[str]) -> Any:
+    """Keep only the selected fields of a result
+
+    Args:
+        data: Parsed tool result
+        paths: Dotted field paths to keep
+
+    Returns:
+        Projected result (the original value if nothing matched)
+    """
+    if not isinstance(data, dict):
+        return data
+
+    projected: Dict[str, Any] = {}
+    for path in paths:
+        parts = path.split(".")
+        value = _get_path(data, parts)
+        if value is not None:
+            _set_path(projected, parts, value)
+
+    return projected or data
+
+
+def _flatten(data: Any) -> Any:
+    """Collapse single-key wrapper dicts ({"properties": {...}} → {...})"""
+    while isinstance(data, dict) and len(data) == 1:
+        (value,) = data.values()
+        if not isinstance(value, dict):
+            break
+        data = value
+    return data
+
+
+def _compact_value(value: Any) -> Any:
+    """Drop empty values, round floats and tabulate uniform lists of dicts"""
+    if isinstance(value, dict):
+        cleaned = {k: _compact_value(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        items = [_compact_value(v) for v in value]
+        if len(items) > 1 and all(isinstance(i, dict) for i in items):
+            columns: List[str] = []
+            for item in items:
+                columns.extend(k for k in item if k not in columns)
+            # Row-oriented table avoids repeating every key per item
+            return {"cols": columns, "rows": [[i.get(c) for c in columns] for i in items]}
+        return items
+    if isinstance(value, float):
+        return round(value, 4)
+    return value
+
+
+def compact_dumps(data: Any) -> str:
+    """Serialize a result in the compact format sent to the model
+
+    Args:
+        data: Result to serialize
+
+    Returns:
+        Compact JSON text (no whitespace, no empty fields, tabulated lists)
+    """
+    if isinstance(data, str):
+        return data.strip()
+    return json.dumps(_compact_value(data), ensure_ascii=False, separators=(",", ":"))
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """Cut a text down to a hard token budget
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+
+    Returns:
+        Original text, or a truncated text with an omission marker
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max(max_tokens, 0) * CHARS_PER_TOKEN
+    marker = f" …[+{estimate_tokens(text) - max_tokens} tokens truncated]"
+    if len(marker) > max_chars:
+        # Budget smaller than the marker: keep the marker short, never exceed the budget
+        marker = "…"[:max_chars]
+    return text[:max_chars - len(marker)] + marker
+
+
+def _parse_text(text: str) -> Tuple[Optional[str], Any]:
+    """Split an optional "Label: " prefix and parse a JSON payload if present"""
+    label = None
+    payload = text
+    head, sep, tail = text.partition(": ")
+    if sep and head and len(head) < 20 and head.replace(" ", "").isalpha():
+        label, payload = head, tail
+
+    try:
+        return label, json.loads(payload)
+    except (TypeError, ValueError):
+        return None, text
+
+
+class ShapingStats:
+    """Thread-safe per-tool counters of tokens saved by result shaping"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools: Dict[str, Dict[str, int]] = {}
+
+    def record(self, tool_name: str, tokens_before: int, tokens_after: int) -> None:
+        """Record one shaped result"""
+        with self._lock:
+            stats = self._tools.setdefault(
+                tool_name, {"calls": 0, "tokens_before": 0, "tokens_after": 0}
+            )
+            stats["calls"] += 1
+            stats["tokens_before"] += tokens_before
+            stats["tokens_after"] += tokens_after
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Return per-tool totals including tokens saved"""
+        with self._lock:
+            return {
+                name: {**stats, "tokens_saved": stats["tokens_before"] - stats["tokens_after"]}
+                for name, stats in self._tools.items()
+            }
+
+    def reset(self) -> None:
+        """Clear all counters"""
+        with self._lock:
+            self._tools.clear()
+
+
+# Process-wide statistics (shared by every ResultShapingHooks instance by default)
+shaping_stats = ShapingStats()
+
+
+def shape_result(tool_name: str, result: Any, max_tokens: int = None) -> str:
+    """Shape a raw tool result into compact, budgeted text
+
+    Args:
+        tool_name: Name of the tool that produced the result
+        result: Raw result (dict, list or text)
+        max_tokens: Token budget (defaults to the tool's configured budget)
+
+    Returns:
+        Shaped text for the model
+    """
+    budget = max_tokens
+    if budget is None:
+        budget = TOOL_TOKEN_BUDGETS.get(tool_name, DEFAULT_TOKEN_BUDGET)
+    paths = TOOL_PROJECTIONS.get(tool_name)
+    label = None
+
+    if isinstance(result, str):
+        label, result = _parse_text(result)
+
+    if paths and isinstance(result, dict):
+        result = _flatten(project_fields(result, paths))
+
+    text = compact_dumps(result)
+    if label:
+        text = f"{label}: {text}"
+    return truncate_to_budget(text, budget)
+
+
+# http_request text blocks that carry no information for the model
+_DROPPED_BLOCK_PREFIXES = {
+    "http_request": ("Headers:", "Metrics:"),
+}
+
+# Sent instead when every block of a result was dropped (content is never empty)
+_EMPTY_RESULT_TEXT = "(no content)"
+
+
+class ResultShapingHooks(HookProvider):
+    """
+    Hook provider applying result shaping between every tool and the model
+
+    Rewrites the text/json content blocks of each ToolResult in place and
+    records tokens saved per call. A result whose blocks were all dropped
+    keeps a short placeholder block.
+    """
+
+    def __init__(self, budgets: Dict[str, int] = None, stats: ShapingStats = None):
+        """
+        Initialize result shaping hooks
+
+        Args:
+            budgets: Per-tool token budget overrides
+            stats: Statistics collector (uses the process-wide one if None)
+        """
+        self.budgets = {**TOOL_TOKEN_BUDGETS, **(budgets or {})}
+        self.stats = stats or shaping_stats
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(AfterToolCallEvent, self.shape_tool_result)
+
+    def shape_tool_result(self, event: AfterToolCallEvent) -> None:
+        """Shape the result of a completed tool call"""
+        tool_name = event.tool_use["name"]
+        result = event.result
+        budget = self.budgets.get(tool_name, DEFAULT_TOKEN_BUDGET)
+        dropped = _DROPPED_BLOCK_PREFIXES.get(tool_name, ())
+
+        tokens_before = 0
+        tokens_after = 0
+        remaining = budget
+        shaped_content = []
+        for block in result.get("content", []):
+            if "json" in block:
+                raw = block["json"]
+                raw_text = json.dumps(raw, ensure_ascii=False)
+            elif "text" in block:
+                raw = raw_text = block["text"]
+            else:
+                shaped_content.append(block)
+                continue
+
+            tokens_before += estimate_tokens(raw_text)
+            if raw_text.startswith(dropped) or remaining <= 0:
+                continue
+
+            # The budget is shared by all blocks of one result
+            text = shape_result(tool_name, raw, remaining)
+            remaining -= estimate_tokens(text)
+            tokens_after += estimate_tokens(text)
+            shaped_content.append({"text": text})
+
+        if not shaped_content:
+            shaped_content.append({"text": _EMPTY_RESULT_TEXT})
+            tokens_after += estimate_tokens(_EMPTY_RESULT_TEXT)
+        self.stats.record(tool_name, tokens_before, tokens_after)
+        event.result = {**result, "content": shaped_content}
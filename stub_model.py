@@ -0,0 +1,397 @@
+"""Stub Model - Strands Agents Workshop
+
+Local stand-in for BedrockModel used by benchmarks and offline runs.
+No network access or AWS credentials are needed.
+
+Simulates Bedrock prompt-cache semantics: content up to the last
+cachePoint (tool specs, then system prompt blocks) is a cacheable prefix.
+The first request with a given prefix writes it to the cache; later
+requests within the TTL read it back. Usage is reported in the same
+shape as Bedrock (inputTokens excludes cached read/write tokens).
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Union
+
+from strands.event_loop.streaming import process_stream
+from strands.models import Model
+from strands.tools.structured_output import convert_pydantic_to_tool_spec
+from strands.types.exceptions import ModelThrottledException
+
+from planner import PLAN_END_MARKER
+from result_shaping import estimate_tokens
+
+
+# Responder return value: plain text, or {"tool": name, "input": {...}} for a tool call
+StubReply = Union[str, Dict[str, Any]]
+
+
+def default_responder(messages: List[Dict[str, Any]], tool_specs: Optional[List[Dict[str, Any]]]) -> StubReply:
+    """Echo the latest user text (or summarize the latest tool result)"""
+    last = messages[-1] if messages else {"content": []}
+    for block in last.get("content", []):
+        if "text" in block:
+            return f"Stub response to: {block['text'][:200]}"
+        if "toolResult" in block:
+            return "Stub summary of tool result."
+    return "Stub response."
+
+
+# Keyword routing used by routing_responder (first match wins)
+SUB_AGENT_ROUTES = [
+    ("weather", "weather_agent", "location"),
+    ("날씨", "weather_agent", "location"),
+    ("what is", "search_agent", "query"),
+    ("tell me about", "search_agent", "query"),
+    ("알려줘", "search_agent", "query"),
+]
+
+
+# Prefix the planning agent puts in front of the user request
+PLAN_REQUEST_PREFIX = "Create an execution plan for:"
+
+
+def _route(text: str) -> Dict[str, Any]:
+    """Pick the sub-agent call for a piece of user text"""
+    lowered = text.lower()
+    for keyword, tool_name, arg in SUB_AGENT_ROUTES:
+        if keyword in lowered:
+            return {"tool": tool_name, "input": {arg: text}}
+    return {"tool": "conversation_agent", "input": {"message": text}}
+
+
+def stub_plan(request: str) -> str:
+    """Build a JSON plan with one independent step per "and"-separated part (followed by the end marker)"""
+    parts = [p.strip(" ,.") for p in re.split(r"\band also\b|\band\b|\balso\b|그리고", request) if p.strip(" ,.")]
+    steps = []
+    for index, part in enumerate(parts or [request], 1):
+        route = _route(part)
+        steps.append({
+            "id": f"s{index}",
+            "agent": route["tool"],
+            "input": next(iter(route["input"].values())),
+            "depends_on": []
+        })
+    return json.dumps({"steps": steps}) + PLAN_END_MARKER
+
+
+def routing_responder(messages: List[Dict[str, Any]], tool_specs: Optional[List[Dict[str, Any]]]) -> StubReply:
+    """Route user text to a sub-agent tool (if offered), then answer from its result
+
+    Only tools named "*_agent" are called, so leaf tools that need the
+    network (get_position, http_request, ...) are never invoked.
+    """
+    tool_names = {spec["name"] for spec in tool_specs or []}
+    last = messages[-1] if messages else {"content": []}
+    text = next((b["text"] for b in last.get("content", []) if "text" in b), None)
+
+    if text is not None and text.startswith(PLAN_REQUEST_PREFIX):
+        return stub_plan(text[len(PLAN_REQUEST_PREFIX):].strip())
+
+    if text is not None and "conversation_agent" in tool_names:
+        route = _route(text)
+        if route["tool"] in tool_names:
+            return route
+        return {"tool": "conversation_agent", "input": {"message": text}}
+
+    return default_responder(messages, tool_specs)
+
+
+# Base URL of the weather API the leaf-tool responder sends http_request to
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.weather.gov")
+
+_LATITUDE = re.compile(r"latitude\W+(-?[\d.]+)")
+_LONGITUDE = re.compile(r"longitude\W+(-?[\d.]+)")
+
+
+def _last_tool_use(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """Name of the tool called in the latest assistant message"""
+    for message in reversed(messages):
+        if message.get("role") == "assistant":
+            return next((b["toolUse"]["name"] for b in message.get("content", []) if "toolUse" in b), None)
+    return None
+
+
+def leaf_tool_responder(messages: List[Dict[str, Any]], tool_specs: Optional[List[Dict[str, Any]]]) -> StubReply:
+    """Like routing_responder, but sub-agents also call their leaf tools
+
+    search_agent calls duckduckgo_search; weather_agent calls get_position,
+    then http_request for the forecast grid point (WEATHER_API_URL). Point
+    the tools at local servers (DUCKDUCKGO_API_URL, NOMINATIM_API_URL) to
+    exercise the HTTP path without the network.
+    """
+    tool_names = {spec["name"] for spec in tool_specs or []}
+    if "conversation_agent" in tool_names or not tool_names:
+        return routing_responder(messages, tool_specs)
+
+    last = messages[-1] if messages else {"content": []}
+    text = next((b["text"] for b in last.get("content", []) if "text" in b), None)
+    if text is not None:
+        if "get_position" in tool_names:
+            return {"tool": "get_position", "input": {"location": text}}
+        if "duckduckgo_search" in tool_names:
+            return {"tool": "duckduckgo_search", "input": {"query": text}}
+
+    result = next((b["toolResult"] for b in last.get("content", []) if "toolResult" in b), None)
+    if result is not None and result.get("status") == "success" and _last_tool_use(messages) == "get_position":
+        result_text = "".join(b.get("text", "") for b in result.get("content", []))
+        latitude, longitude = _LATITUDE.search(result_text), _LONGITUDE.search(result_text)
+        if latitude and longitude and "http_request" in tool_names:
+            return {"tool": "http_request", "input": {
+                "method": "GET", "url": f"{WEATHER_API_URL}/points/{latitude.group(1)},{longitude.group(1)}"
+            }}
+    return default_responder(messages, tool_specs)
+
+
+class StubModel(Model):
+    """
+    Local stub model with scripted replies, simulated latency and prompt cache
+
+    Thread-safe; one instance can be shared by many agents.
+    """
+
+    def __init__(
+        self,
+        responder: Callable[..., StubReply] = None,
+        latency: float = 0.0,
+        latency_sigma: float = 0.0,
+        cpu_cost: float = 0.0,
+        throttle_rate: float = 0.0,
+        model_id: str = "stub.cache-model-v1",
+        prompt_cache: bool = True,
+        cache_ttl: float = 300.0,
+        min_cache_tokens: int = 0,
+    ):
+        """
+        Initialize stub model
+
+        Args:
+            responder: Callable (messages, tool_specs) -> reply (echo responder if None)
+            latency: Simulated seconds per call (awaited, no CPU)
+            latency_sigma: Log-normal spread of the latency (0: fixed; latency is the median)
+            cpu_cost: Simulated seconds of CPU-bound work per call (holds the GIL)
+            throttle_rate: Fraction of calls rejected with ModelThrottledException
+            model_id: Reported model ID
+            prompt_cache: Whether the model honors cache points (tool specs are cached too)
+            cache_ttl: Seconds a cached prefix stays valid
+            min_cache_tokens: Minimum prefix size that is cached (Bedrock requires ~1024)
+        """
+        self.responder = responder or default_responder
+        self.config: Dict[str, Any] = {
+            "model_id": model_id, "latency": latency, "latency_sigma": latency_sigma,
+            "cpu_cost": cpu_cost, "throttle_rate": throttle_rate
+        }
+        self.model_id = model_id
+        self.prompt_cache = prompt_cache
+        self.cache_ttl = cache_ttl
+        self.min_cache_tokens = min_cache_tokens
+        self._calls = [0]  # shared with shallow copies (per-call parameter variants)
+        self._cache: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> int:
+        """Model calls made so far"""
+        return self._calls[0]
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    def _cacheable_prefix(
+        self, tool_specs: Optional[List[Dict[str, Any]]], system_blocks: List[Dict[str, Any]]
+    ) -> str:
+        """Return the prompt text up to (and including) the last cache point"""
+        if not self.prompt_cache:
+            return ""
+
+        segments = []
+        prefix = ""
+        if tool_specs:
+            segments.append(json.dumps(tool_specs, sort_keys=True))
+            prefix = "".join(segments)
+        for block in system_blocks:
+            if "cachePoint" in block:
+                prefix = "".join(segments)
+            elif "text" in block:
+                segments.append(block["text"])
+        return prefix
+
+    def _account_usage(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]],
+        system_blocks: List[Dict[str, Any]],
+    ) -> Dict[str, int]:
+        """Split input tokens into cached, cache-write and uncached parts"""
+        total_text = json.dumps(tool_specs or [], sort_keys=True)
+        total_text += "".join(b.get("text", "") for b in system_blocks)
+        total_text += json.dumps(messages, ensure_ascii=False, default=str)
+        total_tokens = estimate_tokens(total_text)
+
+        prefix = self._cacheable_prefix(tool_specs, system_blocks)
+        prefix_tokens = estimate_tokens(prefix) if prefix else 0
+        cache_read = cache_write = 0
+
+        if prefix_tokens and prefix_tokens >= self.min_cache_tokens:
+            key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+            now = time.monotonic()
+            with self._lock:
+                expires = self._cache.get(key)
+                if expires and expires > now:
+                    cache_read = prefix_tokens
+                else:
+                    cache_write = prefix_tokens
+                # Bedrock refreshes the TTL on every hit
+                self._cache[key] = now + self.cache_ttl
+
+        return {
+            "inputTokens": total_tokens - cache_read - cache_write,
+            "cacheReadInputTokens": cache_read,
+            "cacheWriteInputTokens": cache_write,
+        }
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        system_prompt_content: Optional[List[Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream a scripted reply as Bedrock-style events"""
+        with self._lock:
+            self._calls[0] += 1
+            call_id = self._calls[0]
+
+        # Throttled requests are rejected right away, like Bedrock's ThrottlingException
+        if random.random() < self.config.get("throttle_rate", 0.0):
+            raise ModelThrottledException("Stub model throttled the request")
+
+        started = time.perf_counter()
+        latency = self.config.get("latency", 0.0)
+        sigma = self.config.get("latency_sigma", 0.0)
+        if latency and sigma:
+            latency *= random.lognormvariate(0.0, sigma)
+        if latency:
+            await asyncio.sleep(latency)
+        cpu_cost = self.config.get("cpu_cost", 0.0)
+        if cpu_cost:
+            # Stands in for payload parsing / response formatting
+            deadline = time.thread_time() + cpu_cost
+            while time.thread_time() < deadline:
+                pass
+
+        system_blocks = system_prompt_content or ([{"text": system_prompt}] if system_prompt else [])
+        usage = self._account_usage(messages, tool_specs, system_blocks)
+        reply = self.responder(messages, tool_specs)
+
+        yield {"messageStart": {"role": "assistant"}}
+        if isinstance(reply, dict):
+            tool_use_id = f"stub-{call_id}"
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": tool_use_id, "name": reply["tool"]}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(reply.get("input", {}))}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            output_tokens = estimate_tokens(json.dumps(reply))
+        else:
+            # stop_sequences and max_tokens are honored for text replies
+            # (cut before the first stop sequence / at the estimated token budget)
+            max_tokens = self.config.get("max_tokens")
+            stop_reason = "end_turn"
+            for stop in self.config.get("stop_sequences") or []:
+                if stop in reply:
+                    reply, stop_reason = reply[:reply.index(stop)], "stop_sequence"
+            output_tokens = estimate_tokens(reply)
+            if max_tokens and output_tokens > max_tokens:
+                reply = reply[:len(reply) * max_tokens // output_tokens]
+                output_tokens, stop_reason = max_tokens, "max_tokens"
+            yield {"contentBlockDelta": {"delta": {"text": reply}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": stop_reason}}
+
+        usage["outputTokens"] = output_tokens
+        usage["totalTokens"] = (
+            usage["inputTokens"] + usage["cacheReadInputTokens"] + usage["cacheWriteInputTokens"] + output_tokens
+        )
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        yield {"metadata": {"usage": usage, "metrics": {"latencyMs": latency_ms}}}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Structured output like Bedrock: the output model is offered as the only tool
+
+        A responder call to that tool, or a JSON object text reply, is
+        validated into output_model. Any other text fills the required
+        fields with placeholders (strings get the reply text).
+        """
+        tool_spec = convert_pydantic_to_tool_spec(output_model)
+        event: Dict[str, Any] = {}
+        async for event in process_stream(self.stream(prompt, [tool_spec], system_prompt, **kwargs)):
+            yield event
+
+        _, message, _, _ = event["stop"]
+        data = next(
+            (b["toolUse"]["input"] for b in message["content"]
+             if "toolUse" in b and b["toolUse"]["name"] == tool_spec["name"]),
+            None
+        )
+        if data is None:
+            text = "".join(b.get("text", "") for b in message["content"])
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                data = _placeholder_fields(tool_spec["inputSchema"]["json"], text)
+        yield {"output": output_model(**data)}
+
+
+_PLACEHOLDERS = {"number": 0, "integer": 0, "boolean": False, "array": [], "object": {}}
+
+
+def _placeholder_fields(schema: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """Values for the required fields of a JSON schema (strings get text)"""
+    data = {}
+    for name in schema.get("required", []):
+        kind = schema.get("properties", {}).get(name, {}).get("type", "string")
+        kind = next((k for k in kind if k != "null"), "string") if isinstance(kind, list) else kind
+        data[name] = text if kind == "string" else copy.deepcopy(_PLACEHOLDERS.get(kind))
+    return data
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+_shared_stub_model: Optional[StubModel] = None
+_shared_lock = threading.Lock()
+
+
+def get_stub_model() -> StubModel:
+    """Return the process-wide stub model used by MODEL_PROVIDER=stub
+
+    Latency comes from STUB_MODEL_LATENCY (median seconds, with a
+    log-normal spread of STUB_MODEL_LATENCY_SIGMA) and CPU cost from
+    STUB_MODEL_CPU_COST (seconds, default 0). STUB_MODEL_LEAF_TOOLS=1 makes
+    sub-agents call their leaf tools (leaf_tool_responder).
+    """
+    global _shared_stub_model
+    with _shared_lock:
+        if _shared_stub_model is None:
+            _shared_stub_model = StubModel(
+                responder=leaf_tool_responder if _env_flag("STUB_MODEL_LEAF_TOOLS") else routing_responder,
+                latency=float(os.getenv("STUB_MODEL_LATENCY", "0")),
+                latency_sigma=float(os.getenv("STUB_MODEL_LATENCY_SIGMA", "0")),
+                cpu_cost=float(os.getenv("STUB_MODEL_CPU_COST", "0"))
+            )
+        return _shared_stub_model
@@ -76,6 +76,13 @@ def planning_agent(user_request: str) -> str:
     Returns:
         Planning 
     """
+    # TODO: Implement in Lab 3
+    # Hint:
+    # 1. Create planning specialist agent (JSON-only plan format)
+    # 2. Plan = DAG of sub-agent calls: {"steps": [{"id", "agent", "input", "depends_on"}]}
+    # 3. Validate with planner.parse_plan()
+    # 4. Return plan as JSON string
+    pass
 
 # Test code
 if __name__ == "__main__":
@@ -3,11 +3,246 @@ import httpx
 import wikipedia
 import asyncio
 import json
-from typing import Dict, Any
+import os
+import threading
+import weakref
+from typing import Dict, Any, Optional
 from strands import tool
+from cache import geocode_cache, search_cache
+from deadline import timeout_for
+from records import ToolResult
+from knowledge_index import get_knowledge_index
+from request_memo import memoized_call
+
+# API 엔드포인트 (부하 테스트에서는 로컬 스텁 서버로 교체)
+DUCKDUCKGO_API_URL = os.getenv("DUCKDUCKGO_API_URL", "https://api.duckduckgo.com/")
+NOMINATIM_API_URL = os.getenv("NOMINATIM_API_URL", "https://nominatim.openstreetmap.org/search")
  
-@tool
-def wikipedia_search(query: str) -> Dict[str, Any]:
+# wikipedia 라이브러리는 언어 설정이 전역 상태이므로 조회를 직렬화
+_wikipedia_lock = threading.Lock()
+
+# 이벤트 루프별 공유 HTTP 클라이언트 (연결 풀 재사용)
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient of the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=10.0)
+        _http_clients[loop] = client
+    return client
+
+
+def _run_sync(coro) -> Any:
+    """Run a coroutine on a private event loop (sync shims only)"""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            # 임시 루프의 클라이언트는 루프와 함께 정리
+            client = _http_clients.pop(asyncio.get_running_loop(), None)
+            if client is not None:
+                await client.aclose()
+
+    return asyncio.run(runner())
+
+
+def _local_lookup(query: str) -> ToolResult:
+    """Local knowledge index lookup (None on miss or without an index)"""
+    index = get_knowledge_index()
+    return index.lookup(query) if index is not None else None
+
+
+def _cached_wikipedia(query: str) -> Optional[ToolResult]:
+    """Local knowledge index, then cache (None when both miss)"""
+    local = _local_lookup(query)
+    if local is not None:
+        return local
+    return search_cache.get(f"wikipedia:{query}")
+
+
+def _fetch_wikipedia(query: str) -> ToolResult:
+    """Blocking Wikipedia request (successful results are cached)"""
+    result = _request_wikipedia(query)
+    if result.get("success"):
+        search_cache.set(f"wikipedia:{query}", result)
+    return result
+
+
+def _request_wikipedia(query: str) -> ToolResult:
+    """Blocking Wikipedia page request (uncached)"""
+    try:
+        with _wikipedia_lock:
+            # 한국어 우선, 실패시 영어로 fallback
+            try:
+                wikipedia.set_lang("ko")
+                page = wikipedia.page(query)
+            except (wikipedia.exceptions.DisambiguationError, wikipedia.exceptions.PageError):
+                wikipedia.set_lang("en")
+                page = wikipedia.page(query)
+            
+            # 요약 텍스트 제한 (500자)
+            summary = page.summary
+            title, url = page.title, page.url
+        if len(summary) > 500:
+            summary = summary[:500] + "..."
+        
+        return ToolResult(success=True, title=title, summary=summary, url=url)
+        
+    except wikipedia.exceptions.DisambiguationError as e:
+        return ToolResult(
+            success=False,
+            error="Multiple results found",
+            options=e.options[:5]  # 상위 5개만
+        )
+         
+    except Exception as e:
+        return ToolResult(success=False, error=str(e))
+
+
+async def _fetch_search_results(query: str) -> ToolResult:
+    """Query the DuckDuckGo Instant Answer API (successful results are cached)"""
+    local = _local_lookup(query)
+    if local is not None:
+        return local
+    
+    cache_key = f"duckduckgo:{query}"
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    result = await _request_search_results(query)
+    if result.get("success"):
+        search_cache.set(cache_key, result)
+    return result
+
+
+async def _request_search_results(query: str) -> ToolResult:
+    """DuckDuckGo Instant Answer API request"""
+    response = await _get_http_client().get(
+        DUCKDUCKGO_API_URL,
+        params={
+            "q": query,
+            "format": "json",
+            "no_html": "1",
+            "skip_disambig": "1"
+        },
+        timeout=timeout_for(10.0)  # 요청 데드라인까지 남은 시간으로 단축
+    )
+    
+    if response.status_code == 200:
+        data = response.json()
+        
+        # Abstract 정보가 있는 경우
+        if data.get("Abstract"):
+            return ToolResult(
+                success=True,
+                title=data.get("Heading", query),
+                summary=data["Abstract"],
+                url=data.get("AbstractURL", "")
+            )
+        
+        # Definition 정보가 있는 경우
+        elif data.get("Definition"):
+            return ToolResult(
+                success=True,
+                title=query,
+                summary=data["Definition"],
+                url=data.get("DefinitionURL", "")
+            )
+        
+        # 관련 주제가 있는 경우
+        elif data.get("RelatedTopics"):
+            topics = data["RelatedTopics"][:3]
+            summaries = []
+            for topic in topics:
+                if isinstance(topic, dict) and topic.get("Text"):
+                    summaries.append(topic["Text"])
+            
+            if summaries:
+                return ToolResult(success=True, title=query, summary=" | ".join(summaries))
+    
+    return ToolResult(success=False, error="No results found")
+
+
+async def _fetch_coordinates(location: str) -> ToolResult:
+    """Geocode a location (successful results are cached)"""
+    cached = geocode_cache.get(location)
+    if cached is not None:
+        return cached
+    
+    result = await _request_coordinates(location)
+    if result.get("success"):
+        geocode_cache.set(location, result)
+    return result
+
+
+async def _request_coordinates(location: str) -> ToolResult:
+    """OpenStreetMap Nominatim API request"""
+    response = await _get_http_client().get(
+        NOMINATIM_API_URL,
+        params={
+            "q": location,
+            "format": "json",
+            "limit": 1
+        },
+        headers={
+            "User-Agent": "StrandsAgents/1.0",
+            "Accept": "application/json",
+            "Accept-Charset": "utf-8"
+        },
+        timeout=timeout_for(10.0)  # 요청 데드라인까지 남은 시간으로 단축
+    )
+    
+    if response.status_code == 200: 
+        data = response.json()  
+        if data:
+            result = data[0]
+            return ToolResult(
+                success=True,
+                latitude=float(result["lat"]),
+                longitude=float(result["lon"]),
+                display_name=result.get("display_name", location)
+            )
+    
+    return ToolResult(success=False, error="Location not found")
+
+
+async def refresh_cache_entry(namespace: str, key: str) -> bool:
+    """Re-fetch a cached tool result, bypassing the cache (refresh-ahead)
+
+    Args:
+        namespace: Cache namespace ("geocode" or "search")
+        key: Normalized cache key
+
+    Returns:
+        True if a fresh result was stored
+    """
+    if namespace == "geocode":
+        cache, result = geocode_cache, await _request_coordinates(key)
+    elif namespace == "search" and key.startswith("wikipedia:"):
+        cache, result = search_cache, await asyncio.to_thread(_request_wikipedia, key[len("wikipedia:"):])
+    elif namespace == "search" and key.startswith("duckduckgo:"):
+        cache, result = search_cache, await _request_search_results(key[len("duckduckgo:"):])
+    else:
+        return False
+
+    # 실패한 갱신은 기존 항목을 유지 (만료 시 요청 경로에서 다시 조회)
+    if not result.get("success"):
+        return False
+    cache.set(key, result)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Async tools (same tool names as the sync tools - use one set per agent)
+# 캐시/내부 계층은 ToolResult 레코드, Strands 경계에서만 dict로 변환 (JSON 직렬화)
+# ---------------------------------------------------------------------------
+
+@tool(name="wikipedia_search")
+async def wikipedia_search_async(query: str) -> Dict[str, Any]:
     """Search Wikipedia for information
     
     Args:
@@ -16,42 +251,22 @@ def wikipedia_search(query: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing search results
     """
+    async def lookup() -> ToolResult:
+        # 로컬 지식 인덱스 → 캐시 순으로 확인 (둘 다 미스일 때만 네트워크, 조회는 한 번만 집계)
+        cached = _cached_wikipedia(query)
+        if cached is not None:
+            return cached
+        # wikipedia 라이브러리는 동기 전용 → 워커 스레드에서 실행
+        return await asyncio.to_thread(_fetch_wikipedia, query)
+    
     try:
-        # 한국어 우선, 실패시 영어로 fallback
-        try:
-            wikipedia.set_lang("ko")
-            page = wikipedia.page(query)
-        except (wikipedia.exceptions.DisambiguationError, wikipedia.exceptions.PageError):
-            wikipedia.set_lang("en")
-            page = wikipedia.page(query)
-        
-        # 요약 텍스트 제한 (500자)
-        summary = page.summary
-        if len(summary) > 500:
-            summary = summary[:500] + "..."
-        
-        return {
-            "success": True,
-            "title": page.title,
-            "summary": summary,
-            "url": page.url
-        }
-        
-    except wikipedia.exceptions.DisambiguationError as e:
-        return {
-            "success": False,
-            "error": "Multiple results found",
-            "options": e.options[:5]  # 상위 5개만
-        }
-         
+        # 같은 요청 안의 중복 호출(표현만 다른 질의 포함)은 첫 결과 재사용
+        return (await memoized_call("wikipedia_search", query, lookup)).to_dict()
     except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
+        return {"success": False, "error": str(e)}
 
-@tool
-def duckduckgo_search(query: str) -> Dict[str, Any]:
+@tool(name="duckduckgo_search")
+async def duckduckgo_search_async(query: str) -> Dict[str, Any]:
     """Search DuckDuckGo for information
     
     Args:
@@ -61,64 +276,12 @@ def duckduckgo_search(query: str) -> Dict[str, Any]:
         Dictionary containing search results
     """
     try:
-        async def fetch_search_results():
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.duckduckgo.com/",
-                    params={
-                        "q": query,
-                        "format": "json",
-                        "no_html": "1",
-                        "skip_disambig": "1"
-                    },
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Abstract 정보가 있는 경우
-                    if data.get("Abstract"):
-                        return {
-                            "success": True,
-                            "title": data.get("Heading", query),
-                            "summary": data["Abstract"],
-                            "url": data.get("AbstractURL", "")
-                        }
-                    
-                    # Definition 정보가 있는 경우
-                    elif data.get("Definition"):
-                        return {
-                            "success": True,
-                            "title": query,
-                            "summary": data["Definition"],
-                            "url": data.get("DefinitionURL", "")
-                        }
-                    
-                    # 관련 주제가 있는 경우
-                    elif data.get("RelatedTopics"):
-                        topics = data["RelatedTopics"][:3]
-                        summaries = []
-                        for topic in topics:
-                            if isinstance(topic, dict) and topic.get("Text"):
-                                summaries.append(topic["Text"])
-                        
-                        if summaries:
-                            return {
-                                "success": True,
-                                "title": query,
-                                "summary": " | ".join(summaries)
-                            }
-                
-                return {"success": False, "error": "No results found"}
-        
-        return asyncio.run(fetch_search_results())
-        
+        return (await memoized_call("duckduckgo_search", query, lambda: _fetch_search_results(query))).to_dict()
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@tool
-def get_position(location: str) -> Dict[str, Any]:
+@tool(name="get_position")
+async def get_position_async(location: str) -> Dict[str, Any]:
     """Get latitude and longitude coordinates for a given location name
     
     Args:
@@ -128,42 +291,51 @@ def get_position(location: str) -> Dict[str, Any]:
         Dictionary containing coordinates and location information
     """
     try:
-        # Using OpenStreetMap Nominatim API for geocoding
-        async def fetch_coordinates():
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://nominatim.openstreetmap.org/search",
-                    params={
-                        "q": location,
-                        "format": "json",
-                        "limit": 1
-                    },
-                    headers={
-                        "User-Agent": "StrandsAgents/1.0",
-                        "Accept": "application/json",
-                        "Accept-Charset": "utf-8"
-                    },
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200: 
-                    data = response.json()  
-                    if data:
-                        result = data[0]
-                        return {
-                            "success": True,
-                            "latitude": float(result["lat"]),
-                            "longitude": float(result["lon"]),
-                            "display_name": result.get("display_name", location)
-                        }
-                
-                return {"success": False, "error": "Location not found"}
-        
-        # 비동기 함수 실행
-        return asyncio.run(fetch_coordinates())
-        
+        # Using OpenStreetMap Nominatim API for geocoding (once per location per request)
+        return (await memoized_call("get_position", location, lambda: _fetch_coordinates(location))).to_dict()
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+
+# ---------------------------------------------------------------------------
+# Sync tools (thin shims over the async implementations)
+# ---------------------------------------------------------------------------
+
+@tool
+def wikipedia_search(query: str) -> Dict[str, Any]:
+    """Search Wikipedia for information
+    
+    Args:
+        query: Search query
+        
+    Returns:
+        Dictionary containing search results
+    """
+    return _run_sync(wikipedia_search_async(query))
+
+@tool
+def duckduckgo_search(query: str) -> Dict[str, Any]:
+    """Search DuckDuckGo for information
+    
+    Args:
+        query: Search query
+        
+    Returns:
+        Dictionary containing search results
+    """
+    return _run_sync(duckduckgo_search_async(query))
+
+@tool
+def get_position(location: str) -> Dict[str, Any]:
+    """Get latitude and longitude coordinates for a given location name
+    
+    Args:
+        location: The name of the location to get coordinates for
+        
+    Returns:
+        Dictionary containing coordinates and location information
+    """
+    return _run_sync(get_position_async(location))
   
 
 # 테스트 코드 (파일 하단에 추가)
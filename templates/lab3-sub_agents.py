@@ -1,8 +1,19 @@
 """Sub Agents - Strands Agents Workshop"""
+import asyncio
+import json
 from strands import Agent, tool
 from strands_tools import http_request
-from tools import get_position, wikipedia_search, duckduckgo_search
-from model_config import get_configured_model
+from tools import get_position_async, wikipedia_search_async, duckduckgo_search_async
+from model_config import get_configured_model, prompt_cache_enabled
+from prompt_layout import build_system_prompt
+from result_shaping import ResultShapingHooks
+from planner import parse_plan, MAX_PLAN_STEPS, PLAN_END_MARKER
+from coalescing import single_flight
+from metrics import MetricsHooks
+from deadline import DeadlineExceeded, DeadlineHooks, run_with_deadline
+from records import response_text
+from journal import JournalHooks, journaled
+from progress import ProgressCallbackHandler, ProgressHooks
 from typing import Dict, Any
 SEARCH_AGENT_PROMPT = """
 You are an intelligent search specialist agent.
@@ -30,6 +41,46 @@ Analyze user search requests and select the most appropriate search tool to use.
 After searching, analyze the results to summarize them in an easy-to-understand way for users, and specify which search tool was used.
 """
 
+def _create_search_agent() -> Agent:
+    """Create the search specialist agent (async tools)"""
+    model = get_configured_model(profile="search_agent")
+    return Agent(
+        model=model,
+        system_prompt=build_system_prompt(SEARCH_AGENT_PROMPT, cache=prompt_cache_enabled(model)),
+        tools=[wikipedia_search_async, duckduckgo_search_async],
+        hooks=[
+            ResultShapingHooks(), MetricsHooks("search_agent"), DeadlineHooks(),
+            JournalHooks("search_agent"), ProgressHooks("search_agent")
+        ],
+        callback_handler=ProgressCallbackHandler("search_agent")
+    )
+
+@journaled("search_agent")
+@single_flight("search_agent")
+async def run_search_agent(query: str) -> str:
+    """Run the search agent (raises on failure - used by plan execution)
+
+    Concurrent identical queries (across users) share one execution;
+    completed results are journaled per request (reused on resume).
+    """
+    agent = _create_search_agent()
+    response = await run_with_deadline(agent.invoke_async(f"다음 검색 요청을 처리해주세요: {query}"))
+    return response_text(response)
+
+@tool(name="search_agent")
+async def search_agent_async(query: str) -> str:
+    """
+    Optimized information search agent through intelligent search tool selection
+
+    Args:
+        query: Content to search for
+
+    Returns:
+        Optimized answer through selected search tool
+    """
+    # 실패는 예외로 전달 (도구 오류 결과 → 마감 시간 부분 결과에서 제외)
+    return await run_search_agent(query)
+
 @tool
 def search_agent(query: str) -> str:
     """
@@ -42,18 +93,12 @@ def search_agent(query: str) -> str:
         Optimized answer through selected search tool
     """
     try:
-        model = get_configured_model()
-        agent = Agent(
-            model=model,
-            system_prompt=SEARCH_AGENT_PROMPT,
-            tools=[wikipedia_search, duckduckgo_search]
-        )
-        
-        response = agent(f"다음 검색 요청을 처리해주세요: {query}")
-        return str(response)
-        
+        return asyncio.run(search_agent_async(query))
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return f"검색 에이전트 오류: {str(e)}"
+
 # Weather Agent - 위치 기반 날씨 정보
 WEATHER_AGENT_PROMPT = """You are a weather assistant with HTTP capabilities. You can:
 
@@ -75,6 +120,45 @@ When displaying responses:
 Always explain the weather conditions clearly and provide context for the forecast.
 """
 
+def _create_weather_agent() -> Agent:
+    """Create the weather specialist agent"""
+    model = get_configured_model(profile="weather_agent")
+    return Agent(
+        model=model,
+        system_prompt=build_system_prompt(WEATHER_AGENT_PROMPT, cache=prompt_cache_enabled(model)),
+        tools=[get_position_async, http_request],  # 가이드 문서와 동일 (http_request는 동기 도구)
+        hooks=[  # NWS JSON 등 도구 결과 압축
+            ResultShapingHooks(), MetricsHooks("weather_agent"), DeadlineHooks(),
+            JournalHooks("weather_agent"), ProgressHooks("weather_agent")
+        ],
+        callback_handler=ProgressCallbackHandler("weather_agent")
+    )
+
+@journaled("weather_agent")
+@single_flight("weather_agent")
+async def run_weather_agent(location: str) -> str:
+    """Run the weather agent (raises on failure - used by plan execution)
+
+    Concurrent requests for the same location (across users) share one execution.
+    """
+    agent = _create_weather_agent()
+    response = await run_with_deadline(agent.invoke_async(f"What's the weather like in {location}?"))
+    return response_text(response)
+
+@tool(name="weather_agent")
+async def weather_agent_async(location: str) -> str:
+    """
+    Weather information agent using National Weather Service API
+
+    Args:
+        location: Location to get weather for
+
+    Returns:
+        Formatted weather information
+    """
+    # 실패는 예외로 전달 (도구 오류 결과 → 마감 시간 부분 결과에서 제외)
+    return await run_weather_agent(location)
+
 @tool 
 def weather_agent(location: str) -> str:
     """
@@ -87,16 +171,9 @@ def weather_agent(location: str) -> str:
         Formatted weather information
     """
     try:
-        model = get_configured_model()
-        agent = Agent(
-            model=model,
-            system_prompt=WEATHER_AGENT_PROMPT,
-            tools=[get_position, http_request]  # 가이드 문서와 동일
-        )
-
-        response = agent(f"What's the weather like in {location}?")
-        return str(response)
-
+        return asyncio.run(weather_agent_async(location))
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return f"Weather agent error: {str(e)}"
 
@@ -122,6 +199,37 @@ Guidelines:
 - Maintain natural and human-like conversation
 """
 
+def _create_conversation_agent() -> Agent:
+    """Create the conversation specialist agent"""
+    model = get_configured_model(profile="conversation_agent")
+    return Agent(
+        model=model,
+        system_prompt=build_system_prompt(CONVERSATION_AGENT_PROMPT, cache=prompt_cache_enabled(model)),
+        tools=[],
+        hooks=[MetricsHooks("conversation_agent"), DeadlineHooks()],
+        callback_handler=ProgressCallbackHandler("conversation_agent")
+    )
+
+@journaled("conversation_agent")
+async def run_conversation_agent(message: str) -> str:
+    """Run the conversation agent (raises on failure)"""
+    agent = _create_conversation_agent()
+    response = await run_with_deadline(agent.invoke_async(message))
+    return response_text(response)
+
+@tool(name="conversation_agent")
+async def conversation_agent_async(message: str) -> str:
+    """
+    General conversation handling agent
+
+    Args:
+        message: User message
+
+    Returns:
+        Conversation response
+    """ 
+    return await run_conversation_agent(message)
+
 @tool
 def conversation_agent(message: str) -> str:
     """
@@ -133,15 +241,82 @@ def conversation_agent(message: str) -> str:
     Returns:
         Conversation response
     """ 
-    model = get_configured_model()
-    agent = Agent(
+    return asyncio.run(conversation_agent_async(message))
+
+# Planning Agent - 실행 계획 (DAG) 생성
+PLANNABLE_AGENTS = ["search_agent", "weather_agent", "conversation_agent"]
+
+PLANNING_AGENT_PROMPT = f"""
+You are a task planning specialist agent.
+Break the user request into the smallest set of sub-agent calls and return them as a JSON execution plan.
+
+Available sub-agents:
+- search_agent: information search (input: search query)
+- weather_agent: weather for a US location (input: location name)
+- conversation_agent: greetings, small talk, combining texts (input: message)
+
+Plan rules:
+- Respond with JSON only: {{"steps": [{{"id": "s1", "agent": "...", "input": "...", "depends_on": []}}]}}
+- Write {PLAN_END_MARKER} right after the closing brace of the JSON
+- Steps without dependencies run in parallel - only add depends_on when a step needs another step's output
+- Use "{{step_id}}" inside an input to pass that step's output (e.g. "Summarize: {{s1}}")
+- When the request has several parts, end with one conversation_agent step that answers the user from all of them
+  (e.g. "Answer <the user request> using: {{s1}} {{s2}}"); the final step's output is the reply shown to the user
+- Do not add any other summary or formatting steps
+- Use at most {MAX_PLAN_STEPS} steps
+"""
+
+def _create_planning_agent() -> Agent:
+    """Create the planning specialist agent"""
+    model = get_configured_model(profile="planning_agent")
+    return Agent(
         model=model,
-        system_prompt=CONVERSATION_AGENT_PROMPT,
-        tools=[]
+        system_prompt=build_system_prompt(PLANNING_AGENT_PROMPT, cache=prompt_cache_enabled(model)),
+        tools=[],
+        hooks=[MetricsHooks("planning_agent"), DeadlineHooks()],
+        callback_handler=ProgressCallbackHandler("planning_agent")
     )
+
+@journaled("planning_agent")
+async def run_planning_agent(user_request: str) -> str:
+    """Run the planning agent and return its raw plan text (raises on failure)"""
+    agent = _create_planning_agent()
+    response = await run_with_deadline(agent.invoke_async(f"Create an execution plan for: {user_request}"))
+    return response_text(response)
+
+@tool(name="planning_agent")
+async def planning_agent_async(user_request: str) -> str:
+    """
+    Task Planning Specialist Agent
     
-    response = agent(message)
-    return str(response)
+    Args:
+        user_request: query
+        
+    Returns:
+        Execution plan as JSON (DAG of sub-agent calls)
+    """
+    try:
+        plan = parse_plan(await run_planning_agent(user_request), PLANNABLE_AGENTS)
+        return json.dumps(plan, ensure_ascii=False)
+
+    except DeadlineExceeded:
+        raise
+
+    except Exception as e:
+        return f"Planning agent error: {str(e)}"
+
+@tool
+def planning_agent(user_request: str) -> str:
+    """
+    Task Planning Specialist Agent
+    
+    Args:
+        user_request: query
+        
+    Returns:
+        Execution plan as JSON (DAG of sub-agent calls)
+    """
+    return asyncio.run(planning_agent_async(user_request))
 
  
 # 테스트 코드 (파일 하단에 추가)
@@ -167,5 +342,11 @@ if __name__ == "__main__":
     conversation_result = conversation_agent("hello. good morning?!")
     print(conversation_result)
     
+    # Planning Agent 테스트
+    print("\n📋 Planning Agent test:")
+    print("-" * 30)
+    planning_result = planning_agent("Tell me about Paris and also tell me the weather")
+    print(planning_result)
+    
     print("\n" + "=" * 60)
     print("✅ complete!")
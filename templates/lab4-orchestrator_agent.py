@@ -1,9 +1,51 @@
 """Orchestrator Agent - Strands Agents Workshop"""
+import asyncio
+from collections import deque
 from strands import Agent
-from sub_agents import search_agent, weather_agent, conversation_agent
-from model_config import get_configured_model
-from typing import Dict, Any
+from sub_agents import search_agent_async, weather_agent_async, conversation_agent_async, planning_agent_async
+from sub_agents import run_search_agent, run_weather_agent
+from model_config import get_configured_model, prompt_cache_enabled, with_profile
+from prompt_layout import build_system_prompt, snapshot_usage, usage_since
+from result_shaping import ResultShapingHooks
+from clarity import assess_clarity
+from planner import PlanError, execute_plan, looks_multi_step, parse_plan
+from plan_cache import plan_cache
+from records import AgentResponse, response_text
+from metrics import MetricsHooks, metrics
+from deadline import DeadlineExceeded, DeadlineHooks, deadline_scope, partial_response, run_with_deadline
+from journal import IncompleteRequest, incomplete_requests, journal, record_cancelled, record_end, request_scope
+from progress import ProgressCallbackHandler, ProgressHooks
+from request_memo import request_memo_scope
+from typing import Dict, Any, List, Optional
 import re
+import time
+import uuid
+
+
+# Shared by every user - keep per-user values out of this prefix
+ORCHESTRATOR_PROMPT = """You are an intelligent orchestrator that analyzes user requests and delegates tasks to appropriate sub-agents.
+
+Available sub-agents:
+- search_agent: Use for information search requests (Wikipedia + DuckDuckGo)
+- weather_agent: Use for weather information requests (US regions only)  
+- conversation_agent: Use for general conversation, greetings, simple questions
+
+Instructions:
+1. Analyze the user request carefully
+2. If the request is very vague (single words like "coffee", "food"), ask for clarification using conversation_agent
+3. For clear requests, select and use the most appropriate sub-agent(s)
+4. You can use multiple sub-agents if needed for complex requests
+5. Always provide a helpful and complete response to the user
+
+Remember: You have the intelligence to determine what the user needs - trust your judgment!"""
+
+
+# Sub-agents a plan step may call (async runners that raise on failure)
+PLAN_RUNNERS = {
+    "search_agent": run_search_agent,
+    "weather_agent": run_weather_agent,
+    "conversation_agent": conversation_agent_async,
+}
 
 
 class OrchestratorAgent:
@@ -25,38 +67,97 @@ class OrchestratorAgent:
         self.model = model or get_configured_model()
         self.user_id = user_id
         self.orchestrator = self._create_orchestrator_agent() 
+        # Session context for local clarity assessment
+        self.recent_inputs = deque(maxlen=3)
+        self.pending_clarification = None
         
     def _create_orchestrator_agent(self) -> Agent:
         """Create the main orchestrator agent with sub-agents as tools"""
-        system_prompt = f"""You are an intelligent orchestrator that analyzes user requests and delegates tasks to appropriate sub-agents.
-User ID: {self.user_id}
-
-Available sub-agents:
-- search_agent: Use for information search requests (Wikipedia + DuckDuckGo)
-- weather_agent: Use for weather information requests (US regions only)  
-- conversation_agent: Use for general conversation, greetings, simple questions
-
-Instructions:
-1. Analyze the user request carefully
-2. If the request is very vague (single words like "coffee", "food"), ask for clarification using conversation_agent
-3. For clear requests, select and use the most appropriate sub-agent(s)
-4. You can use multiple sub-agents if needed for complex requests
-5. Always provide a helpful and complete response to the user
-
-Remember: You have the intelligence to determine what the user needs - trust your judgment!"""
+        # Stable prefix first, per-user context last (prompt cache friendly)
+        system_prompt = build_system_prompt(
+            ORCHESTRATOR_PROMPT,
+            f"User ID: {self.user_id}",
+            cache=prompt_cache_enabled(self.model)
+        )
 
         return Agent(
-            model=self.model,
+            # Routing calls are short and deterministic (orchestrator parameter profile)
+            model=with_profile(self.model, "orchestrator"),
             system_prompt=system_prompt,
-            tools=[search_agent, weather_agent, conversation_agent]
+            tools=[search_agent_async, weather_agent_async, conversation_agent_async],
+            # Sub-agent results are budgeted too; completed ones are kept for deadline partials
+            hooks=[
+                ResultShapingHooks(), MetricsHooks("orchestrator"), DeadlineHooks(record_tools=True),
+                ProgressHooks("orchestrator")
+            ],
+            # Final answer text is streamed to the progress sink (interactive shell)
+            callback_handler=ProgressCallbackHandler("orchestrator", stream_text=True)
         )
-    def process_user_input(self, user_input: str) -> Dict[str, Any]:
+
+    async def process_user_input_async(
+        self,
+        user_input: str,
+        timeout: Optional[float] = None,
+        resume: Optional[IncompleteRequest] = None
+    ) -> AgentResponse:
         """
-        Process user input through the orchestrator agent
+        Process user input through the orchestrator agent (async)
         
-        Simple single-step processing:
-        - Let the orchestrator agent handle everything intelligently
-        - No complex planning or clarity assessment needed
+        Records request count, latency and in-flight metrics by
+        processing path (clarity_check / planning_executor / orchestrator_agent).
+        The deadline (timeout) is propagated to every sub-agent and HTTP
+        tool call; when it passes, in-flight calls are cancelled and the
+        sub-agent results completed so far are returned.
+        The turn and its sub-agent results are written to the request
+        journal when it is enabled.
+        Tool calls of all sub-agents share a request-scoped memo table;
+        duplicate calls avoided are reported in tool_calls_avoided.
+        The result's response_id is the journal request ID when journaling
+        (a resumed request keeps its ID), else a fresh one.
+        
+        Args:
+            user_input: User input
+            timeout: Time budget in seconds (None: no deadline unless one is already set)
+            resume: Interrupted journaled request to continue (reuses its
+                recorded sub-agent results)
+            
+        Returns:
+            Processing result (partial=True when the deadline was exceeded)
+        """
+        started = time.perf_counter()
+        metrics.add_gauge("workshop_requests_in_flight", 1)
+        try:
+            with request_scope(self.user_id, user_input, resume) as request_id, deadline_scope(timeout) as deadline, \
+                    request_memo_scope() as memo:
+                try:
+                    result = await run_with_deadline(self._process_user_input_async(user_input))
+                except DeadlineExceeded:
+                    print("\n⏱️ 응답 시간 제한 초과 - 완료된 결과로 응답")
+                    result = partial_response(deadline, user_input, agent="deadline", user_id=self.user_id)
+                except (asyncio.CancelledError, KeyboardInterrupt):
+                    # 사용자가 취소한 요청 (/cancel, Ctrl-C): 재개 대상에서 제외
+                    record_cancelled()
+                    raise
+                if memo.avoided:
+                    result["tool_calls_avoided"] = memo.stats()
+                # 응답 ID (저널 요청 ID: 재개된 요청도 같은 ID)
+                result["response_id"] = request_id or uuid.uuid4().hex
+                record_end(result)
+        finally:
+            metrics.add_gauge("workshop_requests_in_flight", -1)
+        path = result.get("agent", "orchestrator_agent")
+        metrics.inc("workshop_requests_total", path=path, status="success" if result.get("success") else "error")
+        metrics.observe("workshop_request_seconds", time.perf_counter() - started, path=path)
+        return result
+
+    async def _process_user_input_async(self, user_input: str) -> AgentResponse:
+        """
+        Process user input through the orchestrator agent (async)
+        
+        Processing steps:
+        1. Local clarity assessment (vague input → templated follow-up, no model call)
+        2. Multi-step requests: execution plan → parallel plan execution
+        3. Let the orchestrator agent handle everything else intelligently
         
         Args:
             user_input: User input
@@ -65,28 +166,168 @@ Remember: You have the intelligence to determine what the user needs - trust you
             Processing result
         """
         try:
+            # 1. Clarity assessment (borderline cases are left to the model)
+            # An answer to a local follow-up is scored together with the original request
+            clarity_input = user_input
+            if self.pending_clarification:
+                clarity_input = f"{self.pending_clarification} {user_input}"
+            clarity = assess_clarity(clarity_input, list(self.recent_inputs))
+            self.recent_inputs.append(user_input)
+            if clarity["needs_clarification"]:
+                self.pending_clarification = clarity_input
+                return AgentResponse(
+                    success=True,
+                    agent="clarity_check",
+                    user_input=user_input,
+                    response=clarity["clarification"],
+                    needs_clarification=True,
+                    clarity_score=clarity["score"],
+                    user_id=self.user_id
+                )
+            
+            # Answer to a locally asked follow-up: the model never saw the original request
+            model_input = user_input
+            if self.pending_clarification:
+                model_input = (
+                    f"Original request: {self.pending_clarification}\n"
+                    f"Clarification: {user_input}"
+                )
+                self.pending_clarification = None
+            
+            # 2. One planning call + parallel execution for multi-step requests
+            if looks_multi_step(model_input):
+                planned = await self._execute_planned_request(user_input, model_input)
+                if planned is not None:
+                    return planned
+            
             print(f"\n🎭 ORCHESTRATOR AGENT 처리 중...")
             print("="*50)
             
-            # Let the orchestrator agent handle everything
-            response = self.orchestrator(user_input)
+            # 3. Let the orchestrator agent handle everything
+            usage_before = snapshot_usage(self.orchestrator)
+            message_count = len(self.orchestrator.messages)
+            try:
+                response = await self.orchestrator.invoke_async(model_input)
+            except (DeadlineExceeded, asyncio.CancelledError):
+                # 중단된 턴은 대화 기록에서 제거 (짝이 없는 toolUse가 남지 않도록)
+                del self.orchestrator.messages[message_count:]
+                raise
+            
+            return AgentResponse(
+                success=True,
+                agent="orchestrator_agent", 
+                user_input=user_input,
+                response=response_text(response),  # 대화 기록의 텍스트를 그대로 참조 (복사 없음)
+                needs_clarification=False,
+                user_id=self.user_id,
+                token_usage=usage_since(self.orchestrator, usage_before)
+            )
             
-            return {
-                "success": True,
-                "agent": "orchestrator_agent", 
-                "user_input": user_input,
-                "response": str(response),
-                "needs_clarification": False,
-                "user_id": self.user_id
-            }
+        except DeadlineExceeded:
+            raise
             
         except Exception as e:
-            return {
-                "success": False,
-                "agent": "orchestrator_agent",
-                "error": f"요청 처리 중 오류가 발생했습니다: {str(e)}",
-                "user_input": user_input
-            }
+            return AgentResponse(
+                success=False,
+                agent="orchestrator_agent",
+                error=f"요청 처리 중 오류가 발생했습니다: {str(e)}",
+                user_input=user_input
+            )
+
+    async def _execute_planned_request(self, user_input: str, model_input: str) -> Optional[AgentResponse]:
+        """
+        Plan a multi-step request and execute the plan's DAG
+        
+        Args:
+            user_input: User input (as typed)
+            model_input: Input sent to the planner
+            
+        Returns:
+            Processing result, or None to fall back to the orchestrator agent
+        """
+        async def plan_request(request: str) -> Dict[str, Any]:
+            return parse_plan(await planning_agent_async(request), list(PLAN_RUNNERS))
+        
+        try:
+            # Structurally similar requests reuse a cached plan (no planner call)
+            plan, plan_cached = await plan_cache.get_or_plan(model_input, plan_request, list(PLAN_RUNNERS))
+        except PlanError as e:
+            print(f"⚠️ 실행 계획 생성 실패 - 오케스트레이터로 처리: {str(e)}")
+            return None
+        
+        cache_note = " (♻️ 캐시된 계획 재사용)" if plan_cached else ""
+        print(f"\n📋 실행 계획: {len(plan['steps'])}단계{cache_note}")
+        for step in plan["steps"]:
+            depends = f" ← {', '.join(step['depends_on'])}" if step["depends_on"] else ""
+            print(f"  {step['id']}: {step['agent']}({step['input']}){depends}")
+        
+        execution = await execute_plan(plan, PLAN_RUNNERS)
+        if not execution["success"]:
+            print(f"⚠️ 계획 실행 중단 ({execution['failed_step']}): {execution['error']}")
+            return None
+        
+        return AgentResponse(
+            success=True,
+            agent="planning_executor",
+            user_input=user_input,
+            response=execution["response"],
+            needs_clarification=False,
+            user_id=self.user_id,
+            plan=plan,
+            plan_cached=plan_cached,
+            step_seconds=execution["step_seconds"]
+        )
+
+    async def resume_incomplete_async(
+        self,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None
+    ) -> List[AgentResponse]:
+        """
+        Resume this user's interrupted or partially answered journaled requests, oldest first
+
+        Recorded sub-agent results are reused; requests running in this
+        process are left alone.
+
+        Args:
+            timeout: Time budget per resumed request in seconds
+            deadline: Absolute time (time.time() seconds) every resumed request must finish by
+
+        Returns:
+            Results of the resumed requests (none while the journal is disabled)
+        """
+        if not journal.enabled:
+            return []
+        results = []
+        for request in incomplete_requests(user_id=self.user_id):
+            print(f"\n⏯️ 중단된 요청 재개: {request.user_input} (완료된 sub-agent 결과 {len(request.calls)}개 재사용)")
+            budget = timeout
+            if deadline is not None:
+                left = max(0.0, deadline - time.time())
+                budget = left if budget is None else min(budget, left)
+            results.append(await self.process_user_input_async(request.user_input, budget, resume=request))
+        return results
+
+    def process_user_input(
+        self,
+        user_input: str,
+        timeout: Optional[float] = None,
+        resume: Optional[IncompleteRequest] = None
+    ) -> AgentResponse:
+        """
+        Process user input through the orchestrator agent
+        
+        Sync shim over process_user_input_async (runs a private event loop).
+        
+        Args:
+            user_input: User input
+            timeout: Time budget in seconds
+            resume: Interrupted journaled request to continue
+            
+        Returns:
+            Processing result
+        """
+        return asyncio.run(self.process_user_input_async(user_input, timeout, resume))
  
 # Test code
 # 테스트 코드 (파일 하단에 추가)
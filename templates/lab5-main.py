@@ -1,9 +1,24 @@
 """Main Application - Strands Agents Workshop"""
+import argparse
+import asyncio
 import os
+import signal
 import sys
-from typing import Dict, Any
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
 from orchestrator_agent import OrchestratorAgent
 from model_config import get_configured_model
+from worker_pool import MAX_SESSIONS_PER_WORKER, WorkerPool
+from warmup import CacheWarmer, load_warm_list, save_access_log
+from metrics import metrics, start_http_server
+from deadline import DEFAULT_REQUEST_TIMEOUT
+from records import AgentResponse
+from output_limits import tracker as output_tracker
+from journal import journal
+from progress import ProgressEvent, progress_scope
+from formatting import formatter
 
 
 class StrandsAgentsWorkshopApp:
@@ -14,10 +29,45 @@ class StrandsAgentsWorkshopApp:
     Agents as Tools pattern.
     """
 
-    def __init__(self, model_id: str = None, user_id: str = "workshop_user"):
-        self.model = get_configured_model(model_id)
+    def __init__(
+        self,
+        model_id: str = None,
+        user_id: str = "workshop_user",
+        workers: int = 0,
+        warmup: bool = False,
+        warm_list_path: str = None,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        resume: bool = False
+    ):
         self.user_id = user_id
-        self.orchestrator_agent = OrchestratorAgent(self.model, user_id)
+        self.request_timeout = request_timeout
+        # 저널의 중단된 요청 재개: 사용자 세션이 시작될 때, 새 요청에 응답한 뒤 요청 시간 제한 하나 안에서 처리
+        self.resume = resume
+        self.resume_pending = set()
+        self.worker_pool = None
+        self.cache_warmer = None
+        if workers:
+            # 워커 프로세스가 모델 클라이언트, HTTP 풀, 캐시, 세션을 각자 소유
+            self.model = None
+            self.orchestrator_agent = None
+            self.worker_pool = WorkerPool(workers, model_id, resume=resume)
+            if metrics.enabled:
+                # /metrics와 덤프에 워커별 메트릭 포함 (worker 레이블)
+                metrics.register_source(self.worker_pool.metrics_states)
+        else:
+            self.model = get_configured_model(model_id)
+            self.orchestrator_agent = OrchestratorAgent(self.model, user_id)
+        # 단일 프로세스 모드: 다른 user_id의 세션 (워커와 동일하게 LRU 정리)
+        self.sessions: "OrderedDict[str, OrchestratorAgent]" = OrderedDict()
+        self.session_locks: Dict[str, asyncio.Lock] = {}
+
+        if warmup:
+            # 워밍 목록(또는 지난 실행의 접근 로그) 기반 캐시 예열
+            if self.worker_pool:
+                # 워커 모드: 공유 캐시 계층을 예열 (조회 기록은 워커에 있으므로 갱신은 생략)
+                os.environ.setdefault("SHARED_CACHE_PATH", self.worker_pool.shared_cache_path)
+            self.cache_warmer = CacheWarmer(load_warm_list(warm_list_path), refresh=not self.worker_pool)
+            self.cache_warmer.start()
         
         # 시스템 정보 출력 (원본 방식)
         model_name = type(self.model).__name__
@@ -27,6 +77,8 @@ class StrandsAgentsWorkshopApp:
         print("🤖 Agents as Tools multi agent demo")
         print("=" * 60)
         print(f"사용자 ID: {user_id}")
+        if self.worker_pool:
+            print(f"워커 프로세스: {self.worker_pool.num_workers}개")
         print()
         print("사용 가능한 agent:")
         print("• Search Agent - 지능적 검색 (Wikipedia + DuckDuckGo)")
@@ -35,80 +87,346 @@ class StrandsAgentsWorkshopApp:
         print("• Orchestrator Agent - 오케스트레이터 (Sub Agents 관리)")
         print("=" * 60)
 
-    def process_input(self, user_input: str) -> Dict[str, Any]:
-        """사용자 입력을 Orchestrator Agent를 통해 처리"""
+    def process_input(self, user_input: str, user_id: str = None, timeout: float = None) -> AgentResponse:
+        """사용자 입력을 Orchestrator Agent를 통해 처리 (user_id별 세션, 워커 모드: 워커로 라우팅)
+
+        요청 데드라인(timeout, 기본값: request_timeout)은 모든 sub-agent와 HTTP 호출에 전파되며,
+        초과 시 완료된 결과만으로 응답합니다.
+        재개할 요청은 새 요청이 전체 시간 제한으로 처리된 뒤, 합쳐서 시간 제한 하나 안에서 처리됩니다
+        (워커 모드: 재개 결과는 그 사용자의 다음 응답과 함께 출력).
+        """
+        timeout = timeout or self.request_timeout
         try:
-            result = self.orchestrator_agent.process_user_input(user_input)
+            if self.worker_pool:
+                result = self.worker_pool.process(user_id or self.user_id, user_input, deadline=time.time() + timeout)
+                self._print_resumed(result.pop("resumed", []), announce=True)
+                return result
+            orchestrator = self._session(user_id)
+            result = orchestrator.process_user_input(user_input, timeout)
+            if orchestrator.user_id in self.resume_pending:
+                self.resume_pending.discard(orchestrator.user_id)
+                self._print_resumed(asyncio.run(orchestrator.resume_incomplete_async(deadline=time.time() + timeout)))
             return result
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"처리 중 오류가 발생했습니다: {str(e)}",
-                "user_input": user_input
-            }
+            return AgentResponse(
+                success=False,
+                error=f"처리 중 오류가 발생했습니다: {str(e)}",
+                user_input=user_input
+            )
+
+    async def process_input_async(self, user_input: str, user_id: str = None, timeout: float = None) -> AgentResponse:
+        """사용자 입력을 Orchestrator Agent를 통해 비동기 처리 (요청 데드라인 전파)"""
+        timeout = timeout or self.request_timeout
+        try:
+            if self.worker_pool:
+                result = await self.worker_pool.process_async(
+                    user_id or self.user_id, user_input, deadline=time.time() + timeout
+                )
+                self._print_resumed(result.pop("resumed", []), announce=True)
+                return result
+            # 한 대화(agent)는 두 턴을 동시에 처리할 수 없음
+            lock = self.session_locks.setdefault(user_id or self.user_id, asyncio.Lock())
+            async with lock:
+                orchestrator = self._session(user_id)
+                result = await orchestrator.process_user_input_async(user_input, timeout)
+                if orchestrator.user_id in self.resume_pending:
+                    self.resume_pending.discard(orchestrator.user_id)
+                    self._print_resumed(
+                        await orchestrator.resume_incomplete_async(deadline=time.time() + timeout)
+                    )
+                return result
+        except Exception as e:
+            return AgentResponse(
+                success=False,
+                error=f"처리 중 오류가 발생했습니다: {str(e)}",
+                user_input=user_input
+            )
+
+    def _session(self, user_id: str = None) -> OrchestratorAgent:
+        """user_id의 Orchestrator 세션 (기본 사용자는 orchestrator_agent)"""
+        if not user_id or user_id == self.user_id:
+            return self.orchestrator_agent
+        orchestrator = self.sessions.get(user_id)
+        if orchestrator is None:
+            orchestrator = self.sessions[user_id] = OrchestratorAgent(self.model, user_id)
+            if self.resume:
+                self.resume_pending.add(user_id)
+            if len(self.sessions) > MAX_SESSIONS_PER_WORKER:
+                evicted, _ = self.sessions.popitem(last=False)
+                self.session_locks.pop(evicted, None)
+        self.sessions.move_to_end(user_id)
+        return orchestrator
 
-    def run_single_query(self, query: str) -> Dict[str, Any]:
+    def run_single_query(self, query: str) -> AgentResponse:
         """단일 쿼리 실행"""
         return self.process_input(query)
 
-    def format_response(self, response: Dict[str, Any]) -> str:
-        """응답 포맷팅 - 시인성 개선"""
-        if response.get("success"):
-            raw_response = response.get("response", "응답을 생성할 수 없습니다.")
-            return raw_response
-        else:
-            return f"❌ 오류: {response.get('error', '알 수 없는 오류')}"
+    def resume_incomplete(self) -> int:
+        """기본 사용자의 중단된 요청을 재개 (기록된 sub-agent 결과 재사용, 부분 응답으로 끝난 요청 포함)
+
+        다른 사용자는 세션이 시작될 때, 워커 모드에서는 워커가 사용자 세션을 시작할 때 재개합니다.
+
+        Returns:
+            재개한 요청 수
+        """
+        if self.worker_pool or not journal.enabled:
+            return 0
+        results = asyncio.run(self.orchestrator_agent.resume_incomplete_async(self.request_timeout))
+        self._print_resumed(results)
+        return len(results)
 
+    def _print_resumed(self, results, announce: bool = False) -> None:
+        """재개된 요청의 결과 출력 (announce: 워커에서 재개된 요청 - 워커 출력은 표시되지 않음)"""
+        for result in results:
+            if announce:
+                print(f"\n⏯️ 중단된 요청 재개: {result.get('user_input')}")
+            print(self.format_response(result))
 
-    def run_single_query(self, query: str) -> Dict[str, Any]:
+    def format_response(self, response: AgentResponse, channel: str = "cli") -> str:
+        """응답 포맷팅 - 시인성 개선
+
+        마크다운 정리, 길이 제한, 채널별 렌더링 ("cli" / "json" / "sse")을 한 번에 처리하며
+        결과는 (channel, 응답 텍스트 해시) 기준으로 메모됩니다 (응답 ID 등 메타데이터만 매번 렌더링).
+        """
+        with metrics.timer("workshop_format_seconds", channel=channel):
+            if response.get("success"):
+                text = response.get("response") or "응답을 생성할 수 없습니다."
+            else:
+                text = f"❌ 오류: {response.get('error', '알 수 없는 오류')}"
+            return formatter.render(text, channel, response.get("response_id"), bool(response.get("success")))
+
+
+    def run_single_query(self, query: str) -> AgentResponse:
         """단일 쿼리 실행"""
         return self.process_input(query)
 
     def run_interactive_mode(self):
-        """대화형 모드 실행"""
+        """대화형 모드 실행 (비동기 셸)"""
+        asyncio.run(self.run_interactive_shell())
+
+    async def run_interactive_shell(self):
+        """
+        비동기 대화형 셸
+
+        - 요청 처리 중에도 입력을 받음 (처리 중 입력은 대기열에 추가)
+        - sub-agent / 도구 / 계획 단계의 시작·완료를 실시간 표시
+        - 오케스트레이터 응답 텍스트를 도착하는 대로 출력
+        - Ctrl-C 또는 '/cancel': 진행 중인 요청 취소 (모델/HTTP 호출 중단)
+        """
         print("\n🚀 대화형 모드 시작!")
         print("다양한 요청을 입력해보세요:")
         print("  • 정보 검색: '인공지능에 대해 알려줘'")
         print("  • 날씨 조회: '뉴욕 날씨 어때?'")
         print("  • 복합 요청: '파리에 대해 알려주고 날씨도 알려줘'")
         print("  • 일반 대화: '안녕하세요'")
+        print("  • 요청 취소: Ctrl-C 또는 '/cancel'")
         print("  • 종료: '/quit'")
         print()
 
-        while True:
-            try:
-                user_input = input("💬 입력: ").strip()
-                
-                if not user_input:
-                    continue
-                
-                if user_input.lower() in ['/quit', 'quit', 'exit', '종료']:
-                    print("👋 시스템을 종료합니다. 안녕히 가세요!")
+        loop = asyncio.get_running_loop()
+        lines: asyncio.Queue = asyncio.Queue()
+
+        def read_lines():
+            # input()은 블로킹 → 별도 스레드에서 읽어 이벤트 루프로 전달 (None: 입력 종료)
+            while True:
+                try:
+                    line = input()
+                except (EOFError, KeyboardInterrupt):
+                    loop.call_soon_threadsafe(lines.put_nowait, None)
+                    return
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+
+        threading.Thread(target=read_lines, name="shell-input", daemon=True).start()
+
+        pending: deque = deque()
+        current: Optional[asyncio.Task] = None
+        reader: Optional[asyncio.Task] = None
+        closing = False
+
+        def cancel_current() -> bool:
+            if current is not None and not current.done():
+                current.cancel()
+                return True
+            return False
+
+        def on_interrupt():
+            if cancel_current():
+                print("\n🛑 요청 취소 중...")
+            else:
+                lines.put_nowait("/quit")
+
+        try:
+            loop.add_signal_handler(signal.SIGINT, on_interrupt)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl-C는 KeyboardInterrupt로 처리
+
+        print("💬 입력: ", end="", flush=True)
+        try:
+            while True:
+                if current is None and pending:
+                    current = asyncio.create_task(self._run_shell_request(pending.popleft()))
+                if current is None and closing:
                     break
-                
-                # 요청 처리
-                result = self.process_input(user_input)
-                response = self.format_response(result)
-                
-                # 응답 출력 (원본 방식)
-                print("\n🎯" + "=" * 58 + "🎯")
-                print("🤖 최종 응답")
-                print(response)
-                print("🎯" + "=" * 58 + "🎯")
-                print("\n" + "-" * 50 + "\n")
-                
-            except KeyboardInterrupt:
-                print("\n\n👋 시스템을 종료합니다. 안녕히 가세요!")
-                break
-            except Exception as e:
-                print(f"\n❌ 예상치 못한 오류: {str(e)}")
-                print("다시 시도해주세요.\n")
+                if reader is None and not closing:
+                    reader = asyncio.create_task(lines.get())
+
+                waiting = {task for task in (current, reader) if task is not None}
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                if current in done:
+                    if current.cancelled():
+                        print("\n🛑 요청이 취소되었습니다.")
+                    current = None
+                    print("\n" + "-" * 50)
+                    if not pending and not closing:
+                        print("💬 입력: ", end="", flush=True)
+
+                if reader in done:
+                    line, reader = reader.result(), None
+                    if line is None:
+                        closing = True  # 입력 종료 (EOF): 대기 중인 요청까지 처리 후 종료
+                        continue
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if line.lower() in ['/quit', 'quit', 'exit', '종료']:
+                        cancel_current()
+                        pending.clear()
+                        break
+                    if line.lower() == '/cancel':
+                        if not cancel_current():
+                            print("ℹ️ 진행 중인 요청이 없습니다.")
+                        continue
+                    if current is not None:
+                        print(f"⏳ 대기열에 추가됨 ({len(pending) + 1}번째): {line}")
+                    pending.append(line)
+        finally:
+            for task in (current, reader):
+                if task is not None and not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+            try:
+                loop.remove_signal_handler(signal.SIGINT)
+            except (NotImplementedError, RuntimeError):
+                pass
+        print("👋 시스템을 종료합니다. 안녕히 가세요!")
+
+    async def _run_shell_request(self, user_input: str) -> AgentResponse:
+        """셸 요청 하나 처리: 진행 이벤트와 스트리밍 텍스트를 도착하는 대로 출력"""
+        started = time.perf_counter()
+        streamed = False
+        stream = formatter.stream("cli")
+        print(f"\n🧭 처리 시작: {user_input}")
+
+        def render(event: ProgressEvent):
+            nonlocal streamed
+            elapsed = f"{event.seconds:.2f}s" if event.seconds is not None else ""
+            if event.kind == "text":
+                if not streamed:
+                    streamed = True
+                    print("\n🤖 ", end="")
+                print(stream.feed(event.text), end="", flush=True)
+            elif event.kind in ("tool_start", "step_start"):
+                label = event.name if event.kind == "tool_start" else f"{event.name}: {event.agent}"
+                indent = "  " if event.agent == "orchestrator" or event.kind == "step_start" else "      "
+                print(f"{indent}▶ {label}", flush=True)
+            elif event.kind in ("tool_end", "step_end"):
+                label = event.name if event.kind == "tool_end" else f"{event.name}: {event.agent}"
+                indent = "  " if event.agent == "orchestrator" or event.kind == "step_end" else "      "
+                print(f"{indent}{'✔' if event.ok else '✖'} {label} ({elapsed})", flush=True)
+
+        with progress_scope(render):
+            result = await self.process_input_async(user_input)
+
+        if streamed and result.get("agent") == "orchestrator_agent":
+            # 응답 텍스트는 이미 스트리밍으로 출력됨 (남은 줄만 출력, 렌더링 결과는 메모)
+            print(stream.finish(result.get("response_id"), source=result.get("response")))
+        else:
+            print("\n🎯" + "=" * 58 + "🎯")
+            print("🤖 최종 응답")
+            print(self.format_response(result))
+            print("🎯" + "=" * 58 + "🎯")
+        print(f"⏱️ {time.perf_counter() - started:.2f}s")
+        return result
+
+    def close(self):
+        """리소스 정리 (캐시 예열 중지, 접근 로그 저장, 워커 프로세스 종료, 출력 길이 상한 제안)"""
+        suggestions = output_tracker.report_lines()
+        if suggestions:
+            print("\n📏 관측된 출력 길이(p99) 기반 max_tokens 제안:")
+            for line in suggestions:
+                print(f"  • {line}")
+        if self.cache_warmer:
+            self.cache_warmer.stop()
+            self.cache_warmer = None
+        if not self.worker_pool:
+            # 다음 실행의 --warmup 예열 목록 (조회 기록은 단일 프로세스 모드에만 있음)
+            save_access_log()
+        journal.flush()
+        if self.worker_pool:
+            self.worker_pool.close()
+            self.worker_pool = None
 
 
 def main():
     """메인 실행 함수""" 
-    app = StrandsAgentsWorkshopApp()
-    app.run_interactive_mode()
+    parser = argparse.ArgumentParser(description="Strands Agents Workshop")
+    parser.add_argument("query", nargs="?", help="단일 쿼리 (생략 시 대화형 모드)")
+    parser.add_argument("--model-id", help="사용할 모델 ID")
+    parser.add_argument("--user-id", default="workshop_user", help="사용자 ID")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="워커 프로세스 수 (0: 단일 프로세스)")
+    parser.add_argument("--warmup", action="store_true",
+                        help="시작 시 캐시 예열 + 백그라운드 갱신 (외부 API 호출 발생)")
+    parser.add_argument("--warm-list", help="캐시 예열 목록 JSON (생략 시 지난 실행의 접근 로그 사용, --warmup과 함께)")
+    parser.add_argument("--metrics-port", type=int, help="메트릭 HTTP 포트 (Prometheus 텍스트 형식, 워커 모드: worker 레이블로 합산)")
+    parser.add_argument("--metrics-file", help="종료 시 메트릭 덤프 파일 (*.json: JSON, 그 외: Prometheus 텍스트)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help="요청당 응답 시간 제한 (초)")
+    parser.add_argument("--autotune-output", action="store_true",
+                        help="관측된 출력 길이(p99) 기반 max_tokens 상한 자동 적용")
+    parser.add_argument("--journal", help="요청 저널 파일 (JSONL, 중단된 요청 재개/부하 테스트 재생용)")
+    parser.add_argument("--resume", action="store_true", help="저널의 중단·부분 응답 요청 재개 (기본 사용자: 시작 시, 그 외: 사용자 세션 시작 시)")
+    args = parser.parse_args()
+
+    if args.journal:
+        # 요청 저널 (워커 프로세스도 같은 파일에 기록)
+        os.environ["REQUEST_JOURNAL_PATH"] = args.journal
+        journal.open(args.journal)
+
+    if args.autotune_output:
+        # 워커 프로세스도 같은 설정을 상속
+        os.environ["MODEL_OUTPUT_AUTOTUNE"] = "1"
+        output_tracker.auto_apply = True
+
+    # 메트릭: 로컬 포트(Prometheus 형식) 또는 종료 시 파일 덤프
+    metrics_server = None
+    if args.metrics_port is not None or args.metrics_file:
+        # 워커 프로세스도 같은 설정을 상속
+        os.environ["METRICS"] = "1"
+        metrics.enabled = True
+    if args.metrics_port is not None:
+        metrics_server = start_http_server(args.metrics_port)
+        print(f"📈 메트릭: http://127.0.0.1:{metrics_server.server_address[1]}/metrics")
+
+    app = StrandsAgentsWorkshopApp(
+        args.model_id, args.user_id, workers=args.workers,
+        warmup=args.warmup, warm_list_path=args.warm_list, request_timeout=args.timeout,
+        resume=args.resume
+    )
+    try:
+        if args.resume:
+            app.resume_incomplete()
+        if args.query:
+            print(app.format_response(app.run_single_query(args.query)))
+        else:
+            app.run_interactive_mode()
+    finally:
+        if args.metrics_file:
+            metrics.dump(args.metrics_file)  # 워커 종료 전 (워커 메트릭 포함)
+        app.close()
+        if metrics_server:
+            metrics_server.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,34 @@
+"""Shared test setup: import the workshop modules from the repository root"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lab solutions live in templates/ under the module names the labs import
+LAB_MODULES = [
+    ("tools", "lab2-tools.py"),
+    ("sub_agents", "lab3-sub_agents.py"),
+    ("orchestrator_agent", "lab4-orchestrator_agent.py"),
+]
+
+
+@pytest.fixture
+def labs(monkeypatch, tmp_path):
+    """Import the lab solutions (stub model, no knowledge index) and return them by module name"""
+    monkeypatch.setenv("MODEL_PROVIDER", "stub")
+    monkeypatch.setenv("KNOWLEDGE_INDEX_PATH", str(tmp_path / "no_index"))
+    modules = {}
+    for name, filename in LAB_MODULES:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, "templates", filename))
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, name, module)
+        spec.loader.exec_module(module)
+        modules[name] = module
+    return modules
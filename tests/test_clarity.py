@@ -0,0 +1,38 @@
+from clarity import CLARIFY_THRESHOLD, assess_clarity, score_vagueness
+
+
+def test_single_word_is_vague():
+    assessment = assess_clarity("coffee")
+    assert assessment["needs_clarification"]
+    assert '"coffee"' in assessment["clarification"]
+
+
+def test_clear_requests_and_greetings():
+    assert not assess_clarity("What is the weather in Seattle?")["needs_clarification"]
+    assert score_vagueness("hello") == 0.0
+    assert score_vagueness("") == 1.0
+
+
+def test_unrelated_word_on_a_later_turn_is_still_vague():
+    recent = ["What is the weather in Seattle?"]
+    assert score_vagueness("coffee", recent) >= CLARIFY_THRESHOLD
+    assert assess_clarity("coffee", recent)["needs_clarification"]
+
+
+def test_follow_ups_are_clear_in_session_context():
+    recent = ["What is the weather in Seattle?"]
+    assert score_vagueness("and Boston?", recent) < CLARIFY_THRESHOLD
+    assert score_vagueness("Seattle tomorrow", recent) < score_vagueness("Seattle tomorrow")
+    assert score_vagueness("and Boston?") > score_vagueness("and Boston?", recent)
+
+
+def test_length_curve_starts_at_one_token():
+    assert score_vagueness("coffee") == 0.9
+    assert score_vagueness("coffee prices") == 0.6
+
+
+def test_lone_name_after_an_intent_turn_goes_to_the_model():
+    recent = ["weather in Seattle?"]
+    assert not assess_clarity("Boston", recent)["needs_clarification"]
+    assert assess_clarity("Boston")["needs_clarification"]
+    assert assess_clarity("Boston", ["hello"])["needs_clarification"]
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from coalescing import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test", reuse_window=0)
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.run(key, work) for key in ["Paris", "paris", " PARIS? "]))
+
+    assert asyncio.run(run()) == ["result"] * 3
+    assert len(calls) == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 2, "reused": 0, "in_flight": 0}
+
+
+def test_completed_result_is_reused_within_the_window():
+    flight = SingleFlight("test", reuse_window=60)
+
+    async def work():
+        return object()
+
+    async def run():
+        return await flight.run("k", work), await flight.run("k", work)
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert flight.stats()["reused"] == 1
+
+
+def test_failures_reach_every_caller_and_are_not_reused():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(flight.run("k", fail), flight.run("k", fail), return_exceptions=True)
+
+    assert [type(e) for e in asyncio.run(run())] == [ValueError, ValueError]
+    with pytest.raises(ValueError):
+        asyncio.run(flight.run("k", fail))
+    assert len(calls) == 2
+
+
+def test_follower_takes_over_when_the_leader_is_cancelled():
+    flight = SingleFlight("test", reuse_window=0)
+
+    async def work():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flight.run("k", work))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.run("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "done"
+    assert flight.stats()["executions"] == 2
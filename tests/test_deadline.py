@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from coalescing import SingleFlight
+from deadline import (
+    DeadlineExceeded, check_deadline, current_deadline, deadline_scope, partial_response,
+    record_partial, remaining, run_with_deadline, timeout_for,
+)
+
+
+def test_no_deadline_by_default():
+    assert current_deadline() is None
+    assert remaining(5.0) == 5.0
+    assert timeout_for(3.0) == 3.0
+    check_deadline()
+
+
+def test_nested_scope_never_extends_the_outer_deadline():
+    with deadline_scope(1.0) as outer:
+        with deadline_scope(60.0) as inner:
+            assert inner is outer
+        with deadline_scope(0.5) as inner:
+            assert inner is not outer and inner.partials is outer.partials
+        assert timeout_for(30.0) <= 1.0
+    assert current_deadline() is None
+
+
+def test_expired_deadline_raises():
+    with deadline_scope(0.0):
+        with pytest.raises(DeadlineExceeded):
+            check_deadline()
+        with pytest.raises(DeadlineExceeded):
+            timeout_for(1.0)
+
+
+def test_run_with_deadline_cancels_the_awaitable():
+    async def run():
+        with deadline_scope(0.05):
+            await run_with_deadline(asyncio.sleep(5))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+
+
+def test_partial_response_includes_completed_results():
+    with deadline_scope(10.0) as deadline:
+        record_partial("weather_agent", "Sunny")
+        result = partial_response(deadline, "weather?")
+    assert result["success"] and result["partial"]
+    assert result["partial_sources"] == ["weather_agent"] and "Sunny" in result["response"]
+    assert not partial_response(None, "weather?")["success"]
+
+
+def test_leader_deadline_is_not_a_follower_failure():
+    flight = SingleFlight("test", reuse_window=0)
+
+    async def work():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def leader():
+        with deadline_scope(0.02):
+            return await flight.run("k", lambda: run_with_deadline(work()))
+
+    async def run():
+        first = asyncio.create_task(leader())
+        await asyncio.sleep(0.005)
+        return await asyncio.gather(first, flight.run("k", work), return_exceptions=True)
+
+    led, followed = asyncio.run(run())
+    assert isinstance(led, DeadlineExceeded)
+    assert followed == "done"
+    assert flight.stats()["executions"] == 2
@@ -0,0 +1,45 @@
+import json
+
+from formatting import MarkdownCleanup, ResponseFormatter, Truncate, source_digest
+
+MARKDOWN = "## Paris\n\n\n* **Capital** of `France`   \n\n```\ncode  here\n```\n"
+
+
+def test_plain_cleanup_strips_markdown():
+    cleanup = MarkdownCleanup(plain=True)
+    assert cleanup.feed(MARKDOWN) + cleanup.finish() == "Paris\n\n• Capital of France\n\ncode  here"
+
+
+def test_streamed_chunks_render_like_the_whole_text():
+    formatter = ResponseFormatter()
+    whole = formatter.render(MARKDOWN, "json", "r1")
+    stream = ResponseFormatter().stream("json")
+    streamed = "".join(stream.feed(MARKDOWN[i:i + 3]) for i in range(0, len(MARKDOWN), 3))
+    streamed += stream.finish("r1")
+    assert streamed == whole
+    assert json.loads(whole)["response"].startswith("## Paris\n\n- **Capital**")
+
+
+def test_truncate_cuts_at_a_word_boundary():
+    truncate = Truncate(12)
+    assert truncate.feed("hello wonderful world") == "hello …"
+    assert truncate.truncated and truncate.feed("more") == ""
+
+
+def test_memo_is_keyed_by_the_source_text():
+    formatter = ResponseFormatter()
+    first = formatter.render("Sunny in Paris", "json", "r1")
+    # Same length, different text (e.g. a resumed request's new answer)
+    assert "Rainy" in formatter.render("Rainy in Paris", "json", "r1")
+    # Same text under a fresh response ID: memo hit, closing metadata re-rendered
+    retried = formatter.render("Sunny in Paris", "json", "r2")
+    assert json.loads(retried) == {**json.loads(first), "id": "r2"}
+    assert formatter.lookup(source_digest("Sunny in Paris"), "json") is not None
+
+
+def test_partial_stream_is_not_memoized():
+    formatter = ResponseFormatter()
+    stream = formatter.stream("cli")
+    stream.feed("Sunny")
+    stream.finish("r1", source="Sunny in Paris")
+    assert formatter.lookup(source_digest("Sunny"), "cli") is None
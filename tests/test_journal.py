@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+import journal as journal_module
+from journal import (
+    MAX_RESUME_ATTEMPTS, RequestJournal, incomplete_requests, journaled, read_journal, record_cancelled, record_end,
+    replay_requests, request_scope,
+)
+
+
+@pytest.fixture
+def journal_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "requests.jsonl")
+    monkeypatch.setattr(journal_module, "journal", RequestJournal(path))
+    yield path
+    journal_module.journal.close()
+
+
+def run_request(user_input, runner, resume=None, finish=record_end):
+    async def run():
+        with request_scope("u1", user_input, resume):
+            output = await runner(user_input)
+            if finish is not None:
+                finish({"success": True, "response": output})
+    asyncio.run(run())
+
+
+def test_records_are_batched_and_flushed(journal_path):
+    for i in range(10):
+        journal_module.journal.append({"type": "note", "i": i})
+    assert journal_module.journal.flush()
+    assert [record["i"] for record in read_journal(journal_path)] == list(range(10))
+
+
+def test_interrupted_request_resumes_with_recorded_calls(journal_path):
+    calls = []
+
+    @journaled("search_agent")
+    async def search(text):
+        calls.append(text)
+        return f"found {text}"
+
+    run_request("Paris", search, finish=None)  # no end record: interrupted
+    run_request("Rome", search)
+    [pending] = incomplete_requests(journal_path)
+    assert pending.user_input == "Paris"
+    assert pending.calls == [("search_agent", "Paris", "found Paris")]
+
+    run_request("Paris", search, resume=pending)
+    assert calls == ["Paris", "Rome"]  # the resumed call was not run again
+    assert incomplete_requests(journal_path) == []
+
+
+def test_cancelled_request_is_not_resumed(journal_path):
+    async def cancelled(text):
+        try:
+            raise asyncio.CancelledError()
+        except asyncio.CancelledError:
+            record_cancelled()
+            raise
+
+    with pytest.raises(asyncio.CancelledError):
+        run_request("Paris", cancelled)
+    assert incomplete_requests(journal_path) == []
+    [end] = [record for record in read_journal(journal_path) if record["type"] == "end"]
+    assert end["status"] == "cancelled"
+
+
+def test_replay_requests_offsets(journal_path):
+    async def echo(text):
+        return text
+
+    run_request("a", echo)
+    run_request("b", echo)
+    journal_module.journal.flush()
+    replay = replay_requests(journal_path)
+    assert [request["input"] for request in replay] == ["a", "b"]
+    assert replay[0]["offset"] == 0.0 and replay[1]["offset"] >= 0.0
+
+
+def test_partial_answers_stay_resumable(journal_path):
+    async def search(text):
+        return f"found {text}"
+
+    run_request("Paris", search, finish=lambda result: record_end({**result, "partial": True}))
+    [pending] = incomplete_requests(journal_path)
+    assert pending.user_input == "Paris" and pending.partial
+
+    run_request("Paris", search, resume=pending)  # completed this time
+    assert incomplete_requests(journal_path) == []
+    assert [record["status"] for record in read_journal(journal_path) if record["type"] == "end"] == [
+        "partial", "completed"
+    ]
+
+
+def test_request_that_keeps_hitting_its_deadline_is_given_up_on(journal_path):
+    runs = []
+
+    async def slow(text):
+        runs.append(text)
+        return "partial"
+
+    def partial(result):
+        record_end({**result, "partial": True})
+
+    run_request("Paris", slow, finish=partial)
+    for attempt in range(MAX_RESUME_ATTEMPTS):
+        [pending] = incomplete_requests(journal_path)
+        assert pending.attempts == attempt
+        run_request("Paris", slow, resume=pending, finish=partial)
+
+    assert incomplete_requests(journal_path) == []
+    assert len(runs) == 1 + MAX_RESUME_ATTEMPTS
+    [given_up] = incomplete_requests(journal_path, max_attempts=None)
+    assert given_up.partial and given_up.attempts == MAX_RESUME_ATTEMPTS
+
+
+def test_requests_running_in_this_process_are_not_resumable(journal_path):
+    seen = []
+
+    async def running(text):
+        seen.append(incomplete_requests(journal_path))
+        return text
+
+    run_request("Paris", running)
+    assert seen == [[]]
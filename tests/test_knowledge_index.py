@@ -0,0 +1,57 @@
+import threading
+
+from knowledge_index import KnowledgeIndex, build_index, get_knowledge_index
+
+ARTICLES = [
+    {"title": "Renaissance", "summary": "Cultural movement in Europe after the Middle Ages.", "url": "u1"},
+    {"title": "Quantum mechanics", "summary": "Physics of atoms and subatomic particles.", "url": "u2"},
+]
+
+
+def test_lookup_hits_on_title_terms(tmp_path):
+    build_index(str(tmp_path), ARTICLES)
+    index = KnowledgeIndex(str(tmp_path))
+    hit = index.lookup("tell me about the Renaissance")
+    assert hit["title"] == "Renaissance" and hit["source"] == "local_index"
+    assert index.lookup("Europe") is None  # no title term
+    assert index.stats == {"hits": 1, "misses": 1}
+
+
+def test_rebuild_replaces_changed_articles(tmp_path):
+    build_index(str(tmp_path), ARTICLES)
+    counts = build_index(str(tmp_path), [
+        ARTICLES[0], {"title": "Quantum mechanics", "summary": "Updated summary of quanta."},
+    ])
+    assert counts == {"added": 0, "replaced": 1, "skipped": 1}
+    index = KnowledgeIndex(str(tmp_path))
+    assert len(index) == 2
+    assert index.lookup("quantum mechanics")["summary"] == "Updated summary of quanta."
+
+
+def test_index_built_later_is_picked_up(tmp_path):
+    path = str(tmp_path / "index")
+    assert get_knowledge_index(path) is None
+    assert get_knowledge_index(path) is None
+    build_index(path, ARTICLES)
+    index = get_knowledge_index(path)
+    assert index is not None and get_knowledge_index(path) is index
+
+
+def test_document_reads_survive_reloads(tmp_path):
+    build_index(str(tmp_path), ARTICLES)
+    index = KnowledgeIndex(str(tmp_path))
+    errors = []
+
+    def read():
+        try:
+            for _ in range(2000):
+                assert index.document(0)["title"] == "Renaissance"
+        except Exception as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for _ in range(50):
+        index._load()
+    reader.join()
+    assert errors == []
@@ -0,0 +1,55 @@
+from metrics import MetricsRegistry, metrics
+
+
+def test_sources_are_merged_with_their_labels():
+    worker = MetricsRegistry(enabled=True)
+    worker.inc("workshop_requests_total", 2, status="ok")
+    worker.observe("workshop_request_seconds", 0.5)
+    registry = MetricsRegistry(enabled=True)
+    registry.inc("workshop_requests_total", status="ok")
+    registry.register_source(lambda: [({"worker": "0"}, worker.export_state())])
+
+    text = registry.render_prometheus()
+    assert 'workshop_requests_total{status="ok"} 1' in text
+    assert 'workshop_requests_total{status="ok",worker="0"} 2' in text
+    assert 'workshop_request_seconds_count{worker="0"} 1' in text
+
+    snapshot = registry.snapshot()
+    assert {"labels": {"status": "ok", "worker": "0"}, "value": 2} in snapshot["counters"]["workshop_requests_total"]
+    assert snapshot["histograms"]["workshop_request_seconds"][0]["labels"] == {"worker": "0"}
+
+
+def test_export_state_is_a_copy():
+    registry = MetricsRegistry(enabled=True)
+    registry.observe("workshop_request_seconds", 1.0)
+    state = registry.export_state()
+    registry.observe("workshop_request_seconds", 1.0)
+    assert state["histograms"]["workshop_request_seconds"][()].count == 1
+
+
+def test_result_shaping_savings_are_exported(monkeypatch):
+    import result_shaping
+
+    stats = result_shaping.ShapingStats()
+    stats.record("http_request", 500, 120)
+    stats.record("http_request", 300, 80)
+    monkeypatch.setattr(result_shaping, "shaping_stats", stats)
+
+    text = metrics.render_prometheus()
+    assert 'workshop_tool_results_shaped_total{tool="http_request"} 2' in text
+    assert 'workshop_tool_result_tokens_saved_total{tool="http_request"} 600' in text
+
+
+def test_plan_cache_latency_avoided_is_exported(monkeypatch):
+    import plan_cache
+
+    cache = plan_cache.PlanCache()
+    plan = {"steps": [{"id": "s1", "agent": "search_agent", "input": "Paris", "depends_on": []}]}
+    assert cache.lookup("Tell me about Paris", ["search_agent"]) is None
+    cache.store("Tell me about Paris", plan, 2.0)
+    assert cache.lookup("Tell me about Rome", ["search_agent"]) is not None
+    monkeypatch.setattr(plan_cache, "plan_cache", cache)
+
+    text = metrics.render_prometheus()
+    assert "workshop_plan_cache_hit_ratio 0.5" in text
+    assert "workshop_plan_cache_planning_seconds_avoided 2" in text
@@ -0,0 +1,33 @@
+import asyncio
+
+from model_config import _create_bedrock_model, model_params
+from planner import PLAN_END_MARKER
+from stub_model import StubModel
+
+
+def test_bedrock_models_stream_by_default(monkeypatch):
+    monkeypatch.delenv("BEDROCK_STREAMING", raising=False)
+    model = _create_bedrock_model("us.amazon.nova-pro-v1:0", "us-west-2", prompt_cache=False)
+    assert model.get_config()["streaming"] is True
+
+    monkeypatch.setenv("BEDROCK_STREAMING", "0")
+    model = _create_bedrock_model("us.amazon.nova-pro-v1:0", "us-west-2", prompt_cache=False)
+    assert model.get_config()["streaming"] is False
+
+
+def test_planning_agent_stops_after_the_plan():
+    params = model_params("planning_agent")
+    assert params["stop_sequences"] == [PLAN_END_MARKER]
+
+    model = StubModel(responder=lambda messages, specs: '{"steps": []}' + PLAN_END_MARKER + " Here is why...")
+    model.update_config(**params)
+    text, stop_reason = "", None
+
+    async def run():
+        nonlocal text, stop_reason
+        async for event in model.stream([{"role": "user", "content": [{"text": "plan"}]}]):
+            text += event.get("contentBlockDelta", {}).get("delta", {}).get("text", "")
+            stop_reason = event.get("messageStop", {}).get("stopReason", stop_reason)
+
+    asyncio.run(run())
+    assert text == '{"steps": []}' and stop_reason == "stop_sequence"
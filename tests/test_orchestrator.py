@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import journal as journal_module
+from deadline import deadline_scope
+from journal import RequestJournal, incomplete_requests, request_scope
+from plan_cache import PlanCache
+from stub_model import StubModel, routing_responder
+
+MULTI_STEP = "Tell me about Paris and also check the weather"
+
+PLAN = {"steps": [
+    {"id": "s1", "agent": "search_agent", "input": "Paris", "depends_on": []},
+    {"id": "s2", "agent": "weather_agent", "input": "Paris", "depends_on": []},
+]}
+
+
+def planned_orchestrator(labs, monkeypatch, cancelled):
+    module = labs["orchestrator_agent"]
+
+    async def plan(request):
+        return json.dumps(PLAN)
+
+    async def slow(text):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+        return text
+
+    monkeypatch.setattr(module, "planning_agent_async", plan)
+    monkeypatch.setattr(module, "plan_cache", PlanCache())
+    monkeypatch.setattr(module, "PLAN_RUNNERS", {agent: slow for agent in ["search_agent", "weather_agent"]})
+    return module.OrchestratorAgent(StubModel())
+
+
+def test_cancelling_a_request_cancels_its_plan_steps(labs, monkeypatch):
+    cancelled = []
+    orchestrator = planned_orchestrator(labs, monkeypatch, cancelled)
+
+    async def run():
+        task = asyncio.create_task(orchestrator.process_user_input_async(MULTI_STEP))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return list(cancelled)
+
+    assert asyncio.run(run()) == ["Paris", "Paris"]
+
+
+def test_deadline_cancels_plan_steps(labs, monkeypatch):
+    cancelled = []
+    orchestrator = planned_orchestrator(labs, monkeypatch, cancelled)
+
+    async def run():
+        result = await orchestrator.process_user_input_async(MULTI_STEP, timeout=0.2)
+        return result, list(cancelled)
+
+    result, seen = asyncio.run(run())
+    assert result["deadline_exceeded"]
+    assert seen == ["Paris", "Paris"]
+
+
+def test_failed_sub_agent_calls_are_not_kept_as_partials(labs, monkeypatch):
+    sub_agents = labs["sub_agents"]
+    orchestrator = labs["orchestrator_agent"].OrchestratorAgent(StubModel(responder=routing_responder))
+
+    async def unavailable(query):
+        raise RuntimeError("search backend unavailable")
+
+    async def run():
+        with deadline_scope(30) as deadline:
+            await orchestrator.orchestrator.invoke_async("Tell me about Paris")
+            return list(deadline.partials)
+
+    monkeypatch.setattr(sub_agents, "run_search_agent", unavailable)
+    assert asyncio.run(run()) == []
+
+    async def found(query):
+        return "Paris is the capital of France."
+
+    monkeypatch.setattr(sub_agents, "run_search_agent", found)
+    assert asyncio.run(run()) == [("search_agent", "Paris is the capital of France.")]
+
+
+def test_resume_runs_only_this_users_interrupted_requests(labs, monkeypatch, tmp_path):
+    module = labs["orchestrator_agent"]
+    path = str(tmp_path / "requests.jsonl")
+    journal = RequestJournal(path)
+    monkeypatch.setattr(journal_module, "journal", journal)
+    monkeypatch.setattr(module, "journal", journal)
+    for user_id, text in [("alice", "Hello there"), ("bob", "Good morning")]:
+        with request_scope(user_id, text):
+            pass  # no end record: interrupted
+
+    results = asyncio.run(module.OrchestratorAgent(StubModel(), "alice").resume_incomplete_async(30))
+    assert [result["user_input"] for result in results] == ["Hello there"]
+    assert [request.user_id for request in incomplete_requests(path)] == ["bob"]
+    journal.close()
+
+
+def test_answer_to_a_local_clarification_keeps_the_original_request(labs):
+    model = StubModel()
+    orchestrator = labs["orchestrator_agent"].OrchestratorAgent(model)
+
+    asked = orchestrator.process_user_input("coffee")
+    assert asked["agent"] == "clarity_check" and model.calls == 0
+
+    answered = orchestrator.process_user_input("prices")
+    assert answered["agent"] == "orchestrator_agent"
+    assert orchestrator.pending_clarification is None
+    first_user_text = orchestrator.orchestrator.messages[0]["content"][0]["text"]
+    assert first_user_text == "Original request: coffee\nClarification: prices"
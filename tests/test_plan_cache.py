@@ -0,0 +1,93 @@
+import asyncio
+
+from plan_cache import PlanCache, _templatize, extract_slots
+from planner import parse_plan
+
+AGENTS = ["search_agent", "weather_agent", "conversation_agent"]
+
+
+def plan_for(city):
+    return parse_plan({"steps": [
+        {"id": "s1", "agent": "search_agent", "input": f"{city} history"},
+        {"id": "s2", "agent": "weather_agent", "input": city},
+    ]}, AGENTS)
+
+
+def test_extract_slots():
+    key, slots = extract_slots("Tell me about Paris and the weather")
+    assert key == "tell me about {slot0} and the weather"
+    assert slots == ["Paris"]
+
+
+def test_sentence_start_words_and_contractions_are_not_slots():
+    assert extract_slots("Compare Paris and London") == ("compare {slot0} and {slot1}", ["Paris", "London"])
+    assert extract_slots("Forecast Boston and Denver") == ("forecast {slot0} and {slot1}", ["Boston", "Denver"])
+    assert extract_slots("What's the weather in Boston? Where's Denver")[1] == ["Boston", "Denver"]
+
+
+def test_templatize_only_replaces_whole_words():
+    plan = {"steps": [{"id": "s1", "agent": "search_agent", "input": "US business news", "depends_on": []}]}
+    assert _templatize(plan, ["US"]) is None  # also inside "business"
+    plan["steps"][0]["input"] = "US news about us"
+    assert _templatize(plan, ["US"]) is None  # mixed casing
+    plan["steps"][0]["input"] = "US news"
+    assert _templatize(plan, ["US"])["steps"][0]["input"] == "[[slot0]] news"
+
+
+def test_similar_request_reuses_the_plan():
+    cache = PlanCache()
+    calls = []
+
+    async def planner(request):
+        calls.append(request)
+        return plan_for("Paris")
+
+    async def run():
+        first = await cache.get_or_plan("Tell me about Paris and the weather", planner, AGENTS)
+        second = await cache.get_or_plan("Tell me about Rome and the weather", planner, AGENTS)
+        return first, second
+
+    (_, first_hit), (plan, second_hit) = asyncio.run(run())
+    assert (first_hit, second_hit) == (False, True)
+    assert len(calls) == 1
+    assert [step["input"] for step in plan["steps"]] == ["Rome history", "Rome"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_invalid_rebound_plan_is_a_miss():
+    cache = PlanCache()
+    cache.store('Tell me about "Paris" and the weather', plan_for("Paris"), 1.0)
+    assert cache.stats()["templates"] == 1
+    # The new slot value makes step s2 depend on itself
+    assert cache.lookup('Tell me about "{s2}" and the weather', AGENTS) is None
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 1
+
+
+def compare_plan(first, second):
+    return parse_plan({"steps": [
+        {"id": "s1", "agent": "search_agent", "input": first},
+        {"id": "s2", "agent": "search_agent", "input": second},
+        {"id": "s3", "agent": "conversation_agent",
+         "input": f"Answer Compare {first} and {second} using: {{s1}} {{s2}}", "depends_on": ["s1", "s2"]},
+    ]}, AGENTS)
+
+
+def test_slot_found_only_in_the_synthesis_step_is_not_templated():
+    # The synthesis step echoes the request, but the worker step rewrote "Compare Paris"
+    assert _templatize(compare_plan("Paris", "London"), ["Compare Paris", "London"]) is None
+    # A slot word left as literal text would leak into other requests' plans
+    plan = parse_plan({"steps": [
+        {"id": "s1", "agent": "search_agent", "input": "New York and York history"},
+    ]}, AGENTS)
+    assert _templatize(plan, ["New York"]) is None
+
+
+def test_cached_plan_is_not_reused_for_a_different_structure():
+    cache = PlanCache()
+    cache.store("Compare Paris and London", compare_plan("Paris", "London"), 1.0)
+    assert cache.lookup("Forecast Boston and Denver", AGENTS) is None
+
+    plan = cache.lookup("Compare Rome and Berlin", AGENTS)
+    assert [step["input"] for step in plan["steps"]] == [
+        "Rome", "Berlin", "Answer Compare Rome and Berlin using: {s1} {s2}"
+    ]
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from deadline import DeadlineExceeded
+from planner import PlanError, execute_plan, looks_multi_step, parse_plan, sink_steps
+
+AGENTS = ["search_agent", "weather_agent", "conversation_agent"]
+
+PLAN_TEXT = """Here is the plan:
+{"steps": [
+    {"id": "s1", "agent": "search_agent", "input": "Paris", "depends_on": []},
+    {"id": "s2", "agent": "weather_agent", "input": "Paris"},
+    {"id": "s3", "agent": "conversation_agent", "input": "Answer using: {s1} {s2}"}
+]}"""
+
+
+def test_looks_multi_step():
+    assert looks_multi_step("Tell me about Paris and also check the weather")
+    assert looks_multi_step("파리에 대해 알려주고 날씨도 알려줘")
+    assert not looks_multi_step("What is the difference between Python and Java?")
+    assert not looks_multi_step("사랑 노래 추천 해줘")
+    assert not looks_multi_step("공부하고 싶은 분야 추천")
+    assert not looks_multi_step("weather and search")
+
+
+def test_parse_plan_infers_dependencies():
+    plan = parse_plan(PLAN_TEXT, AGENTS)
+    assert plan["steps"][2]["depends_on"] == ["s1", "s2"]
+    assert sink_steps(plan) == ["s3"]
+
+
+def test_braces_that_are_not_step_ids_are_kept():
+    plan = parse_plan({"steps": [
+        {"id": "s1", "agent": "search_agent", "input": "python {name} format"},
+        {"id": "s2", "agent": "conversation_agent", "input": "Explain {s1} with {name}"},
+    ]}, AGENTS)
+    assert [step["depends_on"] for step in plan["steps"]] == [[], ["s1"]]
+    log = []
+    runners = {agent: runner(agent, log) for agent in AGENTS}
+    asyncio.run(execute_plan(plan, runners))
+    assert log == [
+        ("search_agent", "python {name} format"),
+        ("conversation_agent", "Explain search_agent:python {name} format with {name}"),
+    ]
+
+
+@pytest.mark.parametrize("plan", [
+    {"steps": []},
+    {"steps": [{"id": "s1", "agent": "unknown_agent"}]},
+    {"steps": [{"id": "s1", "agent": "search_agent", "input": "{s2}"},
+               {"id": "s2", "agent": "search_agent", "input": "{s1}"}]},
+    {"steps": [{"id": "s1", "agent": "search_agent", "depends_on": ["s9"]}]},
+])
+def test_parse_plan_rejects_invalid_plans(plan):
+    with pytest.raises(PlanError):
+        parse_plan(plan, AGENTS)
+
+
+def runner(name, log):
+    async def run(text):
+        log.append((name, text))
+        return f"{name}:{text}"
+    return run
+
+
+def test_execute_plan_passes_outputs_along_edges():
+    log = []
+    runners = {agent: runner(agent, log) for agent in AGENTS}
+    result = asyncio.run(execute_plan(parse_plan(PLAN_TEXT, AGENTS), runners))
+    assert result["success"]
+    assert result["response"] == "conversation_agent:Answer using: search_agent:Paris weather_agent:Paris"
+    assert log[-1][0] == "conversation_agent"
+
+
+def test_execute_plan_stops_on_failure():
+    async def fail(text):
+        raise RuntimeError("boom")
+    runners = {agent: runner(agent, []) for agent in AGENTS}
+    runners["weather_agent"] = fail
+    result = asyncio.run(execute_plan(parse_plan(PLAN_TEXT, AGENTS), runners))
+    assert not result["success"]
+    assert result["failed_step"] == "s2" and "boom" in result["error"]
+    assert "s3" not in result["outputs"]
+
+
+def test_execute_plan_reraises_deadline():
+    async def late(text):
+        raise DeadlineExceeded("deadline")
+    runners = {agent: runner(agent, []) for agent in AGENTS}
+    runners["search_agent"] = late
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(execute_plan(parse_plan(PLAN_TEXT, AGENTS), runners))
+
+
+def test_cancelling_execute_plan_cancels_running_steps():
+    cancelled = []
+
+    async def slow(text):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+        return text
+
+    runners = {agent: slow for agent in AGENTS}
+
+    async def run():
+        task = asyncio.create_task(execute_plan(parse_plan(PLAN_TEXT, AGENTS), runners))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Before asyncio.run() would cancel leftover tasks itself
+        assert sorted(cancelled) == ["Paris", "Paris"]
+
+    asyncio.run(run())
+
+
+def test_deadline_cancels_the_other_running_steps():
+    cancelled = []
+
+    async def late(text):
+        raise DeadlineExceeded("deadline")
+
+    async def slow(text):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+
+    runners = {"search_agent": late, "weather_agent": slow, "conversation_agent": slow}
+
+    async def run():
+        with pytest.raises(DeadlineExceeded):
+            await execute_plan(parse_plan(PLAN_TEXT, AGENTS), runners)
+        assert cancelled == ["Paris"]
+
+    asyncio.run(run())
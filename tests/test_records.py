@@ -0,0 +1,40 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from records import AgentResponse, ToolResult, response_text
+
+
+def test_record_behaves_like_a_dict():
+    result = AgentResponse(success=True, response="hi", plan={"steps": []})
+    assert result["response"] == "hi" and result.get("error") is None
+    assert dict(result) == {"success": True, "response": "hi", "plan": {"steps": []}}
+    assert "error" not in result and "plan" in result
+    assert json.loads(json.dumps(result.to_dict()))["plan"] == {"steps": []}
+    assert not hasattr(result, "__dict__")
+
+
+def test_none_fields_are_hidden_and_deletable():
+    result = ToolResult(success=False, error="x")
+    result["worker"] = 1
+    del result["error"]
+    assert dict(result) == {"success": False, "worker": 1}
+    with pytest.raises(KeyError):
+        result["error"]
+    with pytest.raises(KeyError):
+        del result["title"]
+
+
+def test_from_mapping_returns_records_as_is():
+    record = ToolResult(success=True)
+    assert ToolResult.from_mapping(record) is record
+    assert ToolResult.from_mapping({"success": True, "title": "Paris"})["title"] == "Paris"
+
+
+def test_response_text_reuses_the_single_text_block():
+    text = "answer"
+    result = SimpleNamespace(message={"content": [{"text": text}]})
+    assert response_text(result) is text
+    both = SimpleNamespace(message={"content": [{"text": "a"}, {"toolUse": {}}, {"text": "b"}]})
+    assert response_text(both) == "a\nb"
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from request_memo import memoized_call, normalize_argument, request_memo_scope
+
+
+def counting(result="ok", delay=0.0):
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+    return calls, factory
+
+
+def test_normalize_argument_ignores_case_and_punctuation():
+    assert normalize_argument("Quantum mechanics?") == normalize_argument("quantum  Mechanics")
+    assert normalize_argument("What is the?") == "what is the"
+
+
+def test_reordered_arguments_do_not_collide():
+    assert normalize_argument("convert list to dict") != normalize_argument("convert dict to list")
+    assert normalize_argument("flights from Paris to Rome") != normalize_argument("flights from Rome to Paris")
+    assert normalize_argument("the quantum mechanics") != normalize_argument("quantum mechanics")
+
+    calls, factory = counting()
+
+    async def run():
+        with request_memo_scope() as memo:
+            await memoized_call("duckduckgo_search", "flights from Paris to Rome", factory)
+            await memoized_call("duckduckgo_search", "flights from Rome to Paris", factory)
+            return memo.stats()
+
+    assert asyncio.run(run())["avoided"] == 0
+    assert len(calls) == 2
+
+
+def test_duplicate_calls_in_one_request_run_once():
+    calls, factory = counting({"success": False})
+
+    async def run():
+        with request_memo_scope() as memo:
+            results = await asyncio.gather(
+                memoized_call("get_position", "Seattle", factory),
+                memoized_call("get_position", "seattle", factory),
+            )
+            results.append(await memoized_call("get_position", "SEATTLE", factory))
+            return results, memo.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [{"success": False}] * 3  # failed lookups are memoized too
+    assert len(calls) == 1
+    assert stats == {"calls": 3, "avoided": 2, "avoided_by_tool": {"get_position": 2}}
+
+
+def test_memo_is_scoped_to_the_request():
+    calls, factory = counting()
+
+    async def run():
+        for _ in range(2):
+            with request_memo_scope():
+                await memoized_call("wikipedia_search", "Paris", factory)
+        await memoized_call("wikipedia_search", "Paris", factory)  # outside a request: direct call
+
+    asyncio.run(run())
+    assert len(calls) == 3
+
+
+def test_exceptions_are_not_memoized():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("timeout")
+        return "ok"
+
+    async def run():
+        with request_memo_scope() as memo:
+            with pytest.raises(RuntimeError):
+                await memoized_call("duckduckgo_search", "Paris", flaky)
+            result = await memoized_call("duckduckgo_search", "Paris", flaky)
+            return result, await memoized_call("duckduckgo_search", "Paris", flaky), memo.stats()
+
+    first, duplicate, stats = asyncio.run(run())
+    assert first == duplicate == "ok"
+    assert len(attempts) == 2  # the raised call was retried, the successful one reused
+    assert stats["avoided"] == 1
@@ -0,0 +1,50 @@
+import json
+from types import SimpleNamespace
+
+from result_shaping import (
+    CHARS_PER_TOKEN, ResultShapingHooks, ShapingStats, compact_dumps, estimate_tokens, shape_result,
+    truncate_to_budget,
+)
+
+
+def test_text_within_budget_is_unchanged():
+    assert truncate_to_budget("short text", 10) == "short text"
+
+
+def test_truncated_text_fits_budget_with_marker():
+    text = "x" * 1000
+    result = truncate_to_budget(text, 50)
+    assert len(result) <= 50 * CHARS_PER_TOKEN
+    assert "tokens truncated" in result
+
+
+def test_marker_longer_than_budget_is_clamped():
+    for budget in (0, 1, 2, 5):
+        result = truncate_to_budget("y" * 500, budget)
+        assert len(result) <= budget * CHARS_PER_TOKEN
+
+
+def test_compact_dumps_drops_empty_values():
+    assert json.loads(compact_dumps({"a": 1, "b": None, "c": "", "d": []})) == {"a": 1}
+
+
+def test_shape_result_respects_budget():
+    shaped = shape_result("duckduckgo_search", {"summary": "z" * 10000}, max_tokens=20)
+    assert estimate_tokens(shaped) <= 20
+
+
+def test_shape_result_zero_budget_is_not_the_default():
+    assert shape_result("duckduckgo_search", {"summary": "z" * 10000}, max_tokens=0) == ""
+
+
+def test_result_with_only_dropped_blocks_keeps_a_placeholder():
+    stats = ShapingStats()
+    event = SimpleNamespace(
+        tool_use={"name": "http_request"},
+        result={"toolUseId": "t1", "status": "success", "content": [
+            {"text": "Headers: {'content-type': 'text/html'}"}, {"text": "Metrics: 12ms"},
+        ]},
+    )
+    ResultShapingHooks(stats=stats).shape_tool_result(event)
+    assert event.result["content"] and event.result["content"][0]["text"]
+    assert stats.summary()["http_request"]["calls"] == 1
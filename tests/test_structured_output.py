@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+import pydantic
+
+from model_config import ModelPool
+from stub_model import StubModel
+
+
+class Forecast(pydantic.BaseModel):
+    city: str
+    temperature: float = 15.0
+
+
+PROMPT = [{"role": "user", "content": [{"text": "Seattle"}]}]
+
+
+def structured(model):
+    async def run():
+        output = None
+        async for event in model.structured_output(Forecast, PROMPT):
+            output = event.get("output", output)
+        return output
+    return asyncio.run(run())
+
+
+def test_stub_tool_call_reply():
+    model = StubModel(responder=lambda messages, specs: {"tool": specs[0]["name"], "input": {"city": "Rome"}})
+    assert structured(model) == Forecast(city="Rome")
+
+
+def test_stub_json_text_reply():
+    model = StubModel(responder=lambda messages, specs: json.dumps({"city": "Paris", "temperature": 21}))
+    assert structured(model) == Forecast(city="Paris", temperature=21)
+
+
+def test_stub_plain_text_fills_required_fields():
+    assert structured(StubModel()).city.startswith("Stub response to: Seattle")
+
+def test_pool_fails_over_throttled_structured_output():
+    throttled = StubModel(throttle_rate=1.0)
+    healthy = StubModel(responder=lambda messages, specs: {"tool": specs[0]["name"], "input": {"city": "Oslo"}})
+    pool = ModelPool([("throttled", throttled), ("healthy", healthy)])
+    assert structured(pool).city == "Oslo"
+    stats = pool.stats()
+    assert stats["throttled"]["throttles"] == 1
+    assert all(endpoint["outstanding"] == 0 for endpoint in stats.values())
@@ -0,0 +1,26 @@
+import asyncio
+
+
+def test_wikipedia_search_reports_lookup_errors(labs, monkeypatch):
+    tools = labs["tools"]
+
+    def unreachable(query):
+        raise ConnectionError("wikipedia unreachable")
+
+    monkeypatch.setattr(tools, "_cached_wikipedia", lambda query: None)
+    monkeypatch.setattr(tools, "_fetch_wikipedia", unreachable)
+    result = asyncio.run(tools.wikipedia_search_async("Paris"))
+    assert result == {"success": False, "error": "wikipedia unreachable"}
+
+
+def test_sync_wikipedia_search_uses_the_async_tool(labs, monkeypatch):
+    tools = labs["tools"]
+    calls = []
+
+    async def wikipedia_search_async(query):
+        calls.append(query)
+        return {"success": True, "title": query}
+
+    monkeypatch.setattr(tools, "wikipedia_search_async", wikipedia_search_async)
+    assert tools.wikipedia_search("Paris") == {"success": True, "title": "Paris"}
+    assert calls == ["Paris"]
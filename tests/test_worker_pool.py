@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import worker_pool
+from cache import SharedCacheTier
+from worker_pool import WorkerPool
+
+
+def bare_pool(readers):
+    # Dispatcher state only: no worker processes are started
+    pool = object.__new__(WorkerPool)
+    pool._results = readers
+    pool._restarted_reader = None
+    pool._pending = {}
+    pool._lock = threading.Lock()
+    return pool
+
+
+def test_collector_survives_a_broken_worker_pipe():
+    live_reader, live_writer = multiprocessing.Pipe(duplex=False)
+    dead_reader, dead_writer = multiprocessing.Pipe(duplex=False)
+    pool = bare_pool([live_reader, dead_reader])
+    future = Future()
+    pool._pending[7] = (future, 0)
+    collector = threading.Thread(target=pool._collect_results, daemon=True)
+    collector.start()
+
+    dead_writer.close()  # the worker exited
+    live_writer.send((7, {"success": True}))
+    assert future.result(timeout=5) == {"success": True}
+    live_writer.close()
+    collector.join(timeout=5)
+    assert not collector.is_alive()
+
+
+def test_wait_is_bounded_by_the_deadline(monkeypatch):
+    monkeypatch.setattr(worker_pool, "DEADLINE_GRACE", 2.0)
+    pool = bare_pool([])
+    assert pool._wait_timeout(3.0, time.time() + 60) == 3.0
+    assert 11.0 < pool._wait_timeout(None, time.time() + 10) <= 12.0
+    assert pool._wait_timeout(None, time.time() - 10) == 2.0
+    assert pool._wait_timeout(None, None) is None
+
+
+def test_timed_out_request_is_dropped():
+    pool = bare_pool([])
+    future = Future()
+    pool._pending[1] = (future, 0)
+    result = pool._timed_out(future, "hi")
+    assert not result["success"] and result["user_input"] == "hi"
+    assert pool._pending == {} and future.cancelled()
+
+
+def test_shared_tier_writes_in_the_background(tmp_path):
+    tier = SharedCacheTier(str(tmp_path / "cache.sqlite"))
+    expires_at = time.time() + 60
+    for i in range(10):
+        tier.set("geo", f"k{i}", {"n": i}, expires_at)
+    assert tier.flush()
+    assert tier.get("geo", "k3") == ({"n": 3}, expires_at)
+    assert tier.stats["writes"] == 10 and tier.stats["write_errors"] == 0
+
+    # Another process's connection sees the committed rows
+    assert SharedCacheTier(tier.path).get("geo", "k9")[0] == {"n": 9}
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    # Real worker processes (stub model); they inherit the environment at spawn
+    monkeypatch.setenv("MODEL_PROVIDER", "stub")
+    monkeypatch.setenv("METRICS", "1")
+    monkeypatch.setenv("KNOWLEDGE_INDEX_PATH", str(tmp_path / "no_index"))
+    pool = WorkerPool(2, shared_cache_path=str(tmp_path / "cache.sqlite"))
+    yield pool
+    pool.close()
+
+
+def test_worker_metrics_are_labelled_by_worker(pool):
+    states = pool.metrics_states(timeout=30)
+    assert [labels for labels, _ in states] == [{"worker": "0"}, {"worker": "1"}]
+    assert all("workshop_cache_hit_ratio" in state["gauges"] for _, state in states)
+    assert pool._pending == {}
+
+
+def test_killed_worker_is_restarted_for_its_users(pool, monkeypatch):
+    monkeypatch.setattr(worker_pool, "WORKER_RESTART_BACKOFF", 0.1)
+    worker = worker_pool.worker_index_for("alice", pool.num_workers)
+    assert pool.process("alice", "hi", timeout=30)["worker"] == worker
+
+    killed = pool.pids[worker]
+    os.kill(killed, signal.SIGKILL)
+    deadline = time.time() + 30
+    while pool.pids[worker] == killed and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert pool.pids[worker] != killed
+    assert pool.process("alice", "hi again", timeout=30)["worker"] == worker
+    assert pool._dead == {}
+
+
+def test_shared_tier_reads_do_not_wait_for_the_writer(tmp_path):
+    tier = SharedCacheTier(str(tmp_path / "cache.sqlite"))
+    expires_at = time.time() + 60
+    tier.set("geo", "k", {"n": 1}, expires_at)
+    assert tier.flush()
+
+    with tier._lock:  # held by the writer thread while it commits a batch
+        result = []
+        reader = threading.Thread(target=lambda: result.append(tier.get("geo", "k")))
+        reader.start()
+        reader.join(timeout=5)
+        assert result == [({"n": 1}, expires_at)]
@@ -0,0 +1,254 @@
+"""Cache Warmup - Strands Agents Workshop
+
+Keeps the geocode and search caches warm across deploys:
+- Warm list: top-N locations and topics from a JSON file, or derived
+  from the access log written by the previous run
+- Prefetch: bounded-concurrency geocode / Wikipedia requests at startup
+  for entries not cached yet (stored directly; warmup lookups are not
+  counted as accesses, so the warm list does not keep itself hot)
+- Refresh-ahead: hot entries close to expiry are re-fetched in the
+  background, so they never go stale on the request path
+
+Warm list format (JSON):
+    {"locations": ["New York", "Seattle"], "topics": ["Python", "Paris"]}
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from cache import TieredCache, geocode_cache, normalize_key, search_cache
+
+
+# Access log of the last run (overridable with CACHE_ACCESS_LOG)
+DEFAULT_ACCESS_LOG_PATH = os.path.join(tempfile.gettempdir(), "strands_workshop_access_log.json")
+
+# Locations / topics prefetched at startup
+DEFAULT_TOP_N = 50
+
+# Concurrent prefetch/refresh calls (Nominatim asks for light usage)
+DEFAULT_CONCURRENCY = 2
+
+# Seconds between refresh-ahead scans
+REFRESH_INTERVAL = 60.0
+
+# Refresh entries when less than this share of their TTL remains
+REFRESH_FRACTION = 0.1
+
+_SEARCH_KEY_PREFIXES = ("wikipedia:", "duckduckgo:")
+
+
+def access_log_path() -> str:
+    """Return the access log path (CACHE_ACCESS_LOG or the default)"""
+    return os.getenv("CACHE_ACCESS_LOG") or DEFAULT_ACCESS_LOG_PATH
+
+
+def save_access_log(path: str = None, limit: int = 500) -> Dict[str, Any]:
+    """
+    Write the most looked-up cache keys of this run
+
+    Args:
+        path: Access log file (default: access_log_path())
+        limit: Keys kept per cache
+
+    Returns:
+        Saved log data
+    """
+    path = path or access_log_path()
+    data = {
+        "saved_at": time.time(),
+        "geocode": dict(geocode_cache.hot_keys(limit)),
+        "search": dict(search_cache.hot_keys(limit)),
+    }
+    # 임시 파일에 쓴 뒤 교체 (중간에 종료돼도 이전 로그 유지)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+    return data
+
+
+def _topics_from_search_keys(counts: Dict[str, int]) -> Counter:
+    """Merge search cache keys ("wikipedia:python") into topic counts"""
+    topics: Counter = Counter()
+    for key, count in counts.items():
+        for prefix in _SEARCH_KEY_PREFIXES:
+            if key.startswith(prefix):
+                topics[key[len(prefix):]] += count
+    return topics
+
+
+def load_warm_list(path: str = None, access_log: str = None, top_n: int = DEFAULT_TOP_N) -> Dict[str, List[str]]:
+    """
+    Load the locations and topics to prefetch
+
+    Args:
+        path: Warm list JSON file (takes precedence)
+        access_log: Access log of the last run (default: access_log_path())
+        top_n: Maximum locations and topics each
+
+    Returns:
+        {"locations": [...], "topics": [...]} (empty lists if nothing is available)
+    """
+    if path:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return {
+            "locations": [str(item) for item in data.get("locations", [])][:top_n],
+            "topics": [str(item) for item in data.get("topics", [])][:top_n],
+        }
+
+    access_log = access_log or access_log_path()
+    try:
+        with open(access_log, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"locations": [], "topics": []}
+
+    locations = Counter(data.get("geocode", {}))
+    topics = _topics_from_search_keys(data.get("search", {}))
+    return {
+        "locations": [key for key, _ in locations.most_common(top_n)],
+        "topics": [key for key, _ in topics.most_common(top_n)],
+    }
+
+
+async def prefetch(warm_list: Dict[str, List[str]], concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """
+    Prefetch a warm list into the geocode and search caches
+
+    Geocoding is the cacheable hop of the weather path; forecasts are
+    fetched by the weather agent per request and are not cached. Entries
+    already cached (e.g. in the shared tier) are not requested again.
+
+    Args:
+        warm_list: Output of load_warm_list()
+        concurrency: Maximum concurrent requests
+
+    Returns:
+        Prefetch summary (warmed, failed, seconds)
+    """
+    from tools import refresh_cache_entry
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm(cache: TieredCache, key: str) -> bool:
+        if cache.get(key, count=False) is not None:
+            return True
+        async with semaphore:
+            try:
+                return await refresh_cache_entry(cache.namespace, key)
+            except Exception:
+                return False
+
+    started = time.perf_counter()
+    calls = [warm(geocode_cache, normalize_key(location)) for location in warm_list.get("locations", [])]
+    calls += [warm(search_cache, normalize_key(f"wikipedia:{topic}")) for topic in warm_list.get("topics", [])]
+    results = await asyncio.gather(*calls)
+    return {
+        "warmed": sum(results),
+        "failed": len(results) - sum(results),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class CacheWarmer:
+    """
+    Background thread that prefetches a warm list and refreshes hot entries
+
+    An entry is hot when it was looked up since it was last refreshed.
+    """
+
+    def __init__(
+        self,
+        warm_list: Optional[Dict[str, List[str]]] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        refresh_interval: float = REFRESH_INTERVAL,
+        refresh_fraction: float = REFRESH_FRACTION,
+        refresh: bool = True,
+        caches: Optional[List[TieredCache]] = None
+    ):
+        """
+        Initialize cache warmer
+
+        Args:
+            warm_list: Locations/topics to prefetch at startup
+            concurrency: Maximum concurrent prefetch/refresh calls
+            refresh_interval: Seconds between refresh-ahead scans
+            refresh_fraction: Refresh entries with less than this share of TTL left
+            refresh: Run refresh-ahead after the prefetch
+            caches: Caches to refresh (default: geocode and search caches)
+        """
+        self.warm_list = warm_list or {"locations": [], "topics": []}
+        self.concurrency = concurrency
+        self.refresh_interval = refresh_interval
+        self.refresh_fraction = refresh_fraction
+        self.refresh = refresh
+        self.caches = caches or [geocode_cache, search_cache]
+        self.stats = {"warmed": 0, "prefetch_failed": 0, "refreshed": 0, "refresh_failed": 0}
+        self._refreshed_at_count: Dict[tuple, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start prefetching (and refresh-ahead) in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), name="cache-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def _run(self) -> None:
+        """Prefetch, then refresh hot entries until stopped"""
+        summary = await prefetch(self.warm_list, self.concurrency)
+        self.stats["warmed"] += summary["warmed"]
+        self.stats["prefetch_failed"] += summary["failed"]
+
+        while self.refresh and not await asyncio.to_thread(self._stop.wait, self.refresh_interval):
+            await self.refresh_once()
+
+    def _hot_expiring(self) -> List[tuple]:
+        """Return (cache, key, lookups) of hot entries close to expiry"""
+        candidates = []
+        for cache in self.caches:
+            # Counts are read under the cache lock (request threads update them)
+            counts = cache.lookup_counts(cache.expiring(cache.ttl * self.refresh_fraction))
+            for key, lookups in counts.items():
+                if lookups > self._refreshed_at_count.get((cache.namespace, key), 0):
+                    candidates.append((cache, key, lookups))
+        return candidates
+
+    async def refresh_once(self) -> int:
+        """
+        Refresh hot entries close to expiry
+
+        Returns:
+            Number of entries refreshed
+        """
+        from tools import refresh_cache_entry
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(cache: TieredCache, key: str, lookups: int) -> bool:
+            async with semaphore:
+                try:
+                    refreshed = await refresh_cache_entry(cache.namespace, key)
+                except Exception:
+                    refreshed = False
+            # 다시 조회되기 전까지는 재갱신하지 않음
+            self._refreshed_at_count[(cache.namespace, key)] = lookups
+            return refreshed
+
+        results = await asyncio.gather(*(refresh(*candidate) for candidate in self._hot_expiring()))
+        self.stats["refreshed"] += sum(results)
+        self.stats["refresh_failed"] += len(results) - sum(results)
+        return sum(results)
@@ -0,0 +1,407 @@
+"""Worker Pool - Strands Agents Workshop
+
+Process-pool deployment mode. Each worker process owns its own model
+clients, HTTP connection pools, local caches and per-user orchestrator
+sessions, and runs its own event loop. A front dispatcher routes every
+user to the same worker (user affinity). Geocode/search caches are
+shared across workers through the SQLite tier in cache.py.
+"""
+import asyncio
+import concurrent.futures
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from records import AgentResponse
+
+
+# Default shared cache file (overridable with SHARED_CACHE_PATH)
+DEFAULT_SHARED_CACHE_PATH = os.path.join(tempfile.gettempdir(), "strands_workshop_cache.sqlite")
+
+# Orchestrator sessions kept per worker (least recently used are dropped)
+MAX_SESSIONS_PER_WORKER = 1000
+
+# Seconds past the request deadline to wait for a worker's (partial) result
+DEADLINE_GRACE = 5.0
+
+# Restarts of a worker process that exits, and the delay before the first one (doubles)
+MAX_WORKER_RESTARTS = 3
+WORKER_RESTART_BACKOFF = 0.5
+
+
+class WorkerDied(RuntimeError):
+    """The worker process handling a request exited before answering"""
+
+
+def worker_index_for(user_id: str, num_workers: int) -> int:
+    """Stable user → worker mapping (same user always lands on the same worker)"""
+    return zlib.crc32(user_id.encode("utf-8")) % num_workers
+
+
+def _worker_main(
+    index: int,
+    requests: "multiprocessing.Queue",
+    results: "multiprocessing.connection.Connection",
+    model_id: Optional[str],
+    shared_cache_path: str,
+    quiet: bool,
+    resume: bool = False,
+) -> None:
+    """Worker process entry point"""
+    os.environ["SHARED_CACHE_PATH"] = shared_cache_path
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+    asyncio.run(_worker_loop(index, requests, results, model_id, resume))
+
+    from cache import get_shared_tier
+
+    shared = get_shared_tier()
+    if shared is not None:
+        shared.flush()  # commit queued cache writes before the process exits
+
+
+async def _worker_loop(
+    index: int,
+    requests: "multiprocessing.Queue",
+    results: "multiprocessing.connection.Connection",
+    model_id: Optional[str],
+    resume: bool = False,
+) -> None:
+    """
+    Serve requests for this worker's users on one event loop
+
+    With resume, a user's interrupted or partially answered journaled
+    requests run when their session starts: after the request that
+    started it has been answered (it keeps its whole budget), together
+    within one more request budget. Their results come back in
+    "resumed" on the user's next result.
+    """
+    # Imported here so every worker builds its own clients after spawn
+    from model_config import get_configured_model
+    from orchestrator_agent import OrchestratorAgent
+
+    model = get_configured_model(model_id)
+    sessions: "OrderedDict[str, OrchestratorAgent]" = OrderedDict()
+    session_locks: Dict[str, asyncio.Lock] = {}
+    resume_pending = set()
+    resumed_results: Dict[str, List[AgentResponse]] = {}
+    loop = asyncio.get_running_loop()
+    in_flight = set()
+
+    async def handle(request_id: int, user_id: str, user_input: str, deadline: Optional[float]) -> None:
+        orchestrator = sessions.get(user_id)
+        if orchestrator is None:
+            orchestrator = sessions[user_id] = OrchestratorAgent(model, user_id)
+            if resume:
+                resume_pending.add(user_id)
+            if len(sessions) > MAX_SESSIONS_PER_WORKER:
+                evicted, _ = sessions.popitem(last=False)
+                session_locks.pop(evicted, None)
+        sessions.move_to_end(user_id)
+
+        # One agent conversation cannot run two turns at once
+        lock = session_locks.setdefault(user_id, asyncio.Lock())
+        # Time spent queued counts against the deadline (wall clock: shared across processes)
+        budget = max(0.0, deadline - time.time()) if deadline is not None else None
+        try:
+            async with lock:
+                result = await orchestrator.process_user_input_async(user_input, budget)
+        except Exception as e:
+            result = AgentResponse(
+                success=False,
+                error=f"워커 처리 중 오류가 발생했습니다: {str(e)}",
+                user_input=user_input
+            )
+        result["worker"] = index
+        resumed = resumed_results.pop(user_id, None)
+        if resumed:
+            result["resumed"] = resumed
+        results.send((request_id, result))
+
+        if user_id in resume_pending:
+            # Answered first; the resumed requests share one more request budget
+            resume_pending.discard(user_id)
+            resume_deadline = time.time() + budget if budget is not None else None
+            try:
+                async with lock:
+                    resumed = await orchestrator.resume_incomplete_async(deadline=resume_deadline)
+            except Exception:
+                resumed = []  # still journaled as incomplete: resumed again next session
+            if resumed:
+                resumed_results.setdefault(user_id, []).extend(resumed)
+
+    from metrics import metrics
+
+    while True:
+        item = await loop.run_in_executor(None, requests.get)
+        if item is None:
+            break
+        if item[1] is None:
+            # No user: the dispatcher asks for this worker's metrics
+            results.send((item[0], metrics.export_state()))
+            continue
+        task = asyncio.create_task(handle(*item))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+class WorkerPool:
+    """
+    Front dispatcher for N worker processes
+
+    Requests are routed by user_id so each user's session (conversation
+    history, caches warmed by that user) stays on one worker. A worker
+    process that exits is restarted in place, so its users keep their
+    worker (their sessions start over).
+    """
+
+    def __init__(
+        self,
+        num_workers: int = None,
+        model_id: str = None,
+        shared_cache_path: str = None,
+        quiet: bool = True,
+        resume: bool = False
+    ):
+        """
+        Start worker processes
+
+        Args:
+            num_workers: Number of worker processes (default: CPU count)
+            model_id: Model ID each worker configures
+            shared_cache_path: SQLite file for the cross-worker cache tier
+            quiet: Silence worker stdout (agent progress output)
+            resume: Resume each user's journaled interrupted requests when
+                their session starts on a worker
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.shared_cache_path = (
+            shared_cache_path or os.getenv("SHARED_CACHE_PATH") or DEFAULT_SHARED_CACHE_PATH
+        )
+
+        self._context = multiprocessing.get_context("spawn")
+        self._model_id = model_id
+        self._quiet = quiet
+        self._resume = resume
+        self._requests = [self._context.Queue() for _ in range(self.num_workers)]
+        self._results: List[multiprocessing.connection.Connection] = [None] * self.num_workers
+        self._processes: List[multiprocessing.Process] = [None] * self.num_workers
+        self._restarts = [0] * self.num_workers
+        # The monitor announces a restarted worker's result pipe to the collector
+        self._restarted_reader, self._restarted_writer = multiprocessing.Pipe(duplex=False)
+        for index in range(self.num_workers):
+            self._start_worker(index)
+
+        self._ids = itertools.count()
+        self._pending: Dict[int, Tuple[Future, int]] = {}  # request ID → (future, worker)
+        self._dead: Dict[int, int] = {}  # worker → exit code (no restarts left)
+        self._closing = False
+        self._lock = threading.Lock()
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._monitor_workers, daemon=True)
+        self._monitor.start()
+
+    def _start_worker(self, index: int) -> None:
+        """Start a worker process on its request queue with a new result pipe"""
+        # One result pipe per worker: a worker killed mid-write cannot
+        # corrupt or lock the channel of the others
+        reader, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                index, self._requests[index], writer, self._model_id, self.shared_cache_path, self._quiet, self._resume
+            ),
+            name=f"strands-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        writer.close()  # the worker holds the only writer: its exit ends the pipe
+        self._results[index] = reader
+        self._processes[index] = process
+
+    @property
+    def pids(self) -> List[int]:
+        """Worker process IDs (resource monitoring)"""
+        return [process.pid for process in self._processes]
+
+    def _collect_results(self) -> None:
+        """Resolve pending futures as workers report results"""
+        readers = list(self._results)
+        restarted = self._restarted_reader
+        while readers or restarted is not None:
+            for reader in multiprocessing.connection.wait(readers + ([restarted] if restarted else [])):
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError):
+                    # Worker exited (a partial message from a killed worker is dropped too)
+                    if reader is restarted:
+                        restarted = None
+                    else:
+                        readers.remove(reader)
+                    continue
+                if reader is restarted:
+                    readers.append(self._results[message])
+                    continue
+                request_id, result = message
+                with self._lock:
+                    future, _ = self._pending.pop(request_id, (None, None))
+                if future is not None and not future.done():
+                    future.set_result(result)
+
+    def _monitor_workers(self) -> None:
+        """
+        Fail the pending requests of a worker process that exits, then restart it
+
+        Restarts back off (WORKER_RESTART_BACKOFF, doubling) and stop after
+        MAX_WORKER_RESTARTS; requests for a worker without restarts left
+        fail with WorkerDied.
+        """
+        alive = {process.sentinel: index for index, process in enumerate(self._processes)}
+        while alive:
+            for sentinel in multiprocessing.connection.wait(list(alive)):
+                index = alive.pop(sentinel)
+                if self._closing:
+                    continue
+                self._processes[index].join(timeout=1)  # reap it so exitcode is set
+                exitcode = self._processes[index].exitcode
+                restart = self._restarts[index] < MAX_WORKER_RESTARTS
+                with self._lock:
+                    failed = [rid for rid, (_, worker) in self._pending.items() if worker == index]
+                    futures = [self._pending.pop(rid)[0] for rid in failed]
+                    if restart:
+                        # The killed worker may hold the old queue's read lock; requests
+                        # submitted from now on wait here for the restarted worker
+                        self._requests[index] = self._context.Queue()
+                    else:
+                        self._dead[index] = exitcode
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(WorkerDied(f"worker {index} exited (code {exitcode})"))
+                if not restart:
+                    continue
+
+                time.sleep(WORKER_RESTART_BACKOFF * 2 ** self._restarts[index])
+                self._restarts[index] += 1
+                if self._closing:
+                    continue
+                self._start_worker(index)
+                self._restarted_writer.send(index)
+                alive[self._processes[index].sentinel] = index
+
+    def submit(self, user_id: str, user_input: str, deadline: float = None) -> Future:
+        """
+        Dispatch a request to the user's worker
+
+        Args:
+            user_id: User identifier (routing key)
+            user_input: User input
+            deadline: Absolute deadline (time.time() seconds)
+
+        Returns:
+            Future resolving to the processing result
+        """
+        return self._submit_to(worker_index_for(user_id, self.num_workers), user_id, user_input, deadline)
+
+    def _submit_to(self, worker: int, *payload) -> Future:
+        future: Future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            if worker in self._dead:
+                future.set_exception(WorkerDied(f"worker {worker} exited (code {self._dead[worker]})"))
+                return future
+            self._pending[request_id] = (future, worker)
+            requests = self._requests[worker]
+        requests.put((request_id, *payload))
+        return future
+
+    def metrics_states(self, timeout: float = 2.0) -> List[Tuple[Dict[str, str], Dict]]:
+        """
+        Metrics registry state of every live worker (metrics.register_source)
+
+        Returns:
+            (labels, state) pairs labelled worker="<index>"; workers that
+            exited or do not answer within timeout are left out
+        """
+        if self._closing:
+            return []
+        futures = [(worker, self._submit_to(worker, None, None, None)) for worker in range(self.num_workers)]
+        deadline = time.monotonic() + timeout
+        states = []
+        for worker, future in futures:
+            try:
+                states.append(({"worker": str(worker)}, future.result(timeout=max(0.0, deadline - time.monotonic()))))
+            except concurrent.futures.TimeoutError:
+                self._drop(future)
+            except WorkerDied:
+                pass
+        return states
+
+    def _wait_timeout(self, timeout: Optional[float], deadline: Optional[float]) -> Optional[float]:
+        """Seconds to wait for a result: timeout, else the deadline plus DEADLINE_GRACE"""
+        if timeout is not None:
+            return timeout
+        if deadline is not None:
+            return max(0.0, deadline - time.time()) + DEADLINE_GRACE
+        return None
+
+    def _drop(self, future: Future) -> None:
+        with self._lock:
+            for request_id, (pending, _) in list(self._pending.items()):
+                if pending is future:
+                    del self._pending[request_id]
+        future.cancel()
+
+    def _timed_out(self, future: Future, user_input: str) -> AgentResponse:
+        self._drop(future)
+        return AgentResponse(success=False, error="워커 응답 시간이 초과되었습니다.", user_input=user_input)
+
+    def process(self, user_id: str, user_input: str, timeout: float = None, deadline: float = None) -> AgentResponse:
+        """
+        Dispatch a request and wait for its result
+
+        The wait is bounded by timeout, else by the deadline plus
+        DEADLINE_GRACE; a request that outlives it gets an error response.
+
+        Raises:
+            WorkerDied: The user's worker process exited
+        """
+        future = self.submit(user_id, user_input, deadline)
+        try:
+            return future.result(timeout=self._wait_timeout(timeout, deadline))
+        except concurrent.futures.TimeoutError:
+            return self._timed_out(future, user_input)
+
+    async def process_async(self, user_id: str, user_input: str, deadline: float = None) -> AgentResponse:
+        """Dispatch a request and await its result (bounded like process())"""
+        future = self.submit(user_id, user_input, deadline)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self._wait_timeout(None, deadline))
+        except asyncio.TimeoutError:
+            return self._timed_out(future, user_input)
+
+    def close(self) -> None:
+        """Stop workers after their in-flight requests finish"""
+        self._closing = True
+        for queue in self._requests:
+            queue.put(None)
+        for process in self._processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+        self._restarted_writer.close()
+        self._collector.join(timeout=5)
+        self._monitor.join(timeout=5)